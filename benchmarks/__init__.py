@@ -0,0 +1 @@
+"""Performance benchmark suites; see harness.py and the bench_*.py modules."""
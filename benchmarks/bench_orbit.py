@@ -0,0 +1,145 @@
+"""
+Orbit Benchmarks - Propagation and coordinate transform hot paths
+
+Runs fully offline against the bundled FALLBACK_TLES. Each path is timed
+scalar (the per-point code the API uses) and, where the code base has one,
+batched (the vectorized numpy counterpart); the table reports the per-item
+speedup between the two.
+
+Usage (from the repository root):
+
+    python -m benchmarks.bench_orbit                # run and print
+    python -m benchmarks.bench_orbit --save         # record baselines/orbit.json
+    python -m benchmarks.bench_orbit --compare      # fail on >20% regressions
+    python -m benchmarks.bench_orbit --compare --threshold 0.1 --only track
+"""
+
+import os
+import sys
+import tempfile
+from datetime import datetime, timezone, timedelta
+
+import numpy as np
+from sgp4.api import Satrec
+
+from benchmarks.harness import Case, main
+from coordinate_transforms import (
+    julian_date, teme_to_geodetic, teme_to_geodetic_batch, teme_to_ecef,
+    ecef_to_geodetic, ecef_to_geodetic_batch
+)
+from orbit_propagator import OrbitPropagator, generate_swath_polygon
+from tle_fetcher import FALLBACK_TLES, SATELLITE_CATALOG, parse_tle_epoch
+
+BATCH_POINTS = 1440  # One day at 60 s
+
+# (label, window, step seconds) for generate_track
+TRACK_WINDOWS = [
+    ("90m-60s", timedelta(minutes=90), 60),
+    ("24h-30s", timedelta(hours=24), 30),
+    ("7d-60s", timedelta(days=7), 60),
+]
+
+
+def _seed_state_store():
+    """
+    Point the orbit API at a private state store holding fresh fallback
+    TLEs, so the constellation endpoint never tries to reach CelesTrak.
+    """
+    state_dir = tempfile.mkdtemp(prefix="orbit-bench-")
+    os.environ["ORBIT_STATE_DIR"] = state_dir
+
+    from state_store import FileStateStore
+    store = FileStateStore(state_dir)
+    now = datetime.now(timezone.utc).isoformat()
+
+    for sat_key, sat_info in SATELLITE_CATALOG.items():
+        fallback = FALLBACK_TLES[sat_info["norad_id"]]
+        store.write(f"tle-{sat_key}", {
+            "tle": {
+                **fallback,
+                "epoch": parse_tle_epoch(fallback["line1"]).isoformat(),
+                "source": "fallback",
+            },
+            "refreshed_at": now,
+        })
+
+
+def build_cases():
+    """Build the benchmark cases (propagation fixed one day past the epoch)."""
+    tles = list(FALLBACK_TLES.values())
+    tle = FALLBACK_TLES[SATELLITE_CATALOG["noaa21"]["norad_id"]]
+    prop = OrbitPropagator(tle["line1"], tle["line2"])
+    start = prop.tle_epoch + timedelta(days=1)
+
+    # Raw TEME states for the transform benchmarks
+    jd0, fr0 = julian_date(start)
+    fr = fr0 + np.arange(BATCH_POINTS) * 60.0 / 86400.0
+    jd = np.full(BATCH_POINTS, jd0)
+    _, r_teme, v_teme = prop.satellite.sgp4_array(jd, fr)
+    r_list, v_list = r_teme[0].tolist(), v_teme[0].tolist()
+    r_ecef, _ = teme_to_ecef(r_list, v_list, jd0, fr0)
+    r_ecef_batch = np.array([teme_to_ecef(r, v, jd0, f)[0]
+                             for r, v, f in zip(r_teme.tolist(), v_teme.tolist(), fr)])
+
+    cases = [
+        Case("satrec/scalar",
+             lambda: [Satrec.twoline2rv(t["line1"], t["line2"]) for t in tles],
+             items=len(tles)),
+        Case("satrec/propagator",
+             lambda: [OrbitPropagator(t["line1"], t["line2"]) for t in tles],
+             items=len(tles)),
+
+        Case("propagate/scalar", lambda: prop.propagate(start)),
+        Case("propagate/batch",
+             lambda: prop.propagate_batch(start, 60, BATCH_POINTS),
+             items=BATCH_POINTS),
+    ]
+
+    for label, window, step in TRACK_WINDOWS:
+        points = int(window.total_seconds() // step) + 1
+        end = start + window
+        cases += [
+            Case(f"track-{label}/scalar",
+                 lambda end=end, step=step: prop.generate_track(start, end, step),
+                 items=points),
+            Case(f"track-{label}/batch",
+                 lambda end=end, step=step: list(prop.iter_track(start, end, step)),
+                 items=points),
+        ]
+
+    cases += [
+        Case("teme_to_geodetic/scalar",
+             lambda: teme_to_geodetic(r_list, v_list, start)),
+        Case("teme_to_geodetic/batch",
+             lambda: teme_to_geodetic_batch(r_teme, v_teme, jd, fr),
+             items=BATCH_POINTS),
+
+        Case("ecef_to_geodetic/scalar", lambda: ecef_to_geodetic(r_ecef)),
+        Case("ecef_to_geodetic/batch",
+             lambda: ecef_to_geodetic_batch(r_ecef_batch),
+             items=BATCH_POINTS),
+
+        Case("swath_polygon/scalar",
+             lambda: generate_swath_polygon(45.0, -93.0, 1530)),
+
+        # Uses the current time, so results drift slightly with TLE age
+        Case("polar_crossings/scalar", lambda: prop.find_polar_crossings(24)),
+    ]
+
+    _seed_state_store()
+    from server import app
+
+    client = app.test_client()
+    client.get("/api/constellation/current")  # Load the propagators
+
+    cases.append(
+        Case("constellation/scalar",
+             lambda: client.get("/api/constellation/current"),
+             items=len(SATELLITE_CATALOG))
+    )
+
+    return cases
+
+
+if __name__ == "__main__":
+    sys.exit(main("orbit", build_cases()))
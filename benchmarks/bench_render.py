@@ -0,0 +1,197 @@
+"""
+Render Benchmarks - Per-layer cost of Night Sky renders
+
+Renders a fixed matrix of locations, directions, resolutions and layer
+sets at a fixed time through sky_generator.generate_sky_image with a
+RenderProfile attached, and reports per-layer cost (observer, style, each
+layer call, draw, tight bbox, encode) alongside each render's total.
+
+Results use the harness's JSON format, so they can be saved as a baseline
+and compared later: "render/<config>" entries hold total render time and
+"layer/<stage>" entries the mean stage time across the matrix.
+
+Usage (from the repository root; renders take seconds each):
+
+    python -m benchmarks.bench_render                   # quick matrix
+    python -m benchmarks.bench_render --matrix full --save
+    python -m benchmarks.bench_render --compare --threshold 0.3
+"""
+
+import argparse
+import itertools
+import json
+import os
+import statistics
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+from benchmarks.harness import BASELINE_DIR, compare, environment
+
+BACKEND_DIR = Path(__file__).resolve().parents[1] / "nightsky" / "backend"
+
+RENDER_TIME = datetime(2025, 1, 25, 3, 0, tzinfo=timezone.utc)
+
+LOCATIONS = {
+    "nyc": (40.7128, -74.0060),
+    "quito": (-0.1807, -78.4678),
+    "tromso": (69.6492, 18.9553),
+}
+
+DIRECTIONS = ["S", "N"]
+
+RESOLUTIONS = [800, 1600]
+
+LAYER_SETS = {
+    "minimal": {
+        "show_milky_way": False,
+        "show_constellations": False,
+        "show_constellation_labels": False,
+        "show_planets": False,
+        "show_moon": False,
+    },
+    "default": {},
+    "full": {
+        "show_constellation_borders": True,
+        "show_messier": True,
+        "show_gridlines": True,
+        "show_ecliptic": True,
+        "show_celestial_equator": True,
+        "show_sun": True,
+    },
+}
+
+MATRICES = {
+    "quick": (["nyc"], ["S"], [800], list(LAYER_SETS)),
+    "full": (list(LOCATIONS), DIRECTIONS, RESOLUTIONS, list(LAYER_SETS)),
+}
+
+
+def render_matrix(matrix: str, repeats: int = 1, memory: bool = False):
+    """
+    Render every configuration of a matrix with profiling.
+
+    Returns:
+        Run document in the harness format, plus "profiles" holding each
+        configuration's stage list
+    """
+    # starplot resolves its data and the ephemeris relative to the backend
+    os.chdir(BACKEND_DIR)
+    sys.path.insert(0, str(BACKEND_DIR))
+    from sky_generator import generate_sky_image
+    from render_profile import RenderProfile
+
+    results = {}
+    profiles = {}
+    stage_ms = {}
+
+    for location, direction, resolution, layers in itertools.product(*MATRICES[matrix]):
+        name = f"{location}-{direction}-{resolution}-{layers}"
+        lat, lon = LOCATIONS[location]
+        totals = []
+
+        for _ in range(repeats):
+            with RenderProfile(memory=memory) as profile:
+                generate_sky_image(lat, lon, direction, RENDER_TIME,
+                                   resolution=resolution, profile=profile,
+                                   **LAYER_SETS[layers])
+            totals.append(profile.total_ms / 1000)
+            for stage in profile.stages:
+                stage_ms.setdefault(stage["name"], []).append(stage["ms"])
+
+        median = statistics.median(totals)
+        results[f"render/{name}"] = {"median_s": median, "min_s": min(totals),
+                                     "repeats": repeats}
+        profiles[name] = profile.to_dict()
+        print(f"  {name:<32} {median:7.2f} s", file=sys.stderr)
+
+    for stage, samples in stage_ms.items():
+        results[f"layer/{stage}"] = {"median_s": statistics.fmean(samples) / 1000,
+                                     "samples": len(samples)}
+
+    return {
+        "suite": "render",
+        "matrix": matrix,
+        "recorded_at": datetime.now(timezone.utc).isoformat(),
+        "environment": environment(),
+        "results": results,
+        "profiles": profiles,
+    }
+
+
+def print_report(run: dict, rows=None):
+    """Print render totals, then per-layer cost ranked by share of time."""
+    by_name = {row["name"]: row for row in rows or []}
+
+    def versus(name):
+        row = by_name.get(name)
+        if not row:
+            return ""
+        if row["ratio"] is None:
+            return row["status"]
+        return f"{row['ratio']:.2f}x {row['status']}"
+
+    results = run["results"]
+    renders = {k: v for k, v in results.items() if k.startswith("render/")}
+    layers = {k: v for k, v in results.items() if k.startswith("layer/")}
+
+    print(f"{'render':<40} {'total':>10} {'vs baseline':>16}")
+    for name, result in renders.items():
+        print(f"{name:<40} {result['median_s']:>8.2f} s {versus(name):>16}")
+
+    # savefig is the sum of draw, tight_bbox and encode; leave it out of shares
+    shares = {k: v["median_s"] for k, v in layers.items() if k != "layer/savefig"}
+    total = sum(shares.values()) or 1.0
+
+    print()
+    print(f"{'layer (mean where rendered)':<40} {'time':>10} {'share':>7} {'vs baseline':>16}")
+    for name in sorted(shares, key=shares.get, reverse=True):
+        print(f"{name:<40} {shares[name] * 1000:>7.1f} ms {shares[name] / total:>6.1%} "
+              f"{versus(name):>16}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run the render benchmarks")
+    parser.add_argument("--matrix", choices=MATRICES, default="quick")
+    parser.add_argument("--repeats", type=int, default=1)
+    parser.add_argument("--memory", action="store_true",
+                        help="also record peak traced memory (much slower)")
+    parser.add_argument("--save", nargs="?", const=BASELINE_DIR / "render.json",
+                        type=Path, metavar="PATH",
+                        help="write results as a baseline (default baselines/render.json)")
+    parser.add_argument("--compare", nargs="?", const=BASELINE_DIR / "render.json",
+                        type=Path, metavar="PATH",
+                        help="compare against a baseline and fail on regressions")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="allowed slowdown as a fraction (default %(default)s)")
+    args = parser.parse_args(argv)
+
+    # Resolve paths before render_matrix changes directory
+    save = args.save.resolve() if args.save else None
+    baseline_path = args.compare.resolve() if args.compare else None
+
+    print(f"Rendering the {args.matrix} matrix...", file=sys.stderr)
+    run = render_matrix(args.matrix, args.repeats, args.memory)
+
+    rows = None
+    if baseline_path:
+        baseline = json.loads(baseline_path.read_text())
+        rows = compare(run, baseline, [], args.threshold)
+
+    print()
+    print_report(run, rows)
+
+    if save:
+        save.parent.mkdir(parents=True, exist_ok=True)
+        save.write_text(json.dumps(run, indent=2) + "\n")
+        print(f"\nResults written to {save}")
+
+    regressed = [row["name"] for row in rows or [] if row["status"] == "regressed"]
+    if regressed:
+        print(f"\n{len(regressed)} regression(s): {', '.join(regressed)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
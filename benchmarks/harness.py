@@ -0,0 +1,257 @@
+"""
+Benchmark Harness - Timing, JSON baselines and regression checks
+
+Shared by the benchmark suites in this directory. A suite is a list of
+Case objects; each case times one callable with a calibrated loop count
+(so fast and slow paths get comparable precision) and records the median,
+minimum and mean time per call over several repeats.
+
+Results are written as JSON. A later run can be compared against a saved
+baseline: a case regresses when its median exceeds the baseline median by
+more than the threshold (global, or per case via Case.threshold).
+
+Baselines are machine-specific; record them on the machine you compare on.
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+BASELINE_DIR = Path(__file__).resolve().parent / "baselines"
+
+DEFAULT_THRESHOLD = 0.20     # 20% slower than baseline is a regression
+DEFAULT_REPEATS = 5
+DEFAULT_MIN_TIME = 0.2       # Seconds per repeat used to calibrate loops
+
+
+@dataclass
+class Case:
+    """
+    One benchmarked code path.
+
+    Attributes:
+        name: Unique name, e.g. "propagate/scalar"
+        func: Callable timed with no arguments
+        items: Work items per call (points, states...), for throughput
+        threshold: Regression threshold overriding the run's default
+        group: Groups scalar/batch variants of the same path in the table
+    """
+    name: str
+    func: Callable[[], object]
+    items: int = 1
+    threshold: Optional[float] = None
+    group: str = field(default="")
+
+    def __post_init__(self):
+        if not self.group:
+            self.group = self.name.split("/")[0]
+
+
+def time_case(case: Case, repeats: int = DEFAULT_REPEATS,
+              min_time: float = DEFAULT_MIN_TIME) -> Dict:
+    """
+    Time a case.
+
+    Returns:
+        Dict with median_s, min_s, mean_s (per call), loops, repeats,
+        items and items_per_s
+    """
+    case.func()  # Warm caches and lazy imports
+
+    # Calibrate: double the loop count until one repeat takes min_time
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            case.func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or loops >= 1 << 20:
+            break
+        loops *= 2
+
+    samples = [elapsed / loops]
+    for _ in range(repeats - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            case.func()
+        samples.append((time.perf_counter() - start) / loops)
+
+    median = statistics.median(samples)
+    return {
+        "median_s": median,
+        "min_s": min(samples),
+        "mean_s": statistics.fmean(samples),
+        "loops": loops,
+        "repeats": len(samples),
+        "items": case.items,
+        "items_per_s": case.items / median if median > 0 else None,
+    }
+
+
+def environment() -> Dict:
+    """Describe the machine and interpreter a run was recorded on."""
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "system": platform.system(),
+        "processor": platform.processor(),
+    }
+
+
+def run_cases(cases: List[Case], repeats: int = DEFAULT_REPEATS,
+              min_time: float = DEFAULT_MIN_TIME,
+              only: Optional[str] = None) -> Dict:
+    """
+    Time every case (optionally only names containing `only`).
+
+    Returns:
+        Run document: {"recorded_at", "environment", "results": {name: ...}}
+    """
+    results = {}
+    for case in cases:
+        if only and only not in case.name:
+            continue
+        results[case.name] = time_case(case, repeats, min_time)
+        print(f"  {case.name:<40} {_format_seconds(results[case.name]['median_s'])}",
+              file=sys.stderr)
+
+    return {
+        "recorded_at": datetime.now(timezone.utc).isoformat(),
+        "environment": environment(),
+        "results": results,
+    }
+
+
+def compare(run: Dict, baseline: Dict, cases: List[Case],
+            threshold: float = DEFAULT_THRESHOLD) -> List[Dict]:
+    """
+    Compare a run against a baseline.
+
+    Returns:
+        One row per case in the run: name, median_s, baseline_s, ratio,
+        threshold and status ("ok", "regressed", "improved" or "new")
+    """
+    thresholds = {c.name: c.threshold for c in cases if c.threshold is not None}
+    rows = []
+
+    for name, result in run["results"].items():
+        limit = thresholds.get(name, threshold)
+        base = baseline.get("results", {}).get(name)
+        row = {"name": name, "median_s": result["median_s"], "baseline_s": None,
+               "ratio": None, "threshold": limit, "status": "new"}
+
+        if base:
+            ratio = result["median_s"] / base["median_s"]
+            row.update(baseline_s=base["median_s"], ratio=ratio)
+            if ratio > 1 + limit:
+                row["status"] = "regressed"
+            elif ratio < 1 / (1 + limit):
+                row["status"] = "improved"
+            else:
+                row["status"] = "ok"
+
+        rows.append(row)
+
+    return rows
+
+
+def print_table(run: Dict, cases: List[Case], rows: Optional[List[Dict]] = None):
+    """Print per-case timings, scalar/batch speedups and baseline ratios."""
+    results = run["results"]
+    by_name = {row["name"]: row for row in rows or []}
+
+    print(f"{'case':<40} {'median':>10} {'items/s':>12} {'vs baseline':>14}")
+    for case in cases:
+        result = results.get(case.name)
+        if result is None:
+            continue
+        rate = f"{result['items_per_s']:,.0f}" if result["items_per_s"] else "-"
+        row = by_name.get(case.name)
+        versus = ""
+        if row and row["ratio"] is not None:
+            versus = f"{row['ratio']:.2f}x {row['status']}"
+        elif row:
+            versus = row["status"]
+        print(f"{case.name:<40} {_format_seconds(result['median_s']):>10} "
+              f"{rate:>12} {versus:>14}")
+
+    # Batch vs scalar speedup per group, on a per-item basis
+    groups = {}
+    for case in cases:
+        if case.name in results:
+            variant = case.name.split("/")[-1]
+            groups.setdefault(case.group, {})[variant] = results[case.name]
+    speedups = [
+        (group, v["scalar"]["items_per_s"], v["batch"]["items_per_s"])
+        for group, v in groups.items() if "scalar" in v and "batch" in v
+    ]
+    if speedups:
+        print()
+        print(f"{'batch speedup (per item)':<40}")
+        for group, scalar, batch in speedups:
+            print(f"  {group:<38} {batch / scalar:>9.1f}x")
+
+
+def main(suite: str, cases: List[Case], argv: Optional[List[str]] = None) -> int:
+    """
+    Command line entry point shared by the suites.
+
+    Returns:
+        Process exit code: 1 if any case regressed, else 0
+    """
+    parser = argparse.ArgumentParser(description=f"Run the {suite} benchmarks")
+    parser.add_argument("--save", nargs="?", const=BASELINE_DIR / f"{suite}.json",
+                        type=Path, metavar="PATH",
+                        help=f"write results as a baseline (default baselines/{suite}.json)")
+    parser.add_argument("--compare", nargs="?", const=BASELINE_DIR / f"{suite}.json",
+                        type=Path, metavar="PATH",
+                        help="compare against a baseline and fail on regressions")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown as a fraction (default %(default)s)")
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS)
+    parser.add_argument("--min-time", type=float, default=DEFAULT_MIN_TIME,
+                        help="seconds per repeat used to calibrate loop counts")
+    parser.add_argument("--only", help="run only cases whose name contains this")
+    parser.add_argument("--json", type=Path, metavar="PATH",
+                        help="also write this run's results to PATH")
+    args = parser.parse_args(argv)
+
+    print(f"Running {suite} benchmarks...", file=sys.stderr)
+    run = run_cases(cases, args.repeats, args.min_time, args.only)
+    run["suite"] = suite
+
+    rows = None
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())
+        rows = compare(run, baseline, cases, args.threshold)
+
+    print()
+    print_table(run, cases, rows)
+
+    for path in (args.save, args.json):
+        if path:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(run, indent=2) + "\n")
+            print(f"\nResults written to {path}")
+
+    regressed = [row["name"] for row in rows or [] if row["status"] == "regressed"]
+    if regressed:
+        print(f"\n{len(regressed)} regression(s): {', '.join(regressed)}")
+        return 1
+    return 0
+
+
+def _format_seconds(seconds: float) -> str:
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.1f} us"
+    if seconds < 1:
+        return f"{seconds * 1e3:.2f} ms"
+    return f"{seconds:.2f} s"
@@ -12,6 +12,10 @@ Reference frames:
 import math
 from datetime import datetime, timezone
 
+import numpy as np
+
+from tracing import traced
+
 # WGS84 ellipsoid parameters
 WGS84_A = 6378.137  # Semi-major axis (equatorial radius) in km
 WGS84_B = 6356.752314245  # Semi-minor axis (polar radius) in km
@@ -162,6 +166,7 @@ def ecef_to_geodetic(r_ecef: list) -> tuple:
     return lat_deg, lon_deg, alt
 
 
+@traced("teme_to_geodetic")
 def teme_to_geodetic(r_teme: list, v_teme: list, dt: datetime) -> dict:
     """
     Full transform: TEME position/velocity to geodetic coordinates.
@@ -189,6 +194,117 @@ def teme_to_geodetic(r_teme: list, v_teme: list, dt: datetime) -> dict:
     }
 
 
+def gmst_from_jd_array(jd: np.ndarray, fr: np.ndarray) -> np.ndarray:
+    """
+    Vectorized gmst_from_jd over arrays of Julian dates.
+
+    Returns GMST in radians for each (jd, fr) pair.
+    """
+    T = ((jd - 2451545.0) + fr) / 36525.0
+
+    gmst_sec = (67310.54841 +
+                (876600.0 * 3600 + 8640184.812866) * T +
+                0.093104 * T**2 -
+                6.2e-6 * T**3)
+
+    # np.mod already returns a non-negative result for a positive divisor
+    return np.mod(gmst_sec, 86400.0) / 86400.0 * 2.0 * math.pi
+
+
+def teme_to_ecef_batch(r_teme: np.ndarray, v_teme: np.ndarray,
+                       jd: np.ndarray, fr: np.ndarray) -> tuple:
+    """
+    Vectorized teme_to_ecef.
+
+    Args:
+        r_teme: (N, 3) positions in km (TEME frame)
+        v_teme: (N, 3) velocities in km/s (TEME frame)
+        jd, fr: (N,) Julian date whole and fractional parts
+
+    Returns:
+        (r_ecef, v_ecef): (N, 3) arrays in the ECEF frame
+    """
+    gmst = gmst_from_jd_array(jd, fr)
+    cos_g = np.cos(gmst)
+    sin_g = np.sin(gmst)
+
+    r_ecef = np.empty_like(r_teme)
+    r_ecef[:, 0] = cos_g * r_teme[:, 0] + sin_g * r_teme[:, 1]
+    r_ecef[:, 1] = -sin_g * r_teme[:, 0] + cos_g * r_teme[:, 1]
+    r_ecef[:, 2] = r_teme[:, 2]
+
+    omega_earth = 7.292115e-5
+
+    v_ecef = np.empty_like(v_teme)
+    v_ecef[:, 0] = cos_g * v_teme[:, 0] + sin_g * v_teme[:, 1] + omega_earth * r_ecef[:, 1]
+    v_ecef[:, 1] = -sin_g * v_teme[:, 0] + cos_g * v_teme[:, 1] - omega_earth * r_ecef[:, 0]
+    v_ecef[:, 2] = v_teme[:, 2]
+
+    return r_ecef, v_ecef
+
+
+def ecef_to_geodetic_batch(r_ecef: np.ndarray) -> tuple:
+    """
+    Vectorized ecef_to_geodetic (same fixed-iteration Bowring scheme).
+
+    Args:
+        r_ecef: (N, 3) positions in km
+
+    Returns:
+        (latitude, longitude, altitude): (N,) arrays, degrees and km
+    """
+    x, y, z = r_ecef[:, 0], r_ecef[:, 1], r_ecef[:, 2]
+
+    lon_rad = np.arctan2(y, x)
+    p = np.hypot(x, y)
+
+    lat_rad = np.arctan2(z, p * (1 - WGS84_E2))
+    for _ in range(10):
+        sin_lat = np.sin(lat_rad)
+        N = WGS84_A / np.sqrt(1 - WGS84_E2 * sin_lat**2)
+        lat_rad = np.arctan2(z + WGS84_E2 * N * sin_lat, p)
+
+    sin_lat = np.sin(lat_rad)
+    cos_lat = np.cos(lat_rad)
+    N = WGS84_A / np.sqrt(1 - WGS84_E2 * sin_lat**2)
+
+    near_pole = np.abs(cos_lat) <= 1e-10
+    with np.errstate(divide="ignore", invalid="ignore"):
+        alt = np.where(
+            near_pole,
+            np.abs(z) / np.abs(sin_lat) - N * (1 - WGS84_E2),
+            p / cos_lat - N
+        )
+
+    return np.degrees(lat_rad), np.degrees(lon_rad), alt
+
+
+@traced("teme_to_geodetic_batch")
+def teme_to_geodetic_batch(r_teme: np.ndarray, v_teme: np.ndarray,
+                           jd: np.ndarray, fr: np.ndarray) -> dict:
+    """
+    Vectorized teme_to_geodetic for arrays of states.
+
+    Args:
+        r_teme: (N, 3) positions in km (TEME frame)
+        v_teme: (N, 3) velocities in km/s (TEME frame)
+        jd, fr: (N,) Julian date whole and fractional parts
+
+    Returns:
+        dict of (N,) arrays: latitude, longitude, altitude_km, velocity_km_s
+        (unrounded)
+    """
+    r_ecef, v_ecef = teme_to_ecef_batch(r_teme, v_teme, jd, fr)
+    lat, lon, alt = ecef_to_geodetic_batch(r_ecef)
+
+    return {
+        "latitude": lat,
+        "longitude": lon,
+        "altitude_km": alt,
+        "velocity_km_s": np.sqrt(np.sum(v_ecef**2, axis=1))
+    }
+
+
 def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     """
     Calculate great-circle distance between two points.
@@ -0,0 +1,355 @@
+"""
+Cutout Cache - HiPS2FITS cutouts fetched server-side into a disk cache
+
+In proxy mode (CUTOUT_PROXY=1) the cutout endpoints hand out this server's
+image URLs instead of alasky's, and each distinct cutout is fetched from
+CDS once:
+
+    cache = CutoutCache(fetch)
+    key = cutout_key("dss2_color", ra, dec, fov, 400, 400, "jpg")
+    image = cache.get(key)                  # Cutout(path, digest, content_type)
+    thumb = cache.thumbnail(key, 128)       # derived locally
+
+Requests are normalized first (RA wrapped, coordinates rounded to about
+0.04 arcseconds, field of view to four significant digits), so clicks that
+differ only in noise share an entry.
+
+Storage is content-addressed: image bytes live in blobs/ under a SHA-256
+digest of their content, and a SQLite index maps each normalized request to its
+blob. Identical images (e.g. blank fields outside a survey's footprint)
+are stored once, and the digest doubles as a strong ETag. The index also
+records last access; once the blobs exceed CUTOUT_CACHE_MB, the least
+recently used cutouts are dropped, and blobs no cutout refers to are deleted.
+
+Thumbnails are derived from the cached full-size image with Pillow when it
+is installed, and otherwise fetched from CDS at the smaller size.
+
+Environment variables:
+    CUTOUT_PROXY       "1" serves cutouts through this server (default off)
+    CUTOUT_CACHE_DIR   Cache directory (default: cutouts/ in ORBIT_STATE_DIR)
+    CUTOUT_CACHE_MB    Size cap of the cached images (default 512)
+"""
+
+import hashlib
+import io
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait as wait_futures
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import upstream
+from metrics import cache_event
+from state_store import DEFAULT_STATE_DIR
+from tracing import span
+
+PROXY_ENABLED = os.environ.get("CUTOUT_PROXY") == "1"
+CACHE_MB = float(os.environ.get("CUTOUT_CACHE_MB", 512))
+FETCH_WORKERS = 6          # Concurrent CDS fetches per process
+TOUCH_INTERVAL = 60        # Seconds between last-access updates of one entry
+THUMB_QUALITY = 85
+
+CONTENT_TYPES = {"jpg": "image/jpeg", "png": "image/png", "fits": "application/fits"}
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS cutouts (
+        key TEXT PRIMARY KEY,
+        digest TEXT NOT NULL,
+        content_type TEXT NOT NULL,
+        accessed_at REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS cutouts_accessed ON cutouts (accessed_at);
+    CREATE INDEX IF NOT EXISTS cutouts_digest ON cutouts (digest);
+    CREATE TABLE IF NOT EXISTS blobs (
+        digest TEXT PRIMARY KEY,
+        size INTEGER NOT NULL
+    );
+"""
+
+try:
+    from PIL import Image
+except ImportError:  # Thumbnails are then fetched at the smaller size
+    Image = None
+
+
+class CutoutKey(NamedTuple):
+    """A normalized cutout request."""
+    survey: str
+    ra: float
+    dec: float
+    fov: float
+    width: int
+    height: int
+    format: str
+
+    @property
+    def digest(self) -> str:
+        return hashlib.sha1(json.dumps(self, separators=(",", ":")).encode()).hexdigest()
+
+
+class Cutout(NamedTuple):
+    """A cached image: file path, content digest (the ETag) and MIME type."""
+    path: Path
+    digest: str
+    content_type: str
+
+
+def cutout_key(survey: str, ra: float, dec: float, fov: float,
+               width: int, height: int, output_format: str) -> CutoutKey:
+    """Normalize a cutout request into its cache key."""
+    output_format = output_format.lower()
+    if output_format == "jpeg":
+        output_format = "jpg"
+    return CutoutKey(survey, round(ra % 360.0, 5), round(dec, 5), float(f"{fov:.4g}"),
+                     int(width), int(height), output_format)
+
+
+def default_directory() -> Path:
+    """CUTOUT_CACHE_DIR, or cutouts/ in the state directory."""
+    path = os.environ.get("CUTOUT_CACHE_DIR")
+    if path:
+        return Path(path)
+    return Path(os.environ.get("ORBIT_STATE_DIR", DEFAULT_STATE_DIR)) / "cutouts"
+
+
+class CutoutCache:
+    """
+    Size-capped, content-addressed disk cache of cutout images.
+
+    Args:
+        fetch: Called with a CutoutKey; returns (image bytes, content type)
+            or raises
+        directory: Cache directory (shared by all worker processes)
+        max_mb: Size cap of the stored images
+    """
+
+    def __init__(self, fetch: Callable[[CutoutKey], Tuple[bytes, str]],
+                 directory=None, max_mb: float = CACHE_MB, workers: int = FETCH_WORKERS):
+        self.fetch = fetch
+        self.directory = Path(directory) if directory else default_directory()
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._workers = workers
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._conn = None
+        self._executor = None
+        self._pid = None
+
+    def _connect(self) -> sqlite3.Connection:
+        # Connections and threads do not survive a fork; workers build their own
+        if self._conn is None or self._pid != os.getpid():
+            (self.directory / "blobs").mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.directory / "index.sqlite3", timeout=10,
+                                   check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+            self._executor = None
+            self._pid = os.getpid()
+        return self._conn
+
+    def _pool(self) -> ThreadPoolExecutor:
+        self._connect()
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self._workers,
+                                                thread_name_prefix="cutouts")
+        return self._executor
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.directory / "blobs" / digest[:2] / digest
+
+    def __len__(self) -> int:
+        try:
+            with self._db_lock:
+                return self._connect().execute("SELECT COUNT(*) FROM cutouts").fetchone()[0]
+        except sqlite3.Error:
+            return 0
+
+    def size_bytes(self) -> int:
+        """Total size of the stored images."""
+        with self._db_lock:
+            return self._connect().execute(
+                "SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def cached(self, key: CutoutKey) -> Optional[Cutout]:
+        """The cached image for key, or None (never fetches)."""
+        try:
+            with self._db_lock:
+                conn = self._connect()
+                row = conn.execute(
+                    "SELECT digest, content_type, accessed_at FROM cutouts WHERE key = ?",
+                    (key.digest,)).fetchone()
+                if row and time.time() - row[2] > TOUCH_INTERVAL:
+                    conn.execute("UPDATE cutouts SET accessed_at = ? WHERE key = ?",
+                                 (time.time(), key.digest))
+        except sqlite3.Error as e:
+            print(f"Cutout cache lookup failed: {e}")
+            return None
+
+        if row is None:
+            return None
+        path = self._blob_path(row[0])
+        if not path.exists():  # Evicted by another worker since the lookup
+            return None
+        return Cutout(path, row[0], row[1])
+
+    def get(self, key: CutoutKey) -> Cutout:
+        """
+        The image for key, fetching it from CDS on a miss.
+
+        Raises:
+            Whatever the fetch function raised
+        """
+        result = self.get_many([key])[key]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def get_many(self, keys: List[CutoutKey]) -> Dict[CutoutKey, object]:
+        """
+        Images for several keys, missing ones fetched concurrently.
+
+        Concurrent requests for the same key share one fetch.
+
+        Returns:
+            Key -> Cutout, or the exception its fetch raised (get() re-raises)
+        """
+        results = {}
+        missing = []
+        for key in dict.fromkeys(keys):
+            image = self.cached(key)
+            if image is None:
+                missing.append(key)
+            else:
+                cache_event("cutouts", "hit")
+                results[key] = image
+        if not missing:
+            return results
+
+        # The request's deadline lives in the caller's context; carry it over
+        budget = upstream.remaining()
+        deadline_at = None if budget is None else time.monotonic() + budget
+        futures = {}
+        with self._lock:
+            pool = self._pool()
+            for key in missing:
+                future = self._inflight.get(key)
+                if future is None:
+                    cache_event("cutouts", "miss")
+                    future = pool.submit(self._fetch_one, key, deadline_at)
+                    self._inflight[key] = future
+                    future.add_done_callback(lambda _, key=key: self._inflight.pop(key, None))
+                futures[key] = future
+
+        with span("cutouts:fetch", cutouts=len(futures)):
+            wait_futures(futures.values())
+        for key, future in futures.items():
+            results[key] = future.exception() or future.result()
+        return results
+
+    def thumbnail(self, key: CutoutKey, size: int) -> Cutout:
+        """
+        A reduced copy of key's image fitting in size x size pixels.
+
+        Derived locally from the full image when Pillow is available, so a
+        gallery of thumbnails and the full-size views cost one CDS fetch.
+        The thumbnail is cached as the smaller cutout of the same field.
+        """
+        scale = min(1.0, size / max(key.width, key.height))
+        small = key._replace(width=max(1, round(key.width * scale)),
+                             height=max(1, round(key.height * scale)))
+        if Image is None or small == key or key.format == "fits":
+            return self.get(small)
+
+        image = self.cached(small)
+        if image is not None:
+            cache_event("cutouts", "hit")
+            return image
+
+        source = self.get(key)
+        with Image.open(source.path) as img:
+            img.thumbnail((small.width, small.height))
+            out = io.BytesIO()
+            if key.format == "png":
+                img.save(out, "PNG", optimize=True)
+            else:
+                img.convert("RGB").save(out, "JPEG", quality=THUMB_QUALITY)
+        cache_event("cutouts", "derived")
+        return self._store(small, out.getvalue(), source.content_type)
+
+    # ------------------------------------------------------------------
+    # Storage
+    # ------------------------------------------------------------------
+
+    def _fetch_one(self, key: CutoutKey, deadline_at: Optional[float]) -> Cutout:
+        budget = None if deadline_at is None else max(0.0, deadline_at - time.monotonic())
+        with upstream.deadline(budget) if budget is not None else nullcontext():
+            data, content_type = self.fetch(key)
+        return self._store(key, data, content_type)
+
+    def _store(self, key: CutoutKey, data: bytes, content_type: str) -> Cutout:
+        digest = hashlib.sha256(data).hexdigest()[:32]
+        path = self._blob_path(digest)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f"{digest}.{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_bytes(data)
+            os.replace(tmp, path)
+
+        try:
+            with self._db_lock:
+                conn = self._connect()
+                with conn:
+                    conn.execute("BEGIN IMMEDIATE")
+                    conn.execute("INSERT OR IGNORE INTO blobs (digest, size) VALUES (?, ?)",
+                                 (digest, len(data)))
+                    conn.execute(
+                        "INSERT OR REPLACE INTO cutouts (key, digest, content_type, accessed_at) "
+                        "VALUES (?, ?, ?, ?)", (key.digest, digest, content_type, time.time()))
+            self.evict()
+        except sqlite3.Error as e:
+            print(f"Cutout cache write failed: {e}")
+        return Cutout(path, digest, content_type)
+
+    def evict(self) -> int:
+        """Drop least recently used cutouts until under the size cap; returns blobs deleted."""
+        with self._db_lock:
+            conn = self._connect()
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+            if total <= self.max_bytes:
+                return 0
+
+            deleted = []
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                # Oldest first, down to 90% of the cap so evictions come in batches
+                for key, digest in conn.execute(
+                        "SELECT key, digest FROM cutouts ORDER BY accessed_at").fetchall():
+                    if total <= self.max_bytes * 0.9:
+                        break
+                    conn.execute("DELETE FROM cutouts WHERE key = ?", (key,))
+                    # A blob goes with the last cutout referring to it
+                    if conn.execute("SELECT 1 FROM cutouts WHERE digest = ?",
+                                    (digest,)).fetchone() is None:
+                        row = conn.execute("SELECT size FROM blobs WHERE digest = ?",
+                                           (digest,)).fetchone()
+                        if row:
+                            total -= row[0]
+                            conn.execute("DELETE FROM blobs WHERE digest = ?", (digest,))
+                            deleted.append(digest)
+
+        for digest in deleted:
+            self._blob_path(digest).unlink(missing_ok=True)
+            cache_event("cutouts", "eviction")
+        return len(deleted)
@@ -18,6 +18,8 @@ class App {
         this.satellites = [];
         this.orbitInfo = null;
         this.trackData = [];
+        this.trackCursor = null;
+        this.lastTrackExtend = 0;
         this.currentPosition = null;
         this.constellationData = [];
 
@@ -172,12 +174,39 @@ class App {
             const response = await fetch(`${API_BASE}/track?satellite=${this.currentSatellite}&duration=180&step=30`);
             const data = await response.json();
             this.trackData = data.positions;
+            this.trackCursor = data.cursor;
+            this.lastTrackExtend = Date.now();
         } catch (error) {
             console.error('Failed to fetch track:', error);
             throw error;
         }
     }
 
+    /**
+     * Append the points that follow our cursor instead of re-fetching the
+     * whole window; the server asks us to start over when the TLE changed.
+     */
+    async extendTrack() {
+        if (!this.trackCursor) return;
+
+        // The user may switch satellites (or refetch) while this is in flight
+        const satellite = this.currentSatellite;
+        const cursor = this.trackCursor;
+        try {
+            const response = await fetch(`${API_BASE}/track?satellite=${satellite}&duration=180&cursor=${cursor}`);
+            const data = await response.json();
+            if (!response.ok) return;
+            if (this.currentSatellite !== satellite || this.trackCursor !== cursor) return;
+
+            const now = new Date();
+            const kept = data.reset ? [] : this.trackData.filter(p => new Date(p.time) > now);
+            this.trackData = kept.concat(data.positions);
+            this.trackCursor = data.cursor;
+        } catch (error) {
+            console.error('Failed to extend track:', error);
+        }
+    }
+
     async fetchCurrentPosition() {
         try {
             const response = await fetch(`${API_BASE}/current?satellite=${this.currentSatellite}`);
@@ -215,6 +244,12 @@ class App {
     }
 
     async updateSingleSatellite() {
+        // Keep the prediction window rolling forward once a minute
+        if (Date.now() - this.lastTrackExtend > 60000) {
+            this.lastTrackExtend = Date.now();
+            await this.extendTrack();
+        }
+
         const pos = await this.fetchCurrentPosition();
         if (!pos) return;
 
@@ -0,0 +1,30 @@
+"""
+Gunicorn configuration for the orbit API (production serving mode).
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Environment variables:
+    ORBIT_BIND        Listen address (default: 0.0.0.0:5050)
+    WEB_CONCURRENCY   Worker processes (default: 2 x CPU cores + 1)
+    ORBIT_THREADS     Threads per worker (default: 4). Requests are short and
+                      mostly numeric or waiting on SIMBAD/CelesTrak, so a few
+                      threads per process keep workers busy while I/O waits.
+    ORBIT_TIMEOUT     Worker timeout in seconds (default: 60)
+    ORBIT_STATE_DIR   Shared TLE state directory; must be the same for all
+                      workers (default: <tmp>/jpss-orbit-state)
+
+Total concurrency is WEB_CONCURRENCY x ORBIT_THREADS.
+"""
+
+import multiprocessing
+import os
+
+bind = os.environ.get("ORBIT_BIND", "0.0.0.0:5050")
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get("ORBIT_THREADS", 4))
+worker_class = "gthread"
+timeout = int(os.environ.get("ORBIT_TIMEOUT", 60))
+
+# Import the app (and preload TLEs/propagators) once in the master so the
+# workers share that memory copy-on-write
+preload_app = True
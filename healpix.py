@@ -0,0 +1,198 @@
+"""
+HEALPix - Minimal NESTED-scheme HEALPix in numpy
+
+Just what fixed sky tiling needs, without a healpy dependency:
+
+    ang2pix(order, ra, dec)       tile containing each position
+    pix2vec(order, pix)           unit vector of each tile's center
+    query_disc(order, ra, dec, r) every tile that may intersect a cone
+
+Positions are ICRS degrees. order is log2(nside): tiles at order k have
+nside = 2**k and there are 12 * 4**k of them, all of equal area. In the
+NESTED scheme the four children of tile p at order k are 4p..4p+3 at
+order k+1, which query_disc uses to refine a coarse selection.
+
+Follows the reference HEALPix C++ implementation (Gorski et al. 2005).
+"""
+
+import math
+from functools import lru_cache
+
+import numpy as np
+
+# Per base face: ring index of the face's southern corner (in units of
+# nside) and longitude offset of its center (in units of pi/4)
+_JRLL = np.array([2, 2, 2, 2, 3, 3, 3, 3, 4, 4, 4, 4])
+_JPLL = np.array([1, 3, 5, 7, 0, 2, 4, 6, 1, 3, 5, 7])
+
+_COARSE_ORDER = 3  # query_disc's first pass: 768 tiles of about 7 degrees
+
+
+def _spread_bits(v: np.ndarray) -> np.ndarray:
+    """Interleave zeros between the bits of v (for x/y -> nested index)."""
+    v = v.astype(np.int64)
+    v = (v | (v << 16)) & 0x0000FFFF0000FFFF
+    v = (v | (v << 8)) & 0x00FF00FF00FF00FF
+    v = (v | (v << 4)) & 0x0F0F0F0F0F0F0F0F
+    v = (v | (v << 2)) & 0x3333333333333333
+    v = (v | (v << 1)) & 0x5555555555555555
+    return v
+
+
+def _compress_bits(v: np.ndarray) -> np.ndarray:
+    """Inverse of _spread_bits: keep the even bits of v."""
+    v = v & 0x5555555555555555
+    v = (v | (v >> 1)) & 0x3333333333333333
+    v = (v | (v >> 2)) & 0x0F0F0F0F0F0F0F0F
+    v = (v | (v >> 4)) & 0x00FF00FF00FF00FF
+    v = (v | (v >> 8)) & 0x0000FFFF0000FFFF
+    v = (v | (v >> 16)) & 0x00000000FFFFFFFF
+    return v
+
+
+def ang2pix(order: int, ra, dec) -> np.ndarray:
+    """
+    NESTED tile index of each position.
+
+    Args:
+        order: Tiling order (nside = 2**order)
+        ra, dec: Degrees, scalars or arrays
+
+    Returns:
+        int64 array of tile indices
+    """
+    nside = 1 << order
+    z = np.sin(np.radians(np.asarray(dec, dtype=float)))
+    phi = np.radians(np.asarray(ra, dtype=float)) % (2 * math.pi)
+    z, phi = np.broadcast_arrays(z, phi)
+
+    za = np.abs(z)
+    tt = (phi * (2 / math.pi)) % 4.0  # [0, 4)
+
+    # Equatorial belt
+    temp1 = nside * (0.5 + tt)
+    temp2 = nside * z * 0.75
+    jp = (temp1 - temp2).astype(np.int64)
+    jm = (temp1 + temp2).astype(np.int64)
+    ifp = jp >> order
+    ifm = jm >> order
+    face_eq = np.where(ifp == ifm, ifp | 4, np.where(ifp < ifm, ifp, ifm + 8))
+    ix_eq = jm & (nside - 1)
+    iy_eq = nside - (jp & (nside - 1)) - 1
+
+    # Polar caps
+    ntt = np.minimum(tt.astype(np.int64), 3)
+    tp = tt - ntt
+    tmp = nside * np.sqrt(3 * (1 - za))
+    jp_p = np.minimum((tp * tmp).astype(np.int64), nside - 1)
+    jm_p = np.minimum(((1 - tp) * tmp).astype(np.int64), nside - 1)
+    north = z >= 0
+    face_p = np.where(north, ntt, ntt + 8)
+    ix_p = np.where(north, nside - jm_p - 1, jp_p)
+    iy_p = np.where(north, nside - jp_p - 1, jm_p)
+
+    equatorial = za <= 2 / 3
+    face = np.where(equatorial, face_eq, face_p)
+    ix = np.where(equatorial, ix_eq, ix_p)
+    iy = np.where(equatorial, iy_eq, iy_p)
+
+    return (face.astype(np.int64) << (2 * order)) + _spread_bits(ix) + (_spread_bits(iy) << 1)
+
+
+def pix2vec(order: int, pix) -> np.ndarray:
+    """
+    Unit vectors (N x 3) of the centers of NESTED tiles.
+    """
+    nside = 1 << order
+    pix = np.asarray(pix, dtype=np.int64)
+    npface = nside * nside
+    fact2 = 4.0 / (12 * npface)
+    fact1 = 2 * nside * fact2
+
+    face = pix >> (2 * order)
+    ipf = pix & (npface - 1)
+    ix = _compress_bits(ipf)
+    iy = _compress_bits(ipf >> 1)
+
+    jr = (_JRLL[face] << order) - ix - iy - 1
+    nr = np.where(jr < nside, jr, np.where(jr > 3 * nside, 4 * nside - jr, nside))
+    z = np.where(jr < nside, 1 - nr * nr * fact2,
+                 np.where(jr > 3 * nside, nr * nr * fact2 - 1, (2 * nside - jr) * fact1))
+
+    tmp = _JPLL[face] * nr + ix - iy
+    tmp = np.where(tmp < 0, tmp + 8 * nr, tmp)
+    phi = np.where(nr == nside, 0.75 * (math.pi / 2) * tmp * fact1,
+                   (0.5 * (math.pi / 2) * tmp) / np.maximum(nr, 1))
+
+    sin_theta = np.sqrt(np.maximum(0.0, (1 - z) * (1 + z)))
+    return np.stack([sin_theta * np.cos(phi), sin_theta * np.sin(phi), z], axis=-1)
+
+
+def pix2ang(order: int, pix):
+    """(ra, dec) in degrees of the centers of NESTED tiles."""
+    v = pix2vec(order, pix)
+    ra = np.degrees(np.arctan2(v[..., 1], v[..., 0])) % 360.0
+    dec = np.degrees(np.arcsin(np.clip(v[..., 2], -1.0, 1.0)))
+    return ra, dec
+
+
+@lru_cache(maxsize=None)
+def max_pixrad(order: int) -> float:
+    """Largest angle (radians) between a tile's center and any of its points."""
+    nside = 1 << order
+    t1 = (1.0 - 1.0 / nside) ** 2
+    za, phia = 2.0 / 3.0, math.pi / (4 * nside)
+    zb, phib = 1.0 - t1 / 3.0, 0.0
+    sa, sb = math.sqrt(1 - za * za), math.sqrt(1 - zb * zb)
+    va = (sa * math.cos(phia), sa * math.sin(phia), za)
+    vb = (sb * math.cos(phib), sb * math.sin(phib), zb)
+    return _angle(va, vb)
+
+
+def radec_to_vec(ra, dec) -> np.ndarray:
+    """Unit vectors (N x 3, or 3) for positions in degrees."""
+    ra = np.radians(np.asarray(ra, dtype=float))
+    dec = np.radians(np.asarray(dec, dtype=float))
+    cos_dec = np.cos(dec)
+    return np.stack([cos_dec * np.cos(ra), cos_dec * np.sin(ra), np.sin(dec)], axis=-1)
+
+
+def query_disc(order: int, ra: float, dec: float, radius: float) -> np.ndarray:
+    """
+    Tiles at order that may intersect a cone (inclusive: never misses one).
+
+    Keeps the tiles whose center lies within radius + max_pixrad of the
+    cone's center: first among all tiles of a coarse order (centers
+    cached), then among the descendants of the coarse tiles kept.
+
+    Args:
+        order: Tiling order
+        ra, dec: Cone center in degrees
+        radius: Cone radius in degrees
+
+    Returns:
+        Sorted int64 array of tile indices
+    """
+    center = radec_to_vec(ra, dec)
+    radius = math.radians(radius)
+
+    coarse = min(order, _COARSE_ORDER)
+    reach = min(math.pi, radius + max_pixrad(coarse))
+    pix = np.flatnonzero(_centers(coarse) @ center >= math.cos(reach))
+    if coarse == order:
+        return pix
+
+    shift = 2 * (order - coarse)
+    pix = ((pix << shift)[:, None] + np.arange(1 << shift)).ravel()
+    reach = min(math.pi, radius + max_pixrad(order))
+    return pix[pix2vec(order, pix) @ center >= math.cos(reach)]
+
+
+@lru_cache(maxsize=None)
+def _centers(order: int) -> np.ndarray:
+    return pix2vec(order, np.arange(12 << (2 * order), dtype=np.int64))
+
+
+def _angle(a, b) -> float:
+    cross = (a[1] * b[2] - a[2] * b[1], a[2] * b[0] - a[0] * b[2], a[0] * b[1] - a[1] * b[0])
+    return math.atan2(math.sqrt(sum(c * c for c in cross)), sum(x * y for x, y in zip(a, b)))
@@ -0,0 +1,79 @@
+"""
+HTTP Cache - ETag validators and Cache-Control headers for Flask views
+
+Shared by the orbit API (server.py) and the Night Sky API
+(nightsky/backend/server.py). A view decorated with @conditional derives a
+strong ETag from the inputs that fully determine its response (query
+parameters, TLE epoch, catalog version) *before* running, and answers a
+matching If-None-Match with 304 without doing any of the work.
+"""
+
+import hashlib
+import json
+from functools import wraps
+from typing import Callable, Optional, Union
+
+from flask import make_response, request
+
+from metrics import cache_event
+
+# Cache-Control presets
+STATIC_CACHE = "public, max-age=86400"            # Catalog-backed listings
+SHORT_CACHE = "public, max-age=300"               # Data refreshed every few hours
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+
+
+def make_etag(*parts) -> str:
+    """
+    Derive a strong ETag value from JSON-serializable inputs.
+
+    Returns:
+        32-character hex digest (unquoted; Werkzeug adds the quotes)
+    """
+    payload = json.dumps(parts, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:32]
+
+
+def query_etag(*extra) -> str:
+    """ETag over the request path, all query parameters, and extra inputs."""
+    args = sorted(request.args.items(multi=True))
+    return make_etag(request.path, args, *extra)
+
+
+def conditional(etag_func: Callable[[], Optional[str]],
+                cache_control: Union[str, Callable[[], str]] = SHORT_CACHE):
+    """
+    Decorator adding ETag/Cache-Control and conditional GET to a view.
+
+    Args:
+        etag_func: Called before the view; returns the ETag for the current
+            request, or None when the response is not cacheable (e.g. it
+            depends on the current time)
+        cache_control: Cache-Control value, or a callable returning one
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            etag = etag_func()
+            if etag is None:
+                return view(*args, **kwargs)
+
+            if request.if_none_match.contains(etag):
+                cache_event("http_etag", "hit")
+                response = make_response("", 304)
+            else:
+                cache_event("http_etag", "miss")
+                response = make_response(view(*args, **kwargs))
+                # Errors are not cached
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            response.headers["Cache-Control"] = (
+                cache_control() if callable(cache_control) else cache_control
+            )
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1 @@
+"""Offline load-testing harness; see run.py, stubs.py and workload.py."""
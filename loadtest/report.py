@@ -0,0 +1,87 @@
+"""
+Load Test Report - Throughput and latency percentiles per endpoint
+"""
+
+import math
+from typing import Dict, List, Optional
+
+from loadtest.workload import Sample
+
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return math.nan
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def _is_error(sample: Sample) -> bool:
+    # 304 is a successful revalidation; status 0 is a connection failure
+    return sample.status == 0 or sample.status >= 400
+
+
+def summarize(samples: List[Sample], window: float) -> Dict:
+    """
+    Per-endpoint and overall statistics.
+
+    Args:
+        samples: Recorded samples
+        window: Seconds the load ran, for throughput
+
+    Returns:
+        {"endpoints": {name: stats}, "total": stats}, where stats holds
+        count, errors, rps, p50/p95/p99/max in milliseconds, mean bytes and
+        a status code histogram
+    """
+    by_endpoint = {}
+    for sample in samples:
+        by_endpoint.setdefault(sample.endpoint, []).append(sample)
+
+    def stats(group: List[Sample]) -> Dict:
+        latencies = sorted(s.seconds * 1000 for s in group)
+        statuses = {}
+        for s in group:
+            statuses[str(s.status)] = statuses.get(str(s.status), 0) + 1
+        result = {
+            "count": len(group),
+            "errors": sum(1 for s in group if _is_error(s)),
+            "rps": round(len(group) / window, 2) if window > 0 else None,
+            "max_ms": round(latencies[-1], 1) if latencies else None,
+            "mean_bytes": round(sum(s.bytes for s in group) / len(group)) if group else 0,
+            "statuses": statuses,
+        }
+        for pct in PERCENTILES:
+            result[f"p{pct}_ms"] = round(percentile(latencies, pct), 1)
+        return result
+
+    return {
+        "window_s": round(window, 1),
+        "endpoints": {name: stats(group) for name, group in sorted(by_endpoint.items())},
+        "total": stats(samples),
+    }
+
+
+def print_summary(summary: Dict, upstream_counts: Optional[Dict] = None):
+    """Print the per-endpoint table, then upstream traffic if known."""
+    header = (f"{'endpoint':<28} {'count':>7} {'err':>5} {'rps':>7} "
+              f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    print(header)
+    print("-" * len(header))
+
+    rows = list(summary["endpoints"].items()) + [("TOTAL", summary["total"])]
+    for name, s in rows:
+        if name == "TOTAL":
+            print("-" * len(header))
+        print(f"{name:<28} {s['count']:>7} {s['errors']:>5} {s['rps'] or 0:>7.2f} "
+              f"{s['p50_ms']:>8.1f} {s['p95_ms']:>8.1f} {s['p99_ms']:>8.1f} "
+              f"{s['max_ms'] or 0:>8.1f}")
+
+    if upstream_counts:
+        print()
+        print("Upstream requests reaching the stubs:")
+        for name, counts in upstream_counts.items():
+            detail = ", ".join(f"{k} {v}" for k, v in sorted(counts.items())) or "none"
+            print(f"  {name:<18} {detail}")
@@ -0,0 +1,193 @@
+"""
+Load Test Runner - Both backends under a mixed workload, fully offline
+
+Starts the upstream stubs, launches the orbit and Night Sky APIs with
+Gunicorn (the production serving mode) pointed at them, waits for both to
+report ready, drives the virtual users from loadtest.workload and prints
+throughput and p50/p95/p99 latency per endpoint.
+
+Usage (from the repository root):
+
+    python -m loadtest.run --users 50 --duration 120
+    python -m loadtest.run --users 200 --pace 0.25 --mix orbit_viewer=1
+    python -m loadtest.run --latency simbad_tap=1500 --error-rate 0.05
+    python -m loadtest.run --json results.json
+
+Servers that are already running can be targeted with --orbit-url and
+--nightsky-url; they must have been started with the environment printed
+by `python -m loadtest.stubs` to stay offline.
+"""
+
+import argparse
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import requests
+
+from loadtest.report import print_summary, summarize
+from loadtest.stubs import add_stub_arguments, stub_from_args
+from loadtest.workload import DEFAULT_MIX, USER_TYPES, run_workload
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+
+BACKENDS = {
+    # service: (working directory, bind variable, threads variable, ready path)
+    "orbit": (ROOT_DIR, "ORBIT_BIND", "ORBIT_THREADS", "/api/ready"),
+    "nightsky": (ROOT_DIR / "nightsky" / "backend", "NIGHTSKY_BIND", "NIGHTSKY_THREADS",
+                 "/api/nightsky/ready"),
+}
+
+READY_TIMEOUT = 300  # Night Sky preloads starplot, styles and the ephemeris
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_backend(service: str, env: Dict[str, str], workers: int,
+                  threads: Optional[int], log_dir: Path) -> Tuple[subprocess.Popen, str]:
+    """Start one backend under Gunicorn; returns the process and its base URL."""
+    cwd, bind_var, threads_var, _ = BACKENDS[service]
+    port = _free_port()
+    env = {**os.environ, **env, bind_var: f"127.0.0.1:{port}",
+           "WEB_CONCURRENCY": str(workers)}
+    if threads:
+        env[threads_var] = str(threads)
+
+    log = open(log_dir / f"{service}.log", "w")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "wsgi:app"],
+        cwd=cwd, env=env, stdout=log, stderr=subprocess.STDOUT,
+        start_new_session=True,
+    )
+    return process, f"http://127.0.0.1:{port}"
+
+
+def wait_ready(service: str, url: str, process: Optional[subprocess.Popen],
+               timeout: float = READY_TIMEOUT):
+    """Poll the readiness endpoint until it answers 200."""
+    ready_path = BACKENDS[service][3]
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"{service} exited with status {process.returncode}")
+        try:
+            if requests.get(url + ready_path, timeout=2).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"{service} not ready after {timeout:.0f} s")
+
+
+def stop_backend(process: subprocess.Popen):
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait(timeout=30)
+    except (ProcessLookupError, subprocess.TimeoutExpired):
+        os.killpg(process.pid, signal.SIGKILL)
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in USER_TYPES:
+            raise argparse.ArgumentTypeError(
+                f"unknown user type {name!r} (choose from {', '.join(USER_TYPES)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run the offline load test")
+    parser.add_argument("--users", type=int, default=20, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=60, help="seconds of load")
+    parser.add_argument("--ramp", type=float, default=10, help="seconds to start all users")
+    parser.add_argument("--pace", type=float, default=1.0,
+                        help="think-time multiplier (0.1 = ten times faster than people)")
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX,
+                        help="user type weights, e.g. orbit_viewer=70,sky_explorer=30")
+    parser.add_argument("--services", default="orbit,nightsky",
+                        help="backends to load (default %(default)s)")
+    parser.add_argument("--workers", type=int, default=2, help="Gunicorn workers per backend")
+    parser.add_argument("--threads", type=int, default=None,
+                        help="threads per worker (default: each backend's config)")
+    parser.add_argument("--orbit-url", help="use a running orbit API instead of starting one")
+    parser.add_argument("--nightsky-url", help="use a running Night Sky API instead")
+    parser.add_argument("--json", type=Path, metavar="PATH", help="also write results as JSON")
+    add_stub_arguments(parser)
+    args = parser.parse_args(argv)
+
+    services = [s for s in args.services.split(",") if s]
+    given = {"orbit": args.orbit_url, "nightsky": args.nightsky_url}
+
+    stub = stub_from_args(args).start()
+    log_dir = Path(tempfile.mkdtemp(prefix="loadtest-"))
+    env = {**stub.environment(), "ORBIT_STATE_DIR": str(log_dir / "orbit-state")}
+    print(f"Upstream stubs on {stub.base_url}; server logs in {log_dir}")
+
+    processes, urls = {}, {}
+    try:
+        for service in services:
+            if given.get(service):
+                urls[service] = given[service].rstrip("/")
+            else:
+                processes[service], urls[service] = start_backend(
+                    service, env, args.workers, args.threads, log_dir)
+
+        for service, url in urls.items():
+            print(f"Waiting for {service} at {url}...")
+            wait_ready(service, url, processes.get(service))
+
+        print(f"Running {args.users} users for {args.duration:g} s "
+              f"(pace {args.pace:g}, ramp {args.ramp:g} s)...")
+
+        def progress(elapsed, count):
+            print(f"\r  {elapsed:5.0f} s  {count:7d} requests", end="", file=sys.stderr)
+
+        started = time.monotonic()
+        recorder = run_workload(urls, args.users, args.duration, args.mix,
+                                args.ramp, args.pace, args.seed, progress)
+        window = time.monotonic() - started
+        print(file=sys.stderr)
+    finally:
+        for process in processes.values():
+            stop_backend(process)
+        stub.stop()
+
+    summary = summarize(recorder.samples, window)
+    print()
+    print_summary(summary, stub.counts)
+
+    if args.json:
+        args.json.write_text(json.dumps({
+            "config": {
+                "users": args.users,
+                "duration_s": args.duration,
+                "pace": args.pace,
+                "mix": args.mix,
+                "workers": args.workers,
+                "threads": args.threads,
+                "behaviors": {name: vars(b) for name, b in stub.behaviors.items()},
+            },
+            "summary": summary,
+            "upstream": stub.counts,
+        }, indent=2) + "\n")
+        print(f"\nResults written to {args.json}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,352 @@
+"""
+Upstream Stubs - Local stand-ins for CelesTrak, SIMBAD and Nominatim
+
+One threaded HTTP server replays the responses in loadtest/recordings/
+under a path prefix per upstream:
+
+    /celestrak/gp.php            CelesTrak GP (FORMAT=TLE)
+    /simbad/sim-tap/sync         SIMBAD TAP (cone search with flux joins,
+                                 batch ident lookup, detail, V flux);
+                                 cone searches replay the recorded field
+                                 moved to the queried center
+    /simbad/sim-nameresolver     SIMBAD name resolver
+    /nominatim/search            Nominatim geocoding
+
+Each upstream gets a latency model (median plus an exponential tail) and
+can inject errors (HTTP 503) or hangs (no answer until after the caller's
+timeout), so retry, timeout and caching behavior can be exercised
+without touching the real services.
+
+The backends are pointed at the stubs through environment variables;
+stub_environment() builds them. Standalone:
+
+    python -m loadtest.stubs --port 9100 --latency simbad_tap=400
+    # prints the export lines for the backends, then serves until Ctrl-C
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+RECORDINGS_DIR = Path(__file__).resolve().parent / "recordings"
+
+UPSTREAMS = ["celestrak", "simbad_tap", "simbad_resolver", "nominatim"]
+
+# Typical medians observed from a well-connected host (milliseconds)
+DEFAULT_LATENCY_MS = {
+    "celestrak": 250,
+    "simbad_tap": 600,
+    "simbad_resolver": 300,
+    "nominatim": 400,
+}
+
+HANG_SECONDS = 30  # Longer than every backend timeout
+
+
+@dataclass
+class Behavior:
+    """
+    How one stubbed upstream responds.
+
+    Attributes:
+        latency_ms: Median added latency
+        tail_ms: Mean of the exponential tail added on top of the median
+        error_rate: Fraction of requests answered with HTTP 503
+        hang_rate: Fraction of requests held for HANG_SECONDS (client timeout)
+    """
+    latency_ms: float = 0.0
+    tail_ms: float = 0.0
+    error_rate: float = 0.0
+    hang_rate: float = 0.0
+
+    def delay(self, rng: random.Random) -> float:
+        tail = rng.expovariate(1.0 / self.tail_ms) if self.tail_ms > 0 else 0.0
+        return (self.latency_ms + tail) / 1000
+
+
+def load_recordings(directory: Path = RECORDINGS_DIR) -> Dict[str, dict]:
+    """Load every upstream's recorded responses."""
+    return {name: json.loads((directory / f"{name}.json").read_text()) for name in UPSTREAMS}
+
+
+class UpstreamStub:
+    """
+    Threaded HTTP server replaying recorded upstream responses.
+
+    Attributes:
+        behaviors: Upstream name -> Behavior
+        counts: Upstream name -> requests served, by outcome
+    """
+
+    def __init__(self, behaviors: Dict[str, Behavior], host: str = "127.0.0.1",
+                 port: int = 0, seed: Optional[int] = None,
+                 recordings: Optional[Dict[str, dict]] = None):
+        self.behaviors = behaviors
+        self.recordings = recordings or load_recordings()
+        self.counts = {name: {} for name in UPSTREAMS}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+        stub = self
+
+        class Handler(_StubHandler):
+            owner = stub
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever,
+                                        name="upstream-stubs", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def environment(self) -> Dict[str, str]:
+        return stub_environment(self.base_url)
+
+    def _decide(self, upstream: str):
+        """Pick (delay seconds, outcome) for one request."""
+        behavior = self.behaviors.get(upstream, Behavior())
+        with self._lock:
+            roll = self._rng.random()
+            delay = behavior.delay(self._rng)
+        if roll < behavior.hang_rate:
+            return HANG_SECONDS, "hang"
+        if roll < behavior.hang_rate + behavior.error_rate:
+            return delay, "error"
+        return delay, "ok"
+
+    def _count(self, upstream: str, outcome: str):
+        with self._lock:
+            counts = self.counts[upstream]
+            counts[outcome] = counts.get(outcome, 0) + 1
+
+    # ------------------------------------------------------------------
+    # Recorded responses
+    # ------------------------------------------------------------------
+
+    def celestrak(self, params):
+        catnr = params.get("CATNR", [""])[0]
+        text = self.recordings["celestrak"]["responses"].get(catnr, "No GP data found\n")
+        return 200, "text/plain", text
+
+    def simbad_tap(self, params):
+        recording = self.recordings["simbad_tap"]
+        raw_query = params.get("query", [""])[0]
+        query = " ".join(raw_query.split())
+        flux = recording["flux"]
+
+        if re.search(r"\bFROM flux\b", query, re.I):
+            oid = re.search(r"oidref = (\d+)", query, re.I).group(1)
+            data = [[flux[oid]]] if oid in flux else []
+            return 200, "application/json", json.dumps({"data": data})
+
+        if re.search(r"\bFROM ident\b", query, re.I):
+            return 200, "application/json", json.dumps({"data": self._ident_rows(raw_query)})
+
+        match = re.search(r"WHERE oid = (\d+)", query, re.I)
+        if match:
+            row = recording["basic"].get(match.group(1))
+            return 200, "application/json", json.dumps({"data": [row] if row else []})
+
+        # Cone search: replay the recorded field, moved to the queried center
+        region = dict(recording["region"])
+        rows = region["data"]
+        circle = re.search(r"CIRCLE\('ICRS', ([-\d.]+), ([-\d.]+), [-\d.]+\)", query)
+        if circle and rows:
+            ra, dec = float(circle.group(1)), float(circle.group(2))
+            ra0 = sum(r[1] for r in rows) / len(rows)
+            dec0 = sum(r[2] for r in rows) / len(rows)
+            rows = [[r[0], (r[1] - ra0 + ra) % 360, max(-90.0, min(90.0, r[2] - dec0 + dec))]
+                    + r[3:] for r in rows]
+        # Flux joins add one column per band; only V is recorded
+        bands = re.findall(r"LEFT JOIN flux .*?filter = '(\w+)'", query, re.I)
+        if bands:
+            rows = [r + [flux.get(str(r[8])) if band == "V" else None for band in bands]
+                    for r in rows]
+        top = re.search(r"\bTOP (\d+)", query, re.I)
+        region["data"] = rows[:int(top.group(1))] if top else rows
+        return 200, "application/json", json.dumps(region)
+
+    def _ident_rows(self, query):
+        """Rows for a batch ident query, matched exactly as SIMBAD does."""
+        recording = self.recordings["simbad_tap"]
+        wanted = set(re.findall(r"'((?:[^']|'')*)'", _after(query, "i.id IN")))
+        rows = []
+        for results in self.recordings["simbad_resolver"]["responses"].values():
+            for obj in results:
+                for ident in wanted.intersection(obj.get("idlist", [])):
+                    basic = recording["basic"].get(str(obj["oid"]))
+                    main_id, otype, sp_type, plx, rv, size = basic or [
+                        obj["mainId"], obj["otype"], obj["sptype"], None, None, None]
+                    rows.append([ident, main_id, obj["ra"], obj["dec"], otype, sp_type,
+                                 plx, rv, size, recording["flux"].get(str(obj["oid"]))])
+                    wanted.discard(ident)
+        return rows
+
+    def simbad_resolver(self, params):
+        ident = params.get("ident", [""])[0].strip().lower()
+        result = self.recordings["simbad_resolver"]["responses"].get(ident, [])
+        return 200, "application/json", json.dumps(result)
+
+    def nominatim(self, params):
+        q = params.get("q", [""])[0].strip().lower()
+        result = self.recordings["nominatim"]["responses"].get(q, [])
+        return 200, "application/json", json.dumps(result)
+
+
+ROUTES = {
+    "/celestrak/gp.php": "celestrak",
+    "/simbad/sim-tap/sync": "simbad_tap",
+    "/simbad/sim-nameresolver": "simbad_resolver",
+    "/nominatim/search": "nominatim",
+}
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    owner: UpstreamStub = None
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        upstream = ROUTES.get(url.path)
+        if upstream is None:
+            self._send(404, "text/plain", "Unknown stub route\n")
+            return
+
+        delay, outcome = self.owner._decide(upstream)
+        self.owner._count(upstream, outcome)
+        time.sleep(delay)
+
+        if outcome == "error":
+            self._send(503, "text/plain", "Injected upstream error\n")
+            return
+        if outcome == "hang":
+            self.close_connection = True
+            return
+
+        status, content_type, body = getattr(self.owner, upstream)(parse_qs(url.query))
+        self._send(status, content_type, body)
+
+    def _send(self, status: int, content_type: str, body: str):
+        payload = body.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        try:
+            self.wfile.write(payload)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _after(text: str, marker: str) -> str:
+    index = text.find(marker)
+    return text[index:] if index >= 0 else ""
+
+
+def stub_environment(base_url: str) -> Dict[str, str]:
+    """Environment variables pointing both backends at stubs served from base_url."""
+    return {
+        "CELESTRAK_BASE": f"{base_url}/celestrak/gp.php",
+        "SIMBAD_TAP_URL": f"{base_url}/simbad/sim-tap/sync",
+        "SIMBAD_RESOLVE_URL": f"{base_url}/simbad/sim-nameresolver",
+        "NOMINATIM_URL": f"{base_url}/nominatim",
+    }
+
+
+def build_behaviors(latency_scale: float = 1.0, tail_ratio: float = 0.5,
+                    error_rate: float = 0.0, hang_rate: float = 0.0,
+                    overrides: Optional[Dict[str, float]] = None) -> Dict[str, Behavior]:
+    """
+    Behaviors for every upstream from the default latencies.
+
+    Args:
+        latency_scale: Multiplier on DEFAULT_LATENCY_MS (0 disables latency)
+        tail_ratio: Tail mean as a fraction of the median
+        error_rate: Fraction of 503 answers, for every upstream
+        hang_rate: Fraction of hung requests, for every upstream
+        overrides: Upstream name -> median latency in ms, replacing the default
+    """
+    behaviors = {}
+    for name in UPSTREAMS:
+        median = (overrides or {}).get(name, DEFAULT_LATENCY_MS[name] * latency_scale)
+        behaviors[name] = Behavior(median, median * tail_ratio, error_rate, hang_rate)
+    return behaviors
+
+
+def parse_overrides(values) -> Dict[str, float]:
+    """Parse repeated NAME=MS options."""
+    overrides = {}
+    for value in values or []:
+        name, _, ms = value.partition("=")
+        if name not in UPSTREAMS or not ms:
+            raise argparse.ArgumentTypeError(
+                f"expected one of {', '.join(UPSTREAMS)}=MS, got {value!r}")
+        overrides[name] = float(ms)
+    return overrides
+
+
+def add_stub_arguments(parser: argparse.ArgumentParser):
+    """Stub behavior options shared by this module and the load test runner."""
+    group = parser.add_argument_group("upstream stubs")
+    group.add_argument("--latency-scale", type=float, default=1.0,
+                       help="multiplier on the default upstream latencies (0 = none)")
+    group.add_argument("--latency", action="append", metavar="NAME=MS",
+                       help="median latency for one upstream (repeatable)")
+    group.add_argument("--error-rate", type=float, default=0.0,
+                       help="fraction of upstream requests answered with 503")
+    group.add_argument("--hang-rate", type=float, default=0.0,
+                       help="fraction of upstream requests that never answer in time")
+    group.add_argument("--seed", type=int, default=None)
+
+
+def stub_from_args(args, port: int = 0) -> UpstreamStub:
+    behaviors = build_behaviors(args.latency_scale, error_rate=args.error_rate,
+                                hang_rate=args.hang_rate,
+                                overrides=parse_overrides(args.latency))
+    return UpstreamStub(behaviors, port=port, seed=args.seed)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Serve the upstream stubs")
+    parser.add_argument("--port", type=int, default=9100)
+    add_stub_arguments(parser)
+    args = parser.parse_args(argv)
+
+    stub = stub_from_args(args, args.port).start()
+    for name, value in stub.environment().items():
+        print(f"export {name}={value}")
+    print(f"\nServing upstream stubs on {stub.base_url} (Ctrl-C to stop)")
+
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        stub.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,288 @@
+"""
+Load Test Workload - Virtual users modeled on the frontends' request patterns
+
+Each virtual user replays one frontend's behavior with its own HTTP
+session (keep-alive, like a browser tab):
+
+    orbit_viewer    frontend/js/app.js: satellites, orbit-info and a 3 h
+                    track on load; then the animation tick (1 s) polls
+                    /api/current, or /api/constellation/current in
+                    constellation mode; the track is extended with its
+                    cursor once a minute; occasionally a 24 h coverage track
+    sky_explorer    nightsky/frontend/js/app.js: click-to-identify (SIMBAD
+                    cone of 0.05 deg, 1 object), name search (resolve) and
+                    "what's nearby" (1 deg, 15 objects), with think time
+    sky_renderer    Night Sky API: location info, planets, moon, GEO
+                    satellites, geocoding and the occasional 800 px render
+
+Think times are multiplied by the run's pace, so pace 0.1 replays ten
+times faster than a person would.
+"""
+
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+import requests
+
+SATELLITES = ["noaa21", "noaa20", "suominpp"]
+
+OBSERVERS = [
+    (40.7128, -74.0060),   # New York
+    (48.8566, 2.3522),     # Paris
+    (69.6492, 18.9553),    # Tromso
+    (-0.1807, -78.4678),   # Quito
+    (-33.8688, 151.2093),  # Sydney
+    (35.1983, -111.6513),  # Flagstaff
+]
+
+PLACES = ["New York, NY", "Paris, France", "Tromso", "Quito", "Sydney",
+          "Flagstaff, AZ", "Atlantis"]
+
+TARGETS = ["M31", "Vega", "Pleiades", "M13", "M57", "Betelgeuse", "Sirius",
+           "Orion Nebula", "M51", "Not An Object"]
+
+# (ra, dec) click positions, spread over the sky
+CLICKS = [(83.82, -5.39), (10.68, 41.27), (279.23, 38.78), (56.75, 24.12),
+          (250.42, 36.46), (202.47, 47.20), (101.29, -16.72), (88.79, 7.41)]
+
+
+@dataclass
+class Sample:
+    """One completed (or failed) request."""
+    endpoint: str
+    status: int
+    seconds: float
+    bytes: int
+    started: float
+
+
+class Recorder:
+    """Thread-safe list of samples."""
+
+    def __init__(self):
+        self.samples: List[Sample] = []
+        self._lock = threading.Lock()
+
+    def add(self, sample: Sample):
+        with self._lock:
+            self.samples.append(sample)
+
+
+class VirtualUser:
+    """
+    Base class: one simulated browser tab.
+
+    Subclasses implement session(), a generator of think times; requests
+    are made through get()/post(), which record a sample per request.
+    """
+
+    name = "user"
+
+    def __init__(self, urls: Dict[str, str], recorder: Recorder, pace: float,
+                 rng: random.Random, timeout: float = 60.0):
+        self.urls = urls
+        self.recorder = recorder
+        self.pace = pace
+        self.rng = rng
+        self.timeout = timeout
+        self.http = requests.Session()
+
+    def request(self, method: str, endpoint: str, url: str, **kwargs):
+        start = time.perf_counter()
+        status, size, response = 0, 0, None
+        try:
+            response = self.http.request(method, url, timeout=self.timeout, **kwargs)
+            status, size = response.status_code, len(response.content)
+        except requests.RequestException:
+            pass  # Recorded with status 0
+        self.recorder.add(Sample(endpoint, status, time.perf_counter() - start, size, start))
+        return response
+
+    def get(self, endpoint: str, service: str, path: str, **params):
+        return self.request("GET", endpoint, self.urls[service] + path, params=params)
+
+    def post(self, endpoint: str, service: str, path: str, body: Dict):
+        return self.request("POST", endpoint, self.urls[service] + path, json=body)
+
+    def run(self, stop: threading.Event):
+        """Run sessions back to back until stop is set."""
+        while not stop.is_set():
+            for think in self.session():
+                if stop.wait(think * self.pace):
+                    return
+
+    def session(self):
+        raise NotImplementedError
+
+
+class OrbitViewer(VirtualUser):
+    """frontend/js/app.js: the orbit map with its 1 s animation tick."""
+
+    name = "orbit_viewer"
+    SESSION_SECONDS = (120, 600)
+
+    def session(self):
+        satellite = self.rng.choice(SATELLITES)
+        constellation = self.rng.random() < 0.3
+
+        self.get("satellites", "orbit", "/api/satellites")
+        self.get("orbit-info", "orbit", "/api/orbit-info", satellite=satellite)
+        response = self.get("track", "orbit", "/api/track",
+                            satellite=satellite, duration=180, step=30)
+        cursor = _json_field(response, "cursor")
+
+        if self.rng.random() < 0.2:
+            self.get("track (coverage 24h)", "orbit", "/api/track",
+                     satellite=satellite, duration=1440, step=60)
+
+        length = self.rng.uniform(*self.SESSION_SECONDS)
+        elapsed, last_extend = 0.0, 0.0
+        while elapsed < length:
+            if constellation:
+                self.get("constellation/current", "orbit", "/api/constellation/current")
+            else:
+                if cursor and elapsed - last_extend >= 60:
+                    last_extend = elapsed
+                    response = self.get("track (extend)", "orbit", "/api/track",
+                                        satellite=satellite, duration=180, cursor=cursor)
+                    cursor = _json_field(response, "cursor") or cursor
+                self.get("current", "orbit", "/api/current", satellite=satellite)
+            elapsed += 1.0
+            yield 1.0
+
+
+class SkyExplorer(VirtualUser):
+    """nightsky/frontend/js/app.js: identify, search and browse via SIMBAD."""
+
+    name = "sky_explorer"
+
+    def session(self):
+        for _ in range(self.rng.randint(3, 12)):
+            action = self.rng.random()
+            ra, dec = self.rng.choice(CLICKS)
+            ra += self.rng.uniform(-0.5, 0.5)
+            dec += self.rng.uniform(-0.5, 0.5)
+
+            if action < 0.5:
+                self.get("simbad/region (click)", "orbit", "/api/simbad/region",
+                         ra=f"{ra:.4f}", dec=f"{dec:.4f}", radius=0.05, limit=1)
+            elif action < 0.75:
+                self.get("simbad/resolve", "orbit", "/api/simbad/resolve",
+                         name=self.rng.choice(TARGETS))
+            elif action < 0.8:
+                self.post("simbad/resolve/batch", "orbit", "/api/simbad/resolve/batch",
+                          {"names": self.rng.sample(TARGETS, 6)})
+            else:
+                self.get("simbad/region (nearby)", "orbit", "/api/simbad/region",
+                         ra=f"{ra:.4f}", dec=f"{dec:.4f}", radius=1.0, limit=15)
+            yield self.rng.uniform(2, 10)
+
+
+class SkyRenderer(VirtualUser):
+    """Night Sky API: location lookups, ephemerides and renders."""
+
+    name = "sky_renderer"
+
+    def session(self):
+        lat, lon = self.rng.choice(OBSERVERS)
+
+        if self.rng.random() < 0.5:
+            self.get("nightsky/geocode", "nightsky", "/api/nightsky/geocode",
+                     q=self.rng.choice(PLACES))
+        self.get("nightsky/info", "nightsky", "/api/nightsky/info", lat=lat, lon=lon)
+        self.get("nightsky/planets", "nightsky", "/api/nightsky/planets", lat=lat, lon=lon)
+        self.get("nightsky/geostationary", "nightsky", "/api/nightsky/geostationary",
+                 lat=lat, lon=lon)
+        yield self.rng.uniform(5, 15)
+
+        if self.rng.random() < 0.3:
+            self.post("nightsky/generate", "nightsky", "/api/nightsky/generate", {
+                "latitude": lat,
+                "longitude": lon,
+                "direction": self.rng.choice(["N", "E", "S", "W"]),
+                "resolution": 800,
+            })
+            yield self.rng.uniform(20, 60)
+
+
+USER_TYPES = {cls.name: cls for cls in (OrbitViewer, SkyExplorer, SkyRenderer)}
+
+DEFAULT_MIX = {"orbit_viewer": 70, "sky_explorer": 25, "sky_renderer": 5}
+
+
+def _json_field(response, field: str):
+    if response is None or not response.ok:
+        return None
+    try:
+        return response.json().get(field)
+    except ValueError:
+        return None
+
+
+def assign_users(count: int, mix: Dict[str, float]) -> List[str]:
+    """Split count users across types in proportion to mix (largest remainder)."""
+    total = sum(mix.values())
+    shares = {name: count * weight / total for name, weight in mix.items()}
+    assigned = {name: int(share) for name, share in shares.items()}
+    remainder = sorted(shares, key=lambda n: shares[n] - assigned[n], reverse=True)
+    for name in remainder[:count - sum(assigned.values())]:
+        assigned[name] += 1
+    return [name for name, n in assigned.items() for _ in range(n)]
+
+
+def run_workload(urls: Dict[str, str], users: int, duration: float,
+                 mix: Optional[Dict[str, float]] = None, ramp: float = 10.0,
+                 pace: float = 1.0, seed: Optional[int] = None,
+                 on_tick: Optional[Callable[[float, int], None]] = None) -> Recorder:
+    """
+    Run virtual users against the backends for duration seconds.
+
+    Args:
+        urls: {"orbit": base URL, "nightsky": base URL}; a user type whose
+            service is missing is left out of the mix
+        users: Number of concurrent virtual users
+        duration: Seconds to run after the first user starts
+        mix: User type -> weight (default DEFAULT_MIX)
+        ramp: Seconds over which users are started
+        pace: Think-time multiplier
+        seed: Seed for reproducible sessions
+        on_tick: Called about once a second with (elapsed, samples so far)
+
+    Returns:
+        Recorder holding every sample
+    """
+    mix = dict(mix or DEFAULT_MIX)
+    if "nightsky" not in urls:
+        mix.pop("sky_renderer", None)
+    if "orbit" not in urls:
+        mix.pop("orbit_viewer", None)
+        mix.pop("sky_explorer", None)
+
+    recorder = Recorder()
+    stop = threading.Event()
+    rng = random.Random(seed)
+    threads = []
+
+    start = time.monotonic()
+    for index, kind in enumerate(assign_users(users, mix)):
+        user = USER_TYPES[kind](urls, recorder, pace, random.Random(rng.random()))
+        thread = threading.Thread(target=user.run, args=(stop,),
+                                  name=f"{kind}-{index}", daemon=True)
+        threads.append(thread)
+        delay = start + ramp * index / max(users, 1) - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        thread.start()
+
+    while (elapsed := time.monotonic() - start) < duration:
+        time.sleep(min(1.0, duration - elapsed))
+        if on_tick:
+            on_tick(time.monotonic() - start, len(recorder.samples))
+
+    stop.set()
+    for thread in threads:
+        thread.join(timeout=60)
+    return recorder
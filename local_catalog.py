@@ -0,0 +1,369 @@
+"""
+Local Catalog - Offline object catalog with a cone-search index
+
+Bright and well-known objects are answered without SIMBAD. The catalog is
+built once per process from:
+
+    nightsky/frontend/data/messier.json, caldwell.json
+                             The planner's catalogs
+    LOCAL_CATALOG_DIR/*.json Any compatible file dropped in: {"objects":
+                             [{"id" or "name", "ra", "dec", ...}]} with
+                             optional type, magnitude, size (arcmin), ngc,
+                             aliases, constellation, description
+    starplot (if installed)  Named and Bayer/Flamsteed stars down to
+                             LOCAL_STAR_MAGNITUDE, and the NGC/IC objects
+
+An object found under a name that is already known is merged into the
+existing entry (its names become aliases), so M31 from messier.json and
+NGC 224 from starplot are one object.
+
+Positions are held as unit vectors sorted by HEALPix tile (healpix.py,
+order 6); a cone search reads only the tiles the cone touches. Names are
+looked up through the same normalization as the SIMBAD name cache.
+
+Results have the shape of SIMBAD results, with "source": "local".
+
+Environment variables:
+    LOCAL_CATALOG_DIR        Extra catalog files (default: none)
+    LOCAL_CATALOG_STARPLOT   "0" skips the starplot stars and NGC/IC objects
+    LOCAL_STAR_MAGNITUDE     Faintest star loaded from starplot (default 6.5)
+"""
+
+import glob
+import importlib.util
+import json
+import math
+import os
+import re
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from healpix import ang2pix, query_disc, radec_to_vec
+from resolver_cache import CATALOG_DIR, CATALOG_FILES, normalize_name
+
+INDEX_ORDER = 6
+EXTRA_DIR = os.environ.get("LOCAL_CATALOG_DIR")
+USE_STARPLOT = os.environ.get("LOCAL_CATALOG_STARPLOT", "1") != "0"
+STAR_MAGNITUDE = float(os.environ.get("LOCAL_STAR_MAGNITUDE", 6.5))
+
+NO_MAGNITUDE = 99.0
+
+# Readable type keywords (as used in the catalog files) -> SIMBAD codes
+TYPE_CODES = [
+    ("globular cluster", "GlC"),
+    ("open cluster", "OpC"),
+    ("star cloud", "Cl*"),
+    ("asterism", "As*"),
+    ("planetary nebula", "PN"),
+    ("supernova remnant", "SNR"),
+    ("reflection nebula", "RNe"),
+    ("dark nebula", "DNe"),
+    ("emission nebula", "HII"),
+    ("nebula", "Neb"),
+    ("galax", "G"),
+    ("double star", "**"),
+    ("star", "*"),
+]
+
+# starplot deep sky object types -> (readable name, SIMBAD code)
+STARPLOT_TYPES = {
+    "G": ("Galaxy", "G"),
+    "GPair": ("Galaxy in Pair", "GiP"),
+    "GTrpl": ("Galaxy in Group", "GiG"),
+    "GGroup": ("Galaxy in Group", "GiG"),
+    "OCl": ("Open Cluster", "OpC"),
+    "GCl": ("Globular Cluster", "GlC"),
+    "Cl+N": ("Cluster with Nebula", "Cl*"),
+    "*Ass": ("Stellar Association", "As*"),
+    "PN": ("Planetary Nebula", "PN"),
+    "HII": ("HII Region", "HII"),
+    "EmN": ("Emission Nebula", "HII"),
+    "RfN": ("Reflection Nebula", "RNe"),
+    "Neb": ("Nebula", "Neb"),
+    "DrkN": ("Dark Nebula", "DNe"),
+    "SNR": ("Supernova Remnant", "SNR"),
+    "Nova": ("Nova", "No*"),
+    "**": ("Double Star", "**"),
+    "*": ("Star", "*"),
+}
+
+# Bayer letters as SIMBAD abbreviates them ("* alf Lyr")
+GREEK = dict(zip("αβγδεζηθικλμνξοπρστυφχψω",
+                 ["alf", "bet", "gam", "del", "eps", "zet", "eta", "tet", "iot", "kap",
+                  "lam", "mu.", "nu.", "ksi", "omi", "pi.", "rho", "sig", "tau", "ups",
+                  "phi", "chi", "psi", "ome"]))
+SUPERSCRIPTS = str.maketrans("¹²³⁴⁵⁶⁷⁸⁹⁰", "1234567890")
+
+# IAU abbreviations that are not simply title case
+CONSTELLATION_CASE = {"cma": "CMa", "cmi": "CMi", "cra": "CrA", "crb": "CrB", "cvn": "CVn",
+                      "lmi": "LMi", "psa": "PsA", "tra": "TrA", "uma": "UMa", "umi": "UMi"}
+
+
+def _type_code(type_name: str) -> str:
+    lowered = (type_name or "").lower()
+    for keyword, code in TYPE_CODES:
+        if keyword in lowered:
+            return code
+    return ""
+
+
+def _catalog_alias(name: str) -> Optional[str]:
+    """'NGC0224' -> 'NGC 224' (starplot pads catalog numbers with zeros)."""
+    match = re.fullmatch(r"([A-Za-z]+)0*(\d+[A-Za-z]?)", name or "")
+    return f"{match.group(1)} {match.group(2)}" if match else None
+
+
+class LocalCatalog:
+    """
+    Objects held as arrays, indexed by HEALPix tile and by normalized name.
+
+    Usage:
+        catalog = LocalCatalog(objects, priority)
+        catalog.cone(ra, dec, radius, limit)  # best first, [] if none
+        catalog.resolve("Andromeda Galaxy")   # None if unknown
+    """
+
+    def __init__(self, objects: List[Dict], priority: Callable[[str, str, Optional[float]], int]):
+        for obj in objects:
+            obj["priority"] = priority(obj["type"], obj["type_code"], obj["magnitude_v"])
+
+        ra = np.array([o["ra"] for o in objects], dtype=float)
+        dec = np.array([o["dec"] for o in objects], dtype=float)
+        pixel = ang2pix(INDEX_ORDER, ra, dec) if objects else np.zeros(0, dtype=np.int64)
+        order = np.argsort(pixel, kind="stable")
+
+        self.objects = [objects[i] for i in order.tolist()]
+        self.pixel = pixel[order]
+        self.xyz = radec_to_vec(ra[order], dec[order]).reshape(-1, 3)
+        self.priority = np.array([o["priority"] for o in self.objects], dtype=np.int16)
+        self.magnitude = np.array(
+            [NO_MAGNITUDE if o["magnitude_v"] is None else o["magnitude_v"]
+             for o in self.objects], dtype=float)
+
+        self.names = {}
+        for index, obj in enumerate(self.objects):
+            for alias in [obj["name"], *obj["aliases"]]:
+                self.names.setdefault(normalize_name(alias), index)
+
+    def __len__(self) -> int:
+        return len(self.objects)
+
+    def cone(self, ra: float, dec: float, radius: float, limit: int) -> List[Dict]:
+        """Objects within radius degrees of (ra, dec), ranked like SIMBAD region results."""
+        if not self.objects:
+            return []
+        pixels = query_disc(INDEX_ORDER, ra, dec, radius)
+        starts = np.searchsorted(self.pixel, pixels, side="left")
+        ends = np.searchsorted(self.pixel, pixels, side="right")
+        ranges = [np.arange(s, e) for s, e in zip(starts.tolist(), ends.tolist()) if e > s]
+        if not ranges:
+            return []
+
+        index = np.concatenate(ranges)
+        index = index[self.xyz[index] @ radec_to_vec(ra, dec) >= math.cos(math.radians(radius))]
+        ranked = index[np.lexsort((self.magnitude[index], self.priority[index]))][:limit]
+        return [dict(self.objects[i]) for i in ranked.tolist()]
+
+    def resolve(self, name: str) -> Optional[Dict]:
+        """The object known under name, shaped like a SIMBAD resolve result."""
+        index = self.names.get(normalize_name(name))
+        if index is None:
+            return None
+        result = dict(self.objects[index])
+        result["found"] = True
+        result["aliases"] = result["aliases"][:10]
+        return result
+
+
+# ============================================
+# Sources
+# ============================================
+
+def _local_object(name: str, ra: float, dec: float, type_name: str, type_code: str = None,
+                  magnitude: float = None, size_arcmin: float = None,
+                  aliases: Iterable[str] = (), **extra) -> Dict:
+    obj = {
+        "name": name,
+        "ra": float(ra),
+        "dec": float(dec),
+        "type": type_name or "Unknown",
+        "type_code": type_code if type_code is not None else _type_code(type_name),
+        "spectral_type": None,
+        "parallax_mas": None,
+        "radial_velocity_kms": None,
+        "angular_size_arcmin": size_arcmin,
+        "oid": None,
+        "magnitudes": {} if magnitude is None else {"V": magnitude},
+        "magnitude_v": magnitude,
+        "aliases": [a for a in dict.fromkeys(aliases) if a and a != name],
+        "source": "local",
+    }
+    obj.update({k: v for k, v in extra.items() if v is not None})
+    return obj
+
+
+def json_objects(path) -> List[Dict]:
+    """Objects of one catalog file (the frontend's catalog format)."""
+    with open(path) as f:
+        data = json.load(f)
+
+    objects = []
+    for item in data.get("objects", []):
+        name = item.get("id") or item.get("name")
+        if not name or item.get("ra") is None or item.get("dec") is None:
+            continue
+        aliases = [item.get("name"), *(item.get("aliases") or [])]
+        # "NGC 869/884": both designations, the second sharing the prefix
+        prefix = ""
+        for designation in (item.get("ngc") or "").split("/"):
+            designation = designation.strip()
+            if designation.isdigit():
+                designation = f"{prefix} {designation}".strip()
+            prefix = designation.rsplit(" ", 1)[0] if " " in designation else prefix
+            aliases.append(designation)
+        if re.fullmatch(r"M\d+", name):
+            aliases.append(f"Messier {name[1:]}")
+        objects.append(_local_object(
+            name, item["ra"], item["dec"], item.get("type"),
+            magnitude=item.get("magnitude"), size_arcmin=item.get("size"),
+            aliases=aliases, constellation=item.get("constellation"),
+            description=item.get("description"),
+        ))
+    return objects
+
+
+def starplot_objects(star_magnitude: float = STAR_MAGNITUDE) -> List[Dict]:
+    """
+    Bright stars and NGC/IC objects from starplot's bundled data.
+
+    Returns an empty list if starplot (and its duckdb database) is not
+    installed; the orbit API does not depend on it.
+    """
+    try:
+        import duckdb
+    except ImportError:
+        return []
+    # Locate the data without importing starplot (and matplotlib with it)
+    spec = importlib.util.find_spec("starplot")
+    if spec is None or not spec.submodule_search_locations:
+        return []
+    library = Path(list(spec.submodule_search_locations)[0]) / "data" / "library"
+    database, stars_file = library / "sky.db", next(library.glob("bigsky.*.stars.mag11.parquet"), None)
+    if not database.exists() or stars_file is None:
+        return []
+
+    objects = []
+    conn = duckdb.connect(str(database), read_only=True)
+    try:
+        designations = {
+            int(hip): (name, bayer, flamsteed)
+            for hip, name, bayer, flamsteed in conn.execute(
+                "SELECT hip, name, bayer, flamsteed FROM star_designations").fetchall()
+        }
+        stars = conn.execute(
+            "SELECT hip, magnitude, ra_degrees, dec_degrees, parallax_mas, constellation "
+            "FROM read_parquet(?) WHERE magnitude <= ? AND hip IS NOT NULL "
+            "ORDER BY magnitude", [str(stars_file), star_magnitude]).fetchall()
+        dsos = conn.execute(
+            "SELECT name, type, ra_degrees, dec_degrees, mag_v, maj_ax, m, common_names "
+            "FROM deep_sky_objects WHERE type NOT IN ('Dup', 'NonEx', 'Other')").fetchall()
+    finally:
+        conn.close()
+
+    seen = set()
+    for hip, magnitude, ra, dec, parallax, constellation in stars:
+        hip = int(hip)
+        if hip in seen:
+            continue  # Fainter components of multiple systems
+        seen.add(hip)
+
+        proper, bayer, flamsteed = designations.get(hip, (None, None, None))
+        constellation = (constellation or "").lower()
+        constellation = CONSTELLATION_CASE.get(constellation, constellation.title())
+        aliases = [f"HIP {hip}"]
+        if bayer and constellation:
+            letter = GREEK.get(bayer[0])
+            if letter:
+                suffix = bayer[1:].translate(SUPERSCRIPTS)
+                aliases.append(f"* {letter}{suffix} {constellation}")
+                aliases.append(f"{letter}{suffix} {constellation}")
+        if flamsteed and constellation:
+            aliases.append(f"{flamsteed} {constellation}")
+        name = proper or (aliases[2] if len(aliases) > 2 else aliases[0])
+
+        obj = _local_object(name, ra, dec, "Star", "*", magnitude=magnitude,
+                            aliases=aliases, hip=hip)
+        if parallax and parallax > 0:
+            obj["parallax_mas"] = parallax
+            obj["distance_ly"] = 3261.5 / parallax
+            obj["distance_pc"] = 1000.0 / parallax
+        objects.append(obj)
+
+    for name, type_, ra, dec, magnitude, size, messier, common in dsos:
+        if ra is None or dec is None:
+            continue
+        type_name, type_code = STARPLOT_TYPES.get(type_, (type_, ""))
+        aliases = [_catalog_alias(name)]
+        if messier:
+            aliases.append(f"M{messier}")
+        aliases.extend(n.strip() for n in (common or "").split(","))
+        display = f"M{messier}" if messier else (_catalog_alias(name) or name)
+        objects.append(_local_object(display, ra, dec, type_name, type_code,
+                                     magnitude=magnitude, size_arcmin=size,
+                                     aliases=[name, *aliases]))
+    return objects
+
+
+def _merge(objects: List[Dict]) -> List[Dict]:
+    """Drop objects already known under one of their names, keeping their aliases."""
+    merged = []
+    known = {}
+    for obj in objects:
+        keys = [normalize_name(n) for n in [obj["name"], *obj["aliases"]]]
+        existing = next((known[k] for k in keys if k in known), None)
+        if existing is None:
+            merged.append(obj)
+            existing = obj
+        else:
+            existing["aliases"] = list(dict.fromkeys(
+                existing["aliases"] + [n for n in [obj["name"], *obj["aliases"]]
+                                       if n != existing["name"]]))
+            for field in ("magnitude_v", "angular_size_arcmin"):
+                if existing[field] is None:
+                    existing[field] = obj[field]
+            if existing["magnitude_v"] is not None:
+                existing["magnitudes"] = {"V": existing["magnitude_v"]}
+        for key in keys:
+            known.setdefault(key, existing)
+    return merged
+
+
+def load_catalog(priority: Callable[[str, str, Optional[float]], int],
+                 extra_dir: Optional[str] = EXTRA_DIR,
+                 use_starplot: bool = USE_STARPLOT) -> LocalCatalog:
+    """
+    Build the local catalog from every available source.
+
+    Args:
+        priority: (type name, type code, V magnitude) -> ranking priority,
+            the same function that ranks SIMBAD region results
+    """
+    objects = []
+    paths = [CATALOG_DIR / name for name in CATALOG_FILES]
+    if extra_dir:
+        paths += sorted(Path(p) for p in glob.glob(os.path.join(extra_dir, "*.json")))
+    for path in paths:
+        try:
+            objects.extend(json_objects(path))
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"Skipping catalog file {path}: {e}")
+
+    if use_starplot:
+        try:
+            objects.extend(starplot_objects())
+        except Exception as e:
+            print(f"Skipping starplot catalog: {e}")
+
+    return LocalCatalog(_merge(objects), priority)
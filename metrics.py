@@ -0,0 +1,321 @@
+"""
+Metrics - Prometheus-style counters, gauges and histograms for both APIs
+
+A small in-process registry rendered in the Prometheus text exposition
+format at GET /metrics. instrument_app() adds per-route latency histograms
+and status counts as request middleware; the rest is recorded at
+instrumentation points in the code:
+
+    upstream_call("nominatim")      every call to an external service (done
+                                    by upstream.get for CelesTrak and SIMBAD;
+                                    also a tracing span)
+    cache_event("track_segments", "hit")
+    gauge(...).set_function(...)    values computed at scrape time (TLE age)
+
+Recording is a dict lookup and an addition under a lock, cheap enough to
+leave on. Under a multi-process server every worker keeps its own
+registry, so a scrape reports the worker that answered it.
+"""
+
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+from flask import Response, g, request
+
+from tracing import span
+
+# Request and upstream latency buckets (seconds)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class _Metric:
+    """Base class: a named family of samples keyed by label values."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict) -> Tuple:
+        return tuple(str(labels.get(label, "")) for label in self.labels)
+
+    def _format_labels(self, key: Tuple, extra: Iterable[Tuple[str, str]] = ()) -> str:
+        pairs = list(zip(self.labels, key)) + list(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{self._format_labels(key)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonically increasing count."""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(_Metric):
+    """Value that goes up and down, or is computed when scraped."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        super().__init__(name, help_text, labels)
+        self._function = None
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, function: Callable[[], object]):
+        """
+        Compute the gauge at scrape time.
+
+        The function returns a number (unlabelled gauge) or a dict mapping
+        label-value tuples to numbers.
+        """
+        self._function = function
+
+    def render(self) -> List[str]:
+        if self._function is not None:
+            try:
+                values = self._function()
+            except Exception as e:
+                print(f"Metric {self.name} failed: {e}")
+                values = {}
+            if not isinstance(values, dict):
+                values = {(): values}
+            with self._lock:
+                self._values = {tuple(str(v) for v in k): val for k, val in values.items()}
+        return super().render()
+
+
+class Histogram(_Metric):
+    """Bucketed distribution of observations (cumulative buckets, sum, count)."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket (non-cumulative) counts, +Inf last, then sum
+                state = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            state[index] += 1
+            state[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the enclosed block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._values.items())
+        for key, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), state[:-1]):
+                cumulative += count
+                le = "+Inf" if bound == math.inf else _format_value(bound)
+                lines.append(f"{self.name}_bucket{self._format_labels(key, [('le', le)])} "
+                             f"{cumulative}")
+            lines.append(f"{self.name}_sum{self._format_labels(key)} {_format_value(state[-1])}")
+            lines.append(f"{self.name}_count{self._format_labels(key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Named metrics; registering an existing name returns the same metric."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, cls, name: str, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} already registered as {metric.kind}")
+            return metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, help_text: str, labels: Sequence[str] = ()) -> Counter:
+    return REGISTRY.register(Counter, name, help_text, labels)
+
+
+def gauge(name: str, help_text: str, labels: Sequence[str] = ()) -> Gauge:
+    return REGISTRY.register(Gauge, name, help_text, labels)
+
+
+def histogram(name: str, help_text: str, labels: Sequence[str] = (),
+              buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+    return REGISTRY.register(Histogram, name, help_text, labels, buckets)
+
+
+# ============================================
+# Shared metric families
+# ============================================
+
+HTTP_DURATION = histogram(
+    "http_request_duration_seconds", "Request latency by route",
+    ["method", "route"])
+HTTP_RESPONSES = counter(
+    "http_responses_total", "Responses by route and status code",
+    ["method", "route", "status"])
+
+UPSTREAM_DURATION = histogram(
+    "upstream_request_duration_seconds", "Latency of calls to external services",
+    ["upstream"])
+UPSTREAM_REQUESTS = counter(
+    "upstream_requests_total",
+    "Calls to external services by outcome (ok, timeout, error, http_4xx, http_5xx)",
+    ["upstream", "outcome"])
+
+CACHE_EVENTS = counter(
+    "cache_events_total", "Cache lookups and evictions by cache layer",
+    ["cache", "event"])
+
+
+class _UpstreamCall:
+    """Handle yielded by upstream_call; set status to the HTTP status code."""
+
+    __slots__ = ("status",)
+
+    def __init__(self):
+        self.status = None
+
+
+@contextmanager
+def upstream_call(upstream: str):
+    """
+    Count and time one call to an external service.
+
+    The outcome is "timeout" or "error" if the block raises, otherwise
+    derived from call.status when the caller sets it (http_4xx, http_5xx),
+    else "ok".
+
+    Usage:
+        with upstream_call("simbad_tap") as call:
+            response = session.get(url, timeout=timeout)
+            call.status = response.status_code
+    """
+    call = _UpstreamCall()
+    start = time.perf_counter()
+    outcome = "ok"
+    try:
+        with span(f"upstream:{upstream}"):
+            yield call
+    except Exception as e:
+        name = type(e).__name__
+        outcome = "timeout" if "Timeout" in name or "TimedOut" in name else "error"
+        raise
+    finally:
+        if outcome == "ok" and call.status is not None and call.status >= 400:
+            outcome = f"http_{call.status // 100}xx"
+        UPSTREAM_DURATION.observe(time.perf_counter() - start, upstream=upstream)
+        UPSTREAM_REQUESTS.inc(upstream=upstream, outcome=outcome)
+
+
+def cache_event(cache: str, event: str):
+    """Record a cache event: hit, miss, eviction, refresh, ..."""
+    CACHE_EVENTS.inc(cache=cache, event=event)
+
+
+# ============================================
+# Flask integration
+# ============================================
+
+def instrument_app(app, path: str = "/metrics"):
+    """
+    Record latency and status for every request and serve the registry.
+
+    Routes are labelled by their URL rule (e.g. /api/track), not the raw
+    path, so label cardinality stays bounded.
+    """
+    @app.before_request
+    def _start_timer():
+        g._metrics_start = time.perf_counter()
+
+    @app.after_request
+    def _record_request(response):
+        start = getattr(g, "_metrics_start", None)
+        if start is not None:
+            route = request.url_rule.rule if request.url_rule else "unmatched"
+            HTTP_DURATION.observe(time.perf_counter() - start,
+                                  method=request.method, route=route)
+            HTTP_RESPONSES.inc(method=request.method, route=route,
+                               status=response.status_code)
+        return response
+
+    def metrics_view():
+        return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
+
+    app.add_url_rule(path, "metrics", metrics_view)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, float):
+        if math.isinf(value):
+            return "+Inf" if value > 0 else "-Inf"
+        if value.is_integer() and abs(value) < 1e15:
+            return str(int(value))
+        return repr(value)
+    return str(value)
@@ -8,11 +8,14 @@ Handles:
 """
 
 import math
-import requests
+import os
 from datetime import datetime
 from typing import Optional, List, Dict, Any
 from dataclasses import dataclass
 
+import shared_modules  # noqa: F401  (repository root on sys.path)
+import upstream
+
 
 # Earth constants (WGS84)
 R_EARTH = 6378.137  # km (equatorial radius)
@@ -22,6 +25,9 @@ H_GEO = 35786.0     # km (geostationary altitude above equator)
 # Maximum latitude where GEO satellites are visible (horizon grazing)
 MAX_VISIBLE_LATITUDE = 81.3
 
+# Overridable so load tests can point at a local stand-in (see loadtest/)
+CELESTRAK_BASE = os.environ.get("CELESTRAK_BASE", "https://celestrak.org/NORAD/elements/gp.php")
+
 
 @dataclass
 class GeoSatellite:
@@ -272,10 +278,10 @@ def fetch_geo_tle(norad_id: int) -> Optional[Dict[str, str]]:
     Returns:
         Dictionary with TLE lines or None if fetch failed
     """
-    url = f"https://celestrak.org/NORAD/elements/gp.php?CATNR={norad_id}&FORMAT=TLE"
+    url = f"{CELESTRAK_BASE}?CATNR={norad_id}&FORMAT=TLE"
 
     try:
-        response = requests.get(url, timeout=10)
+        response = upstream.get("celestrak", url)
         response.raise_for_status()
 
         lines = response.text.strip().split('\n')
@@ -313,4 +319,4 @@ def filter_satellites_by_category(category: str) -> List[GeoSatellite]:
 
 def get_all_satellite_categories() -> List[str]:
     """Get list of all satellite categories."""
-    return list(set(s.category for s in MAJOR_GEO_SATELLITES))
+    return sorted(set(s.category for s in MAJOR_GEO_SATELLITES))
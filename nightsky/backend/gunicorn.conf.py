@@ -0,0 +1,51 @@
+"""
+Gunicorn configuration for the Night Sky API (production serving mode).
+
+    cd nightsky/backend
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Environment variables:
+    NIGHTSKY_BIND      Listen address (default: 0.0.0.0:5051)
+    WEB_CONCURRENCY    Worker processes (default: 1, or the number of CPU
+                       cores with RENDER_WORKERS=0)
+    NIGHTSKY_THREADS   Threads per worker (default: 16, or 1 with
+                       RENDER_WORKERS=0)
+    NIGHTSKY_TIMEOUT   Worker timeout in seconds (default: 120)
+    RENDER_WORKERS     Render processes per worker (see render_pool.py)
+
+Sky renders run in a pool of render processes owned by each worker, with
+memory-aware admission, so the request threads only wait on them: one
+worker with many threads serves the whole host, and the render pool scales
+across cores. Every worker would start its own pool and budget.
+
+With RENDER_WORKERS=0 renders run in the request threads. Matplotlib is
+not thread-safe, so each worker then takes one request at a time and
+WEB_CONCURRENCY should be sized to cores and memory (a 4000 px render holds
+a large buffer) rather than to the expected request rate.
+
+Total concurrency is WEB_CONCURRENCY x NIGHTSKY_THREADS.
+"""
+
+import multiprocessing
+import os
+import threading
+
+render_workers = int(os.environ.get("RENDER_WORKERS", multiprocessing.cpu_count()))
+
+bind = os.environ.get("NIGHTSKY_BIND", "0.0.0.0:5051")
+workers = int(os.environ.get("WEB_CONCURRENCY",
+                             1 if render_workers else multiprocessing.cpu_count()))
+threads = int(os.environ.get("NIGHTSKY_THREADS", 16 if render_workers else 1))
+worker_class = "gthread"
+timeout = int(os.environ.get("NIGHTSKY_TIMEOUT", 120))
+
+# Import the app (starplot, timezone data, ephemeris) once in the master so
+# the workers share that memory copy-on-write
+preload_app = True
+
+
+def post_worker_init(worker):
+    """Spawn and warm this worker's render processes without delaying startup."""
+    from server import render_pool
+
+    threading.Thread(target=render_pool.start, name="render-pool-start", daemon=True).start()
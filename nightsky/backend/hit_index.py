@@ -0,0 +1,204 @@
+"""
+Hit Index - Image positions of the objects drawn on a rendered sky view
+
+Lets the frontend tell what a click landed on without asking SIMBAD:
+the renderer already knows where it put every star, planet, DSO and
+satellite marker.
+
+    index = build_hit_index(plot, bbox_inches, scale, geo_satellites)
+    index = merge_hit_indexes(base_index, overlay_index)   # layered renders
+
+The index is columnar JSON sorted by x, one array per field:
+
+    {"width": 1395, "height": 1386, "count": 241, "max_r": 24,
+     "x": [...], "y": [...], "r": [...],     # pixels, origin at top left
+     "kind": [...],                           # star, planet, moon, sun, dso, satellite
+     "name": [...], "id": [...]}              # id: "HIP 32349", "M 42", "NORAD 41866"
+
+A click at (cx, cy) resolves with a binary search for the x range
+[cx - max_r, cx + max_r], then the nearest entry in that slice whose
+circle contains the click: O(log n + k) and no round trip.
+
+Pixel positions go through starplot's private projection attributes
+(_proj, _crs), so the starplot release is pinned in the dependencies; if
+building the index fails anyway, the render still succeeds with
+"hits": null.
+
+Hit radii follow the drawn size (star markers by magnitude, the Moon and
+DSOs by apparent size) but never drop below MIN_HIT_RADIUS, so faint stars
+stay clickable.
+"""
+
+import math
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+MIN_HIT_RADIUS = 6      # Pixels at 150 dpi; scaled with the output
+MAX_HIT_RADIUS = 400
+
+
+def _star_marker_points(magnitude: Optional[float]) -> float:
+    """Diameter in points of starplot's default star marker (size_by_magnitude)."""
+    if magnitude is None or magnitude >= 7.6:
+        return math.sqrt(2.36)
+    return math.sqrt(20 ** math.log(8 - magnitude))
+
+
+def _catalog_id(kind: str, obj) -> str:
+    if kind == "star":
+        return f"HIP {obj.hip}" if getattr(obj, "hip", None) else (obj.name or "")
+    if kind == "dso":
+        if getattr(obj, "m", None):
+            return f"M {obj.m}"
+        if getattr(obj, "ngc", None):
+            return f"NGC {obj.ngc}"
+        if getattr(obj, "ic", None):
+            return f"IC {obj.ic}"
+        return obj.name
+    return obj.name.title() if kind == "planet" else obj.name
+
+
+class _Projector:
+    """Maps sky positions onto output image pixels for one rendered plot."""
+
+    def __init__(self, plot, bbox_inches, scale: float):
+        self.plot = plot
+        self.bbox = bbox_inches
+        self.scale = scale  # Output pixels per inch
+
+    def altaz(self, ra, dec):
+        """Apparent (az, alt) in degrees, as the plot computes them."""
+        from skyfield.api import Star as SkyfieldStar
+
+        position = self.plot.observe(SkyfieldStar(
+            ra_hours=np.asarray(ra, dtype=float) / 15,
+            dec_degrees=np.asarray(dec, dtype=float))).apparent()
+        alt, az, _ = position.altaz()
+        return np.atleast_1d(az.degrees), np.atleast_1d(alt.degrees)
+
+    def pixels(self, az, alt):
+        """Output image (x, y) for az/alt arrays; y grows downward."""
+        plot = self.plot
+        projected = plot._proj.transform_points(plot._crs, np.asarray(az, dtype=float),
+                                                np.asarray(alt, dtype=float))[:, :2]
+        inches = plot.ax.transData.transform(projected) / plot.fig.dpi
+        x = (inches[:, 0] - self.bbox.x0) * self.scale
+        y = (self.bbox.y1 - inches[:, 1]) * self.scale
+        return x, y
+
+    def pixels_per_degree(self, az, alt):
+        """Local image scale, measured along altitude."""
+        x0, y0 = self.pixels(az, alt)
+        x1, y1 = self.pixels(az, np.asarray(alt, dtype=float) - 0.5)
+        return np.hypot(x1 - x0, y1 - y0) * 2
+
+
+def build_hit_index(plot, bbox_inches, scale: float,
+                    geo_satellites: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """
+    Build the hit index of a rendered HorizonPlot.
+
+    Args:
+        plot: The plot, after it was saved (its objects list is filled)
+        bbox_inches: Figure region that was saved, in inches (the padded
+            tight bounding box)
+        scale: Output pixels per inch (the export dpi; 72 for SVG)
+        geo_satellites: Satellite dicts that were drawn as markers
+            (azimuth, elevation, name, norad_id)
+
+    Returns:
+        Columnar index sorted by x (see module docstring)
+    """
+    projector = _Projector(plot, bbox_inches, scale)
+    points_to_px = scale / 72 * plot.scale
+    min_r = MIN_HIT_RADIUS * scale / 150
+
+    entries = []  # (kind, object, diameter in points or None, size in degrees or None)
+    objects = plot.objects
+    # A star can be listed more than once (e.g. plotted and labeled); keep
+    # one entry per star, the named one
+    stars = {}
+    for star in objects.stars:
+        key = star.hip or id(star)
+        if key not in stars or (star.name and not stars[key].name):
+            stars[key] = star
+    for star in stars.values():
+        entries.append(("star", star, _star_marker_points(star.magnitude), None))
+    for planet in objects.planets:
+        entries.append(("planet", planet, None, planet.apparent_size))
+    for kind, body in (("moon", objects.moon), ("sun", objects.sun)):
+        if body is not None:
+            entries.append((kind, body, None, body.apparent_size))
+    for dso in objects.dsos:
+        size = max(dso.maj_ax or 0, dso.min_ax or 0) / 60 or None
+        entries.append(("dso", dso, None, size))
+
+    width = bbox_inches.width * scale
+    height = bbox_inches.height * scale
+    columns = {"x": [], "y": [], "r": [], "kind": [], "name": [], "id": []}
+
+    def add(x, y, r, kind, name, catalog_id):
+        inside = (x >= 0) & (y >= 0) & (x <= width) & (y <= height)
+        for i in np.flatnonzero(inside).tolist():
+            columns["x"].append(round(float(x[i]), 1))
+            columns["y"].append(round(float(y[i]), 1))
+            columns["r"].append(round(float(r[i]), 1))
+            columns["kind"].append(kind[i])
+            columns["name"].append(name[i])
+            columns["id"].append(catalog_id[i])
+
+    if entries:
+        az, alt = projector.altaz([e[1].ra for e in entries], [e[1].dec for e in entries])
+        x, y = projector.pixels(az, alt)
+        per_degree = projector.pixels_per_degree(az, alt)
+        r = np.array([
+            points / 2 * points_to_px if points is not None
+            else (degrees or 0) / 2 * per_degree[i]
+            for i, (_, _, points, degrees) in enumerate(entries)
+        ])
+        add(x, y, np.clip(r, min_r, MAX_HIT_RADIUS), [e[0] for e in entries],
+            [e[1].name or "" for e in entries], [_catalog_id(e[0], e[1]) for e in entries])
+
+    satellites = [s for s in geo_satellites or ()
+                  if s.get("azimuth") is not None and s.get("elevation") is not None]
+    if satellites:
+        x, y = projector.pixels([s["azimuth"] for s in satellites],
+                                [s["elevation"] for s in satellites])
+        add(x, y, np.full(len(satellites), min_r), ["satellite"] * len(satellites),
+            [s.get("name", "GEO") for s in satellites],
+            [f"NORAD {s['norad_id']}" if s.get("norad_id") else "" for s in satellites])
+
+    order = np.argsort(columns["x"], kind="stable").tolist()
+    index = {key: [values[i] for i in order] for key, values in columns.items()}
+    return {
+        # Image size as matplotlib writes it (truncated)
+        "width": int(width),
+        "height": int(height),
+        "count": len(order),
+        "max_r": max(index["r"], default=0),
+        **index,
+    }
+
+
+def merge_hit_indexes(*indexes: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Combine hit indexes of layers saved over the same image region.
+
+    Returns:
+        One columnar index sorted by x, sized like the first
+    """
+    columns = {key: [] for key in ("x", "y", "r", "kind", "name", "id")}
+    for index in indexes:
+        for key, values in columns.items():
+            values.extend(index[key])
+
+    order = np.argsort(columns["x"], kind="stable").tolist()
+    merged = {key: [values[i] for i in order] for key, values in columns.items()}
+    return {
+        "width": indexes[0]["width"],
+        "height": indexes[0]["height"],
+        "count": len(order),
+        "max_r": max(merged["r"], default=0),
+        **merged,
+    }
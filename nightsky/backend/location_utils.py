@@ -7,19 +7,53 @@ Handles:
 - Local datetime calculation
 """
 
+import os
+import threading
 from datetime import datetime
 from zoneinfo import ZoneInfo
 from typing import Optional, Tuple, Dict, Any
 
-from timezonefinder import TimezoneFinder
-from geopy.geocoders import Nominatim
-from geopy.exc import GeocoderTimedOut, GeocoderServiceError
+import shared_modules  # noqa: F401  (repository root on sys.path)
+from metrics import upstream_call
 
-# Initialize geocoder with a user agent
-_geolocator = Nominatim(user_agent="nightsky_viewer_v1")
+# Geocoder and timezone finder are created on first use (or by the server's
+# background warmup): the in-memory timezone polygons take a while to load
+_geolocator = None
+_tf = None
+_init_lock = threading.Lock()
 
-# Initialize timezone finder (in_memory for better performance)
-_tf = TimezoneFinder(in_memory=True)
+# Overridable so load tests can point at a local stand-in (see loadtest/)
+NOMINATIM_URL = os.environ.get("NOMINATIM_URL", "https://nominatim.openstreetmap.org")
+
+
+def _get_geolocator():
+    """Return the shared Nominatim geocoder, creating it on first use."""
+    global _geolocator
+
+    if _geolocator is None:
+        from geopy.geocoders import Nominatim
+        with _init_lock:
+            if _geolocator is None:
+                # Initialize geocoder with a user agent
+                scheme, _, domain = NOMINATIM_URL.partition("://")
+                _geolocator = Nominatim(user_agent="nightsky_viewer_v1",
+                                        domain=domain, scheme=scheme)
+
+    return _geolocator
+
+
+def _get_timezone_finder():
+    """Return the shared TimezoneFinder, loading its polygons on first use."""
+    global _tf
+
+    if _tf is None:
+        from timezonefinder import TimezoneFinder
+        with _init_lock:
+            if _tf is None:
+                # in_memory for better performance
+                _tf = TimezoneFinder(in_memory=True)
+
+    return _tf
 
 
 def geocode_location(query: str) -> Optional[Dict[str, Any]]:
@@ -32,8 +66,11 @@ def geocode_location(query: str) -> Optional[Dict[str, Any]]:
     Returns:
         Dictionary with lat, lon, display_name, timezone or None if not found
     """
+    from geopy.exc import GeocoderTimedOut, GeocoderServiceError
+
     try:
-        location = _geolocator.geocode(query, timeout=10)
+        with upstream_call("nominatim"):
+            location = _get_geolocator().geocode(query, timeout=10)
 
         if location is None:
             return None
@@ -74,7 +111,7 @@ def get_timezone(lat: float, lon: float) -> str:
         Timezone name (e.g., "America/New_York") or "UTC" if not found
     """
     try:
-        tz_name = _tf.timezone_at(lng=lon, lat=lat)
+        tz_name = _get_timezone_finder().timezone_at(lng=lon, lat=lat)
         return tz_name if tz_name else "UTC"
     except Exception as e:
         print(f"Timezone lookup error for ({lat}, {lon}): {e}")
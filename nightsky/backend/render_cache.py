@@ -0,0 +1,383 @@
+"""
+Render Cache - Reuse of sky renders across equivalent /generate requests
+
+Requests are canonicalized before rendering: latitude and longitude are
+snapped to RENDER_LATLON_STEP degrees and the time to RENDER_TIME_BUCKET
+seconds (a request without a time means "now"), so everyone asking for the
+same city and direction within a bucket is served the same image. The
+render runs with the snapped values, so a cached image is exactly what its
+key describes.
+
+    cache = RenderCache()
+    params = quantize(params)               # generate_sky_image arguments
+    key = render_key(params)
+    entry, status = cache.get_or_render(key, lambda: render(params))
+
+Tiers:
+    memory  LRU capped at RENDER_CACHE_MB
+    disk    every render is also written to RENDER_CACHE_DIR (shared by
+            worker processes and kept across restarts); entries evicted
+            from memory are read back from there. Capped at RENDER_DISK_MB,
+            least recently used files removed first
+
+Requests for a key that is being rendered wait for that render instead of
+starting their own (within one process), so a burst of identical requests
+costs one render.
+
+Entries hold the image and its hit index (see hit_index.py), so one render
+serves both plain image and hit_index requests.
+
+The worker processes keep a second RenderCache of static bases (see
+sky_generator.generate_sky_image): the layers fixed to the stars, rendered
+for a local sidereal time snapped to RENDER_LST_STEP. Planets, the Moon,
+the Sun and satellite markers are drawn over a cached base, so a new time
+bucket or another set of bodies does not redraw the stars.
+
+Environment variables:
+    RENDER_LATLON_STEP   Grid step for observer coordinates, degrees
+                         (default 0.1, about 11 km)
+    RENDER_TIME_BUCKET   Time bucket, seconds (default 60)
+    RENDER_CACHE_MB      Memory tier size (default 256, 0 disables the cache)
+    RENDER_CACHE_DIR     Disk tier directory (default: renders/ in
+                         ORBIT_STATE_DIR)
+    RENDER_DISK_MB       Disk tier size (default 1024, 0 disables the tier)
+    RENDER_LST_STEP      Sidereal time step of static bases, seconds
+                         (default 120, a 0.5 degree turn of the sky)
+    RENDER_BASE_MB       Static base memory tier per worker (default 64,
+                         0 renders every layer in one pass)
+    RENDER_BASE_DISK_MB  Static base disk tier, in bases/ next to the
+                         render files (default 512)
+"""
+
+import json
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, NamedTuple, Optional, Tuple
+
+import shared_modules  # noqa: F401  (repository root on sys.path)
+from http_cache import make_etag
+from metrics import cache_event
+from state_store import DEFAULT_STATE_DIR
+
+LATLON_STEP = float(os.environ.get("RENDER_LATLON_STEP", 0.1))
+TIME_BUCKET = max(1, int(os.environ.get("RENDER_TIME_BUCKET", 60)))
+MEMORY_MB = float(os.environ.get("RENDER_CACHE_MB", 256))
+DISK_MB = float(os.environ.get("RENDER_DISK_MB", 1024))
+LST_STEP = float(os.environ.get("RENDER_LST_STEP", 120))
+BASE_MEMORY_MB = float(os.environ.get("RENDER_BASE_MB", 64))
+BASE_DISK_MB = float(os.environ.get("RENDER_BASE_DISK_MB", 512))
+
+# Part of every key; bump when a change to the renderer alters its output
+RENDER_VERSION = 3
+
+TOUCH_INTERVAL = 60  # Seconds between last-access updates of one disk entry
+
+# A static base is reused within one such epoch: precession and annual
+# aberration move the stars by at most about 15" in 30 days, a small
+# fraction of a pixel
+BASE_EPOCH_DAYS = 30
+
+
+class RenderEntry(NamedTuple):
+    """A cached render: image bytes and the hit index as JSON (or None)."""
+    image: bytes
+    hits: Optional[bytes]
+
+    @property
+    def size(self) -> int:
+        return len(self.image) + len(self.hits or b"")
+
+
+def bucket_start(dt: Optional[datetime], bucket: int = TIME_BUCKET) -> datetime:
+    """
+    Start of the time bucket holding dt, in UTC.
+
+    None means now; a naive datetime is taken as UTC, as create_observer does.
+    """
+    if dt is None:
+        dt = datetime.now(timezone.utc)
+    elif dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    seconds = int(dt.timestamp()) // bucket * bucket
+    return datetime.fromtimestamp(seconds, timezone.utc)
+
+
+def quantize(params: Dict, step: float = LATLON_STEP, bucket: int = TIME_BUCKET) -> Dict:
+    """
+    Snap the observer position and time of generate_sky_image arguments.
+
+    Returns:
+        A copy of params with lat, lon and dt replaced by their cell and
+        bucket values
+    """
+    quantized = dict(params)
+    if step > 0:
+        # Clamp so the poles and the antimeridian stay valid coordinates
+        quantized["lat"] = min(90.0, max(-90.0, round(round(params["lat"] / step) * step, 6)))
+        quantized["lon"] = min(180.0, max(-180.0, round(round(params["lon"] / step) * step, 6)))
+    quantized["dt"] = bucket_start(params.get("dt"), bucket)
+    return quantized
+
+
+def render_key(params: Dict) -> str:
+    """Cache key of quantized generate_sky_image arguments (also the ETag base)."""
+    from importlib.metadata import PackageNotFoundError, version
+
+    try:
+        renderer = version("starplot")
+    except PackageNotFoundError:
+        renderer = None
+    return make_etag(RENDER_VERSION, renderer, params)
+
+
+def seconds_left(params: Dict, bucket: int = TIME_BUCKET) -> int:
+    """Seconds until a render of "now" moves to the next time bucket."""
+    end = params["dt"].timestamp() + bucket
+    return max(0, int(end - time.time()))
+
+
+def sidereal_quantize(lon: float, dt: datetime,
+                      step: float = LST_STEP) -> Tuple[float, float]:
+    """
+    Snap the local sidereal time of an observer to step seconds.
+
+    The sky above a latitude is the same for every longitude and time that
+    share a sidereal time, so the result is the longitude at which the
+    snapped sidereal time holds at dt. Rendering there keeps the stars and
+    the bodies drawn over them consistent; the sky as a whole turns by at
+    most half a step against the horizon.
+
+    Args:
+        lon: Observer longitude in degrees
+        dt: Aware datetime of the observation
+        step: Sidereal time step in seconds (0 keeps lon)
+
+    Returns:
+        (snapped local sidereal time in degrees, longitude to render at)
+    """
+    days = dt.timestamp() / 86400 - 10957.5  # Since J2000.0
+    lst = (280.46061837 + 360.98564736629 * days + lon) % 360
+    if step <= 0:
+        return round(lst, 6), lon
+    degrees = step / 240  # The sky turns 360 degrees in 86400 sidereal seconds
+    snapped = round(lst / degrees) * degrees % 360
+    shift = (snapped - lst + 180) % 360 - 180
+    return round(snapped, 6), (lon + shift + 180) % 360 - 180
+
+
+def base_epoch(dt: datetime) -> int:
+    """Index of the BASE_EPOCH_DAYS period holding dt."""
+    return math.floor(dt.timestamp() / (BASE_EPOCH_DAYS * 86400))
+
+
+def default_directory() -> Path:
+    """RENDER_CACHE_DIR, or renders/ in the state directory."""
+    path = os.environ.get("RENDER_CACHE_DIR")
+    if path:
+        return Path(path)
+    return Path(os.environ.get("ORBIT_STATE_DIR", DEFAULT_STATE_DIR)) / "renders"
+
+
+class RenderCache:
+    """
+    Two-tier (memory LRU, then disk) render cache with in-flight coalescing.
+
+    Args:
+        directory: Disk tier directory (shared by all worker processes)
+        memory_mb: Memory tier size cap; 0 disables caching altogether
+        disk_mb: Disk tier size cap; 0 keeps renders in memory only
+        name: Cache label in the metrics
+    """
+
+    def __init__(self, directory=None, memory_mb: float = MEMORY_MB,
+                 disk_mb: float = DISK_MB, name: str = "renders"):
+        self.directory = Path(directory) if directory else default_directory()
+        self.name = name
+        self.memory_max = int(memory_mb * 1024 * 1024)
+        self.disk_max = int(disk_mb * 1024 * 1024)
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._disk_bytes = None  # Scanned on first write
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._disk_lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.memory_max > 0
+
+    def __len__(self) -> int:
+        return len(self._memory)
+
+    @property
+    def memory_bytes(self) -> int:
+        return self._memory_bytes
+
+    @property
+    def disk_bytes(self) -> int:
+        return self._disk_bytes or 0
+
+    def get_or_render(self, key: str,
+                      render: Callable[[], RenderEntry]) -> Tuple[RenderEntry, str]:
+        """
+        The entry for key, rendering it on a miss.
+
+        Args:
+            key: render_key() of the quantized request
+            render: Produces the entry; called at most once per key at a
+                time in this process
+
+        Returns:
+            (entry, status): status is "hit", "disk", "coalesced" (waited
+            for another request's render) or "miss"
+
+        Raises:
+            Whatever render raised (also in the requests that waited for it)
+        """
+        if not self.enabled:
+            return render(), "miss"
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                cache_event(self.name, "hit")
+                return entry, "hit"
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+
+        if not leader:
+            cache_event(self.name, "coalesced")
+            return future.result(), "coalesced"
+
+        try:
+            entry = self._disk_get(key)
+            if entry is not None:
+                cache_event(self.name, "disk_hit")
+                status = "disk"
+            else:
+                cache_event(self.name, "miss")
+                entry = render()
+                self._disk_put(key, entry)
+                status = "miss"
+            self._memory_put(key, entry)
+            future.set_result(entry)
+            return entry, status
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    # ------------------------------------------------------------------
+    # Memory tier
+    # ------------------------------------------------------------------
+
+    def _memory_put(self, key: str, entry: RenderEntry):
+        if entry.size > self.memory_max:
+            return
+        with self._lock:
+            previous = self._memory.pop(key, None)
+            if previous is not None:
+                self._memory_bytes -= previous.size
+            self._memory[key] = entry
+            self._memory_bytes += entry.size
+            while self._memory_bytes > self.memory_max:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= evicted.size
+                cache_event(self.name, "eviction")
+
+    # ------------------------------------------------------------------
+    # Disk tier
+    # ------------------------------------------------------------------
+    # One file per key: a JSON header line ({"hits": <length or null>}),
+    # the hit index, then the image bytes. The file's mtime is its last
+    # access.
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.render"
+
+    def _disk_get(self, key: str) -> Optional[RenderEntry]:
+        if self.disk_max <= 0:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                header = json.loads(f.readline())
+                hits = f.read(header["hits"]) if header.get("hits") is not None else None
+                image = f.read()
+            if time.time() - path.stat().st_mtime > TOUCH_INTERVAL:
+                os.utime(path)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Render cache read failed for {key}: {e}")
+            return None
+        return RenderEntry(image, hits)
+
+    def _disk_put(self, key: str, entry: RenderEntry):
+        if self.disk_max <= 0 or entry.size > self.disk_max:
+            return
+        path = self._path(key)
+        header = json.dumps({"hits": None if entry.hits is None else len(entry.hits)})
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f"{key}.{os.getpid()}.{threading.get_ident()}.tmp")
+            with open(tmp, "wb") as f:
+                f.write(header.encode() + b"\n")
+                f.write(entry.hits or b"")
+                f.write(entry.image)
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"Render cache write failed for {key}: {e}")
+            return
+
+        with self._disk_lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = sum(size for _, size, _ in self._scan())
+            else:
+                self._disk_bytes += path.stat().st_size
+            if self._disk_bytes > self.disk_max:
+                self.evict_disk()
+
+    def _scan(self):
+        """(path, size, mtime) of every disk entry."""
+        for path in self.directory.glob("*/*.render"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:  # Evicted by another worker
+                continue
+            yield path, stat.st_size, stat.st_mtime
+
+    def evict_disk(self) -> int:
+        """
+        Delete least recently used disk entries down to 90% of the cap.
+
+        Other workers write to the same directory, so the size is re-read
+        from the files rather than trusted from this process's count.
+
+        Returns:
+            Entries deleted
+        """
+        files = sorted(self._scan(), key=lambda item: item[2])
+        total = sum(size for _, size, _ in files)
+        target = self.disk_max * 0.9
+        deleted = 0
+        for path, size, _ in files:
+            if total <= target:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            deleted += 1
+            cache_event(self.name, "disk_eviction")
+        self._disk_bytes = total
+        return deleted
@@ -0,0 +1,356 @@
+"""
+Render Pool - Sky renders in pre-warmed worker processes with memory-aware admission
+
+Matplotlib is not thread-safe and a large render holds a large buffer, so
+renders do not run in the request threads. They run in a pool of long-lived
+worker processes, each of which imports starplot, builds the PlotStyles,
+loads the ephemeris and timezone data, and opens the star catalogs (with a
+small warm-up render) before taking jobs:
+
+    pool = RenderPool()
+    pool.start()                                 # spawn and warm the workers
+    image, hits = pool.render(params, hit_index=True)
+
+Admission: every job is charged an estimated memory cost (estimate_mb:
+resolution squared times a per-pixel cost, scaled up by the heavier layers)
+against RENDER_MEMORY_MB, and at most one job per worker runs at a time.
+Jobs that do not fit wait in FIFO order (a large render is not overtaken
+forever by small ones) for up to RENDER_QUEUE_SECONDS, with at most
+RENDER_QUEUE_MAX waiting; past either limit the job is refused with
+PoolSaturated, which the API answers with 503 and Retry-After.
+
+Workers are started with the forkserver method: they never inherit the
+server's threads or locks, and a worker killed mid-render (e.g. by the
+OOM killer) fails only its own job; the pool is rebuilt on the next one.
+
+The budget covers the render working memory only; each warm worker holds
+about 370 MB on top of it.
+
+Environment variables:
+    RENDER_WORKERS         Worker processes (default: number of CPU cores;
+                           0 renders in the request thread, still admitted
+                           against the budget)
+    RENDER_MEMORY_MB       Memory budget of the running jobs (default: a
+                           quarter of physical memory, at least 512)
+    RENDER_QUEUE_SECONDS   Longest wait for admission (default 10)
+    RENDER_QUEUE_MAX       Most jobs waiting at once (default 32)
+"""
+
+import math
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+import shared_modules  # noqa: F401  (repository root on sys.path)
+from metrics import gauge
+
+
+def _physical_mb() -> Optional[float]:
+    try:
+        return os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+WORKERS = int(os.environ.get("RENDER_WORKERS", os.cpu_count() or 1))
+MEMORY_MB = float(os.environ.get("RENDER_MEMORY_MB", 0)) or max(512.0, (_physical_mb() or 2048) / 4)
+QUEUE_SECONDS = float(os.environ.get("RENDER_QUEUE_SECONDS", 10))
+QUEUE_MAX = int(os.environ.get("RENDER_QUEUE_MAX", 32))
+
+# Cost model, measured as peak RSS growth of a warm worker: about 10.5 bytes
+# per resolution^2 pixel with the default layers (61 MB at 2400 px, 169 MB
+# at 4000 px), roughly doubled with every reference layer on and magnitude 8
+# stars
+BASE_MB = 8.0
+BYTES_PER_PIXEL = 10.5
+LAYER_WEIGHTS = {
+    "show_dso": 0.5,
+    "show_constellation_borders": 0.2,
+    "show_gridlines": 0.15,
+    "show_messier": 0.1,
+    "show_milky_way": 0.1,
+    "show_ecliptic": 0.05,
+    "show_celestial_equator": 0.05,
+    "show_geostationary": 0.05,
+}
+STAR_WEIGHT_PER_MAGNITUDE = 0.2  # Beyond magnitude 5
+
+WARM_RESOLUTION = 400   # Warm-up render that opens the catalogs
+DEFAULT_RENDER_SECONDS = 15.0
+
+POOL_MEMORY = gauge("render_pool_memory_mb", "Estimated memory of admitted sky renders")
+POOL_WAITING = gauge("render_pool_waiting", "Sky renders waiting for admission")
+
+
+class PoolSaturated(Exception):
+    """A render was refused admission; retry_after is a suggested wait in seconds."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Render capacity exhausted, retry in {retry_after} s")
+        self.retry_after = retry_after
+
+
+def estimate_mb(params: Dict) -> float:
+    """
+    Estimated peak memory of a render, in MB.
+
+    Args:
+        params: generate_sky_image keyword arguments
+    """
+    resolution = params.get("resolution", 2400)
+    weight = 1.0 + sum(w for layer, w in LAYER_WEIGHTS.items() if params.get(layer))
+    if params.get("show_stars", True):
+        weight += STAR_WEIGHT_PER_MAGNITUDE * max(0.0, params.get("star_magnitude_limit", 5.0) - 5)
+    estimate = BASE_MB + resolution ** 2 * BYTES_PER_PIXEL * weight / 2 ** 20
+    if params.get("directions"):
+        # Panorama: views render one at a time, but every view is held
+        # decoded (RGBA) for the sprite, which is as large again
+        estimate += len(params["directions"]) * resolution ** 2 * 8 / 2 ** 20
+    return estimate
+
+
+# ============================================
+# Worker process side
+# ============================================
+
+def _init_worker():
+    """Load everything a render needs, once per worker process."""
+    from location_utils import get_timezone
+    from sky_generator import build_styles, generate_sky_image, get_ephemeris
+
+    build_styles()
+    get_ephemeris()
+    get_timezone(0.0, 0.0)
+    try:
+        generate_sky_image(lat=0.0, lon=0.0, resolution=WARM_RESOLUTION)
+    except Exception as e:
+        print(f"Render worker warm-up failed: {e}")
+
+
+def _render(params: Dict, hit_index: bool):
+    from sky_generator import generate_sky_image
+
+    return generate_sky_image(**params, hit_index=hit_index)
+
+
+def _render_profiled(params: Dict, hit_index: bool, memory: bool):
+    from render_profile import RenderProfile
+    from sky_generator import generate_sky_image
+
+    with RenderProfile(memory=memory) as profile:
+        result = generate_sky_image(**params, profile=profile, hit_index=hit_index)
+    return result, profile.stages
+
+
+def _render_panorama(params: Dict):
+    from sky_generator import generate_panorama
+
+    return generate_panorama(**params, hit_index=True)
+
+
+def _ready() -> int:
+    return os.getpid()
+
+
+# ============================================
+# Server side
+# ============================================
+
+class RenderPool:
+    """
+    Worker processes for sky renders behind a memory-budgeted FIFO queue.
+
+    Args:
+        workers: Worker processes; 0 renders in the calling thread
+        memory_mb: Budget for the estimated memory of running jobs
+        queue_seconds: Longest wait for admission
+        queue_max: Most jobs waiting at once
+    """
+
+    def __init__(self, workers: int = WORKERS, memory_mb: float = MEMORY_MB,
+                 queue_seconds: float = QUEUE_SECONDS, queue_max: int = QUEUE_MAX):
+        self.workers = workers
+        self.memory_mb = memory_mb
+        self.queue_seconds = queue_seconds
+        self.queue_max = queue_max
+        self._cond = threading.Condition()
+        self._waiting = deque()
+        self._admitted_mb = 0.0
+        self._running = 0
+        self._render_seconds = DEFAULT_RENDER_SECONDS  # Moving average
+        self._executor = None
+        self._pid = None
+        self._executor_lock = threading.Lock()
+        POOL_MEMORY.set_function(lambda: self._admitted_mb)
+        POOL_WAITING.set_function(lambda: len(self._waiting))
+
+    @property
+    def concurrency(self) -> int:
+        """Jobs allowed to run at once (unbounded in-thread, but for the budget)."""
+        return self.workers or math.inf
+
+    def _pool(self) -> ProcessPoolExecutor:
+        # Worker processes belong to the process that started them
+        with self._executor_lock:
+            if self._executor is None or self._pid != os.getpid():
+                context = multiprocessing.get_context("forkserver")
+                context.set_forkserver_preload(["sky_generator"])
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=context, initializer=_init_worker)
+                self._pid = os.getpid()
+            return self._executor
+
+    def start(self) -> int:
+        """
+        Spawn and warm every worker; blocks until they are ready.
+
+        Returns:
+            Worker processes started (0 when rendering in-thread)
+        """
+        if not self.workers:
+            return 0
+        pool = self._pool()
+        # A job submitted while no worker is idle starts another worker
+        pids = {f.result() for f in [pool.submit(_ready) for _ in range(self.workers)]}
+        return len(pids)
+
+    def shutdown(self):
+        self._discard(self._executor)
+
+    def _discard(self, executor: Optional[ProcessPoolExecutor]):
+        """Shut executor down unless it was already replaced."""
+        with self._executor_lock:
+            if executor is None or executor is not self._executor:
+                return
+            if self._pid == os.getpid():
+                executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    # ------------------------------------------------------------------
+    # Admission
+    # ------------------------------------------------------------------
+
+    def _fits(self, cost: float) -> bool:
+        return self._running < self.concurrency and self._admitted_mb + cost <= self.memory_mb
+
+    def retry_after(self) -> int:
+        """Seconds until the queue ahead has likely drained."""
+        rounds = (len(self._waiting) + self._running) / min(self.concurrency, 64)
+        return max(1, math.ceil(self._render_seconds * max(rounds, 1)))
+
+    @contextmanager
+    def slot(self, params: Dict):
+        """
+        Hold admission for one render of params.
+
+        A job estimated above the whole budget is charged the budget, so it
+        runs alone rather than never.
+
+        Raises:
+            PoolSaturated: The queue is full or the wait ran out
+        """
+        cost = min(estimate_mb(params), self.memory_mb)
+        with self._cond:
+            if not self._waiting and self._fits(cost):
+                self._admit(cost)
+            elif len(self._waiting) >= self.queue_max:
+                raise PoolSaturated(self.retry_after())
+            else:
+                self._wait(cost)
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._admitted_mb -= cost
+                self._running -= 1
+                self._cond.notify_all()
+
+    def _admit(self, cost: float):
+        self._admitted_mb += cost
+        self._running += 1
+
+    def _wait(self, cost: float):
+        """Queue for admission (called holding the condition)."""
+        ticket = object()
+        self._waiting.append(ticket)
+        deadline = time.monotonic() + self.queue_seconds
+        try:
+            while not (self._waiting[0] is ticket and self._fits(cost)):
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    raise PoolSaturated(self.retry_after())
+                self._cond.wait(left)
+            self._admit(cost)
+        finally:
+            self._waiting.remove(ticket)
+            # The next job in line may fit now
+            self._cond.notify_all()
+
+    # ------------------------------------------------------------------
+    # Rendering
+    # ------------------------------------------------------------------
+
+    def render(self, params: Dict, hit_index: bool = False):
+        """
+        Render params (generate_sky_image arguments) once admitted.
+
+        Returns:
+            What generate_sky_image returns
+
+        Raises:
+            PoolSaturated: Not admitted in time
+            RuntimeError: The worker died during the render
+        """
+        return self._run(_render, params, hit_index)
+
+    def profiled(self, params: Dict, hit_index: bool = False, memory: bool = False):
+        """
+        Render params once admitted, recording a RenderProfile in the worker.
+
+        Args:
+            memory: Also record peak memory per stage (tracemalloc, in the
+                worker)
+
+        Returns:
+            (what generate_sky_image returns, the profile's stages)
+        """
+        return self._run(_render_profiled, params, hit_index, memory)
+
+    def panorama(self, params: Dict):
+        """
+        Render a panorama (generate_panorama arguments, hit indexes included)
+        once admitted.
+
+        Returns:
+            (sprite bytes, layout), as generate_panorama returns them
+        """
+        return self._run(_render_panorama, params)
+
+    def _run(self, job, params: Dict, *args):
+        with self.slot(params):
+            start = time.perf_counter()
+            if not self.workers:
+                result = job(params, *args)
+            else:
+                from sky_generator import RENDER_DURATION, RENDER_QUEUE
+
+                RENDER_QUEUE.inc()
+                pool = self._pool()
+                try:
+                    result = pool.submit(job, params, *args).result()
+                except BrokenProcessPool as e:
+                    # Rebuilt with fresh workers on the next job
+                    self._discard(pool)
+                    raise RuntimeError(f"Render worker died: {e}") from e
+                finally:
+                    RENDER_QUEUE.dec()
+                RENDER_DURATION.observe(time.perf_counter() - start,
+                                        format=params.get("output_format", "png"))
+            self._render_seconds += 0.2 * (time.perf_counter() - start - self._render_seconds)
+        return result
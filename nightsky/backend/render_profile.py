@@ -0,0 +1,130 @@
+"""
+Render Profile - Per-stage timing and peak memory for sky image renders
+
+generate_horizon_plot and generate_sky_image accept an optional
+RenderProfile and wrap each stage (observer, style, every layer call,
+figure draw, encode) in profile.stage(name). Without a profile the
+stages cost nothing.
+
+Memory tracking uses tracemalloc, which slows rendering noticeably and is
+process-wide, so it is opt-in and only one render is memory-profiled at a
+time. It sees Python and numpy allocations, not Agg's C++ pixel buffers.
+"""
+
+import json
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from typing import Dict, List
+
+# Only one render may own tracemalloc at a time
+_memory_lock = threading.Lock()
+
+
+class RenderProfile:
+    """
+    Collects per-stage timings (and optionally peak memory) for one render.
+
+    Attributes:
+        memory: Whether peak memory is recorded for each stage
+        stages: Recorded stages in order, as {"name", "ms"[, "peak_kb"]}
+    """
+
+    def __init__(self, memory: bool = False):
+        self.memory = memory
+        self.stages: List[Dict] = []
+        self._started = None
+        self._total_ms = None
+        self._owns_tracemalloc = False
+
+    def start(self):
+        """Start the overall clock and, if requested, memory tracking."""
+        if self.memory:
+            if _memory_lock.acquire(blocking=False):
+                self._owns_tracemalloc = not tracemalloc.is_tracing()
+                if self._owns_tracemalloc:
+                    tracemalloc.start()
+            else:
+                # Another render is memory-profiling; report timings only
+                self.memory = False
+        self._started = time.perf_counter()
+        return self
+
+    def finish(self):
+        """Stop the overall clock and release memory tracking."""
+        if self._started is not None and self._total_ms is None:
+            self._total_ms = (time.perf_counter() - self._started) * 1000
+        if self.memory:
+            if self._owns_tracemalloc:
+                tracemalloc.stop()
+                self._owns_tracemalloc = False
+            _memory_lock.release()
+            self.memory = False
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.finish()
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time the enclosed block (and its peak traced memory) as name."""
+        if self.memory:
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            record = {"name": name, "ms": round((time.perf_counter() - start) * 1000, 2)}
+            if self.memory:
+                record["peak_kb"] = round((tracemalloc.get_traced_memory()[1] - baseline) / 1024, 1)
+            self.stages.append(record)
+
+    def add(self, name: str, seconds: float):
+        """Record a stage measured elsewhere (e.g. a sub-stage of savefig)."""
+        self.stages.append({"name": name, "ms": round(seconds * 1000, 2)})
+
+    @property
+    def total_ms(self) -> float:
+        if self._total_ms is not None:
+            return self._total_ms
+        if self._started is None:
+            return 0.0
+        return (time.perf_counter() - self._started) * 1000
+
+    def to_dict(self) -> Dict:
+        """Profile as a JSON-serializable dict."""
+        return {
+            "total_ms": round(self.total_ms, 2),
+            "memory": any("peak_kb" in s for s in self.stages),
+            "stages": self.stages,
+        }
+
+    def to_json(self) -> str:
+        """Compact JSON, suitable for a response header."""
+        return json.dumps(self.to_dict(), separators=(",", ":"))
+
+    def server_timing(self) -> str:
+        """Stages as a Server-Timing header value (shown in browser devtools)."""
+        entries = [f"{s['name']};dur={s['ms']}" for s in self.stages]
+        entries.append(f"total;dur={round(self.total_ms, 2)}")
+        return ", ".join(entries)
+
+
+class _NullProfile:
+    """Stand-in used when profiling is off; every stage is a no-op."""
+
+    memory = False
+
+    def stage(self, name: str):
+        return nullcontext()
+
+    def add(self, name: str, seconds: float):
+        pass
+
+
+NULL_PROFILE = _NullProfile()
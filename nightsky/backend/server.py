@@ -9,6 +9,7 @@ Comprehensive API for generating night sky visualizations including:
 
 Endpoints:
 - POST /api/nightsky/generate - Generate sky image
+- POST /api/nightsky/panorama - All direction views in one sprite
 - GET /api/nightsky/geocode - Convert city to coordinates
 - GET /api/nightsky/options - Get available themes, directions, features
 - GET /api/nightsky/planets - Get visible planets info
@@ -16,13 +17,26 @@ Endpoints:
 - GET /api/nightsky/info - Get location info (time, nighttime status)
 - GET /api/nightsky/geostationary - Get visible geostationary satellites
 - GET /api/nightsky/geostationary/arc - Get full geostationary arc data
+- GET /api/nightsky/health - Liveness check
+- GET /api/nightsky/ready - Readiness (warmup finished) and startup timing report
 """
 
+import json
+import os
+import uuid
+from dataclasses import asdict
 from datetime import datetime
 from io import BytesIO
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, Response, request, jsonify, make_response, send_file
 from flask_cors import CORS
 
+import shared_modules  # noqa: F401  (repository root on sys.path)
+from http_cache import conditional, make_etag, query_etag, STATIC_CACHE
+from metrics import cache_event, gauge, instrument_app
+from tracing import init_tracing
+from sampling_profiler import install_profiler
+from warmup import Warmup
+
 from location_utils import (
     geocode_location,
     parse_coordinates,
@@ -32,7 +46,8 @@ from location_utils import (
     CARDINAL_DIRECTIONS
 )
 from sky_generator import (
-    generate_sky_image,
+    build_styles,
+    get_ephemeris,
     get_visible_planets,
     get_moon_info,
     list_available_options,
@@ -47,9 +62,84 @@ from geostationary_utils import (
     get_all_satellite_categories,
     filter_satellites_by_category
 )
+from render_cache import RenderCache, RenderEntry, quantize, render_key, seconds_left
+from render_pool import PoolSaturated, RenderPool
+from render_profile import RenderProfile
 
 app = Flask(__name__)
-CORS(app)  # Enable CORS for frontend access
+CORS(app, expose_headers=['X-Render-Profile', 'X-Render-Cache', 'ETag'])  # Enable CORS for frontend access
+instrument_app(app)  # Request metrics and GET /metrics
+init_tracing(app, "nightsky")  # Opt-in span trees (TRACE_* settings)
+install_profiler(app, "nightsky")  # Admin sampling profiler (needs ADMIN_TOKEN)
+
+# Render profiling on request ("profile" in /generate); NIGHTSKY_PROFILING=0
+# turns it off, e.g. on public deployments
+PROFILING_ENABLED = os.environ.get('NIGHTSKY_PROFILING', '1') != '0'
+
+# Catalog versions feed the ETags of responses derived only from static data
+OPTIONS_VERSION = make_etag(list_available_options())
+GEO_CATALOG_VERSION = make_etag([asdict(s) for s in MAJOR_GEO_SATELLITES])
+
+# Rendered images, keyed by the quantized request (see render_cache.py)
+render_cache = RenderCache()
+gauge('render_cache_bytes', 'Bytes held by the sky render cache per tier',
+      ['tier']).set_function(lambda: {('memory',): render_cache.memory_bytes,
+                                      ('disk',): render_cache.disk_bytes})
+
+# Renders run in worker processes, admitted against a memory budget (see
+# render_pool.py)
+render_pool = RenderPool()
+
+# /panorama view size, per direction
+PANORAMA_RESOLUTION = 1200
+PANORAMA_MAX_RESOLUTION = 2400
+
+# /generate layer toggles and their defaults
+DISPLAY_OPTIONS = {
+    'show_stars': True,
+    'show_planets': True,
+    'show_moon': True,
+    'show_sun': False,
+    'show_constellations': True,
+    'show_constellation_labels': True,
+    'show_constellation_borders': False,
+    'show_milky_way': True,
+    'show_messier': False,
+    'show_dso': False,
+    'show_gridlines': False,
+    'show_ecliptic': False,
+    'show_celestial_equator': False,
+    'show_geostationary': False,
+    'show_horizon': True,
+}
+
+
+def _import_heavy_modules():
+    """Import starplot (matplotlib, duckdb), skyfield and timezonefinder."""
+    import matplotlib.pyplot  # noqa: F401  (builds the font cache)
+    import starplot  # noqa: F401
+    import skyfield.api  # noqa: F401
+    import timezonefinder  # noqa: F401
+
+
+# Background startup work. Imports run first, in one phase, so that the
+# parallel phases never import the same package from two threads at once.
+warmup = Warmup("nightsky")
+warmup.add("imports", _import_heavy_modules)
+warmup.add("styles", build_styles, requires=["imports"])
+warmup.add("ephemeris", get_ephemeris, requires=["imports"])
+warmup.add("timezones", lambda: get_timezone(0.0, 0.0), requires=["imports"])
+
+
+def preload():
+    """
+    Load styles, ephemeris, timezone polygons and matplotlib up front.
+
+    Called in the master process of a pre-fork deployment (see wsgi.py) so
+    that workers inherit these copy-on-write instead of each loading them on
+    their first request.
+    """
+    return warmup.run()
 
 
 @app.route('/api/nightsky/generate', methods=['POST'])
@@ -92,142 +182,346 @@ def generate():
         // Style options
         "theme": "BLUE_DARK",
         "gradient": "TRUE_NIGHT",
-        "format": "png"
+        "format": "png",
+
+        // Click targets
+        "hit_index": false,  // true: also return drawn objects' positions
+
+        // Debugging
+        "profile": false  // true: stage timings, "memory": also peak memory
     }
 
-    Returns: PNG/SVG/JPEG image
+    Returns: PNG/SVG/JPEG image. With "profile", per-stage timings are
+    returned in the Server-Timing and X-Render-Profile (JSON) headers.
+
+    Renders are cached (see render_cache.py): the position is snapped to a
+    RENDER_LATLON_STEP grid and the time to a RENDER_TIME_BUCKET bucket
+    before rendering, and identical requests in flight share one render.
+    Responses carry an ETag (a matching If-None-Match gets 304) and
+    X-Render-Cache: hit, disk, coalesced, miss or revalidated. Profiled
+    requests bypass the cache.
+
+    Renders run in the render pool (see render_pool.py); when it has no
+    capacity within the queue limits the answer is 503 with Retry-After.
+    With "hit_index", a multipart/form-data response (readable with
+    fetch().formData()) holding a "hits" JSON part, the pixel positions,
+    hit radii, names and catalog IDs of the drawn objects (see
+    hit_index.py), and an "image" part.
     """
+    data = request.get_json(silent=True) or {}
     try:
-        data = request.get_json() or {}
+        params = _parse_generate_request(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    want_hits = bool(data.get('hit_index'))
+    output_format = params['output_format']
+    mimetype = f'image/{output_format}'
+    if output_format == 'svg':
+        mimetype = 'image/svg+xml'
+    filename = f'nightsky_{params["direction"].lower()}.{output_format}'
+
+    # Optional per-stage profile, returned in response headers; profiled
+    # requests always render
+    requested = data.get('profile')
+    if requested and PROFILING_ENABLED:
+        return _profiled_render(params, want_hits, mimetype, filename,
+                                memory=(requested == 'memory'))
+
+    return _cached_response(
+        data, params, want_hits, lambda p: _render_entry(p, True),
+        lambda entry: _image_response(entry, want_hits, mimetype, filename))
+
+
+@app.route('/api/nightsky/panorama', methods=['POST'])
+def panorama():
+    """
+    Render all eight direction views in one job, as one sprite image.
 
-        # Required parameters
-        lat = data.get('latitude')
-        lon = data.get('longitude')
+    Request JSON: as for /generate, without "direction", plus
+    {
+        "directions": ["N", "NE", ...],  // Optional subset, in sprite order
+        "resolution": 1200                 // Per view (capped at 2400)
+    }
+    Formats: png or jpeg.
 
-        if lat is None or lon is None:
-            return jsonify({'error': 'latitude and longitude are required'}), 400
+    The views share the observer, the geostationary lookup and the styles
+    and are rendered in one render pool job, so the client can flip
+    between directions without another request. Cached like /generate.
 
-        # Validate latitude and longitude
+    Returns: multipart/form-data with a "layout" JSON part,
+    {"width", "height", "views": [{"direction", "x", "y", "width",
+    "height", "hits"?}]}, giving each view's box in the sprite (and its hit
+    index with "hit_index"), and an "image" part holding the sprite.
+    """
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data.get('directions'), (list, type(None))):
+        # A string would be split into letters ("NE" -> N, E)
+        return jsonify({'error': 'directions must be a list of direction codes'}), 400
+    try:
+        params = _parse_generate_request(
+            dict(data, resolution=data.get('resolution', PANORAMA_RESOLUTION)))
+        directions = [str(d).upper() for d in data.get('directions') or CARDINAL_DIRECTIONS]
+    except (ValueError, TypeError) as e:
+        return jsonify({'error': str(e)}), 400
+    unknown = [d for d in directions if d not in CARDINAL_DIRECTIONS]
+    if unknown:
+        return jsonify({
+            'error': f'Invalid directions {unknown}. Must be among: {list(CARDINAL_DIRECTIONS.keys())}'
+        }), 400
+    if params['output_format'] == 'svg':
+        return jsonify({'error': 'Panoramas are rendered as png or jpeg'}), 400
+
+    del params['direction']
+    params['directions'] = list(dict.fromkeys(directions))
+    params['resolution'] = min(params['resolution'], PANORAMA_MAX_RESOLUTION)
+    want_hits = bool(data.get('hit_index'))
+    output_format = params['output_format']
+
+    def respond(entry):
+        layout = entry.hits
+        if not want_hits:
+            views = json.loads(layout)
+            for view in views['views']:
+                view.pop('hits', None)
+            layout = json.dumps(views).encode()
+        return _multipart_response([
+            ('layout', None, 'application/json', layout),
+            ('image', f'nightsky_panorama.{output_format}', f'image/{output_format}',
+             entry.image),
+        ])
+
+    return _cached_response(data, params, want_hits, _panorama_entry, respond)
+
+
+def _cached_response(data, params, variant, render, respond) -> Response:
+    """
+    Serve a render through the render cache, with ETag and Cache-Control.
+
+    Args:
+        data: Request body (an explicit datetime makes the response long-lived)
+        params: Parsed render arguments; quantized here before rendering
+        variant: What distinguishes responses built from the same entry
+            (part of the ETag)
+        render: Quantized params -> RenderEntry, called on a miss
+        respond: RenderEntry -> response
+    """
+    if not render_cache.enabled:
         try:
-            lat = float(lat)
-            lon = float(lon)
-            if not (-90 <= lat <= 90):
-                return jsonify({'error': 'latitude must be between -90 and 90'}), 400
-            if not (-180 <= lon <= 180):
-                return jsonify({'error': 'longitude must be between -180 and 180'}), 400
-        except (TypeError, ValueError):
-            return jsonify({'error': 'latitude and longitude must be numbers'}), 400
-
-        # Direction
-        direction = data.get('direction', 'S').upper()
-        if direction not in CARDINAL_DIRECTIONS:
-            return jsonify({
-                'error': f'Invalid direction. Must be one of: {list(CARDINAL_DIRECTIONS.keys())}'
-            }), 400
-
-        # Parse datetime if provided
-        dt = None
-        if data.get('datetime'):
-            try:
-                dt = datetime.fromisoformat(data['datetime'].replace('Z', '+00:00'))
-            except ValueError:
-                return jsonify({'error': 'Invalid datetime format. Use ISO format.'}), 400
-
-        # Altitude range
-        altitude_range = data.get('altitude_range', [0, 60])
-        if isinstance(altitude_range, list) and len(altitude_range) == 2:
-            altitude_range = tuple(altitude_range)
-        else:
-            altitude_range = (0, 60)
-
-        # Display options
-        show_stars = data.get('show_stars', True)
-        show_planets = data.get('show_planets', True)
-        show_moon = data.get('show_moon', True)
-        show_sun = data.get('show_sun', False)
-        show_constellations = data.get('show_constellations', True)
-        show_constellation_labels = data.get('show_constellation_labels', True)
-        show_constellation_borders = data.get('show_constellation_borders', False)
-        show_milky_way = data.get('show_milky_way', True)
-        show_messier = data.get('show_messier', False)
-        show_dso = data.get('show_dso', False)
-        show_gridlines = data.get('show_gridlines', False)
-        show_ecliptic = data.get('show_ecliptic', False)
-        show_celestial_equator = data.get('show_celestial_equator', False)
-        show_geostationary = data.get('show_geostationary', False)
-        show_horizon = data.get('show_horizon', True)
-
-        # Magnitude limits
-        star_magnitude_limit = float(data.get('star_magnitude_limit', 5.0))
-        star_label_limit = float(data.get('star_label_limit', 2.0))
-        dso_magnitude_limit = float(data.get('dso_magnitude_limit', 10.0))
-
-        # Style settings
-        theme = data.get('theme', 'BLUE_DARK').upper()
-        if theme not in STYLE_THEMES:
-            theme = 'BLUE_DARK'
-
-        gradient = data.get('gradient', 'TRUE_NIGHT')
-        if gradient:
-            gradient = gradient.upper()
-            if gradient not in GRADIENT_BACKGROUNDS:
-                gradient = 'TRUE_NIGHT'
-
-        # Resolution and format
-        resolution = min(int(data.get('resolution', 2400)), 4000)  # Cap at 4000
-        output_format = data.get('format', 'png').lower()
-        if output_format not in ['png', 'svg', 'jpeg', 'jpg']:
-            output_format = 'png'
-        if output_format == 'jpg':
-            output_format = 'jpeg'
-
-        # Generate the image
-        image_data = generate_sky_image(
-            lat=lat,
-            lon=lon,
-            direction=direction,
-            dt=dt,
-            output_format=output_format,
-            altitude_range=altitude_range,
-            show_stars=show_stars,
-            show_planets=show_planets,
-            show_moon=show_moon,
-            show_sun=show_sun,
-            show_constellations=show_constellations,
-            show_constellation_labels=show_constellation_labels,
-            show_constellation_borders=show_constellation_borders,
-            show_milky_way=show_milky_way,
-            show_messier=show_messier,
-            show_dso=show_dso,
-            show_gridlines=show_gridlines,
-            show_ecliptic=show_ecliptic,
-            show_celestial_equator=show_celestial_equator,
-            show_geostationary=show_geostationary,
-            show_horizon=show_horizon,
-            star_magnitude_limit=star_magnitude_limit,
-            star_label_limit=star_label_limit,
-            dso_magnitude_limit=dso_magnitude_limit,
-            theme=theme,
-            gradient=gradient,
-            resolution=resolution,
-        )
-
-        # Return the image
-        mimetype = f'image/{output_format}'
-        if output_format == 'svg':
-            mimetype = 'image/svg+xml'
-
-        return send_file(
-            BytesIO(image_data),
-            mimetype=mimetype,
-            download_name=f'nightsky_{direction.lower()}.{output_format}'
-        )
+            entry = render(params)
+        except Exception as e:
+            return _render_error(e)
+        return respond(entry)
+
+    params = quantize(params)
+    key = render_key(params)
+    etag = make_etag(key, variant)
+    if data.get('datetime'):
+        cache_control = STATIC_CACHE
+    else:
+        # "Now" moves on to a new render at the end of the time bucket
+        cache_control = f'public, max-age={seconds_left(params)}'
+
+    if request.if_none_match.contains(etag):
+        cache_event('http_etag', 'hit')
+        response = make_response('', 304)
+        status = 'revalidated'
+    else:
+        try:
+            entry, status = render_cache.get_or_render(key, lambda: render(params))
+        except Exception as e:
+            return _render_error(e)
+        response = respond(entry)
+
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = cache_control
+    response.headers['X-Render-Cache'] = status
+    return response
+
+
+def _parse_generate_request(data) -> dict:
+    """
+    Validate a /generate request body into generate_sky_image arguments.
+
+    Raises:
+        ValueError: With the message for the 400 response
+    """
+    # Required parameters
+    lat = data.get('latitude')
+    lon = data.get('longitude')
+
+    if lat is None or lon is None:
+        raise ValueError('latitude and longitude are required')
+
+    # Validate latitude and longitude
+    try:
+        lat = float(lat)
+        lon = float(lon)
+    except (TypeError, ValueError):
+        raise ValueError('latitude and longitude must be numbers')
+    if not (-90 <= lat <= 90):
+        raise ValueError('latitude must be between -90 and 90')
+    if not (-180 <= lon <= 180):
+        raise ValueError('longitude must be between -180 and 180')
+
+    # Direction
+    direction = str(data.get('direction', 'S')).upper()
+    if direction not in CARDINAL_DIRECTIONS:
+        raise ValueError(
+            f'Invalid direction. Must be one of: {list(CARDINAL_DIRECTIONS.keys())}')
+
+    # Parse datetime if provided
+    dt = None
+    if data.get('datetime'):
+        try:
+            dt = datetime.fromisoformat(data['datetime'].replace('Z', '+00:00'))
+        except (AttributeError, ValueError):
+            raise ValueError('Invalid datetime format. Use ISO format.')
+
+    # Altitude range
+    altitude_range = data.get('altitude_range', [0, 60])
+    if isinstance(altitude_range, list) and len(altitude_range) == 2:
+        altitude_range = tuple(altitude_range)
+    else:
+        altitude_range = (0, 60)
+
+    params = {
+        'lat': lat,
+        'lon': lon,
+        'direction': direction,
+        'dt': dt,
+        'altitude_range': altitude_range,
+    }
+
+    # Display options
+    for option, default in DISPLAY_OPTIONS.items():
+        params[option] = bool(data.get(option, default))
+
+    # Magnitude limits
+    try:
+        params['star_magnitude_limit'] = float(data.get('star_magnitude_limit', 5.0))
+        params['star_label_limit'] = float(data.get('star_label_limit', 2.0))
+        params['dso_magnitude_limit'] = float(data.get('dso_magnitude_limit', 10.0))
+    except (TypeError, ValueError):
+        raise ValueError('magnitude limits must be numbers')
+
+    # Style settings
+    theme = str(data.get('theme', 'BLUE_DARK')).upper()
+    if theme not in STYLE_THEMES:
+        theme = 'BLUE_DARK'
+    params['theme'] = theme
+
+    gradient = data.get('gradient', 'TRUE_NIGHT')
+    if gradient:
+        gradient = str(gradient).upper()
+        if gradient not in GRADIENT_BACKGROUNDS:
+            gradient = 'TRUE_NIGHT'
+    params['gradient'] = gradient
+
+    # Resolution and format
+    try:
+        params['resolution'] = min(int(data.get('resolution', 2400)), 4000)  # Cap at 4000
+    except (TypeError, ValueError):
+        raise ValueError('resolution must be an integer')
+    output_format = str(data.get('format', 'png')).lower()
+    if output_format not in ['png', 'svg', 'jpeg', 'jpg']:
+        output_format = 'png'
+    if output_format == 'jpg':
+        output_format = 'jpeg'
+    params['output_format'] = output_format
+
+    return params
+
+
+def _render_entry(params, want_hits, profile=None, memory=False) -> RenderEntry:
+    """
+    Render the image (and hit index) for parsed /generate arguments.
+
+    Renders run in the render pool. With a profile, the worker records the
+    stages (and with memory, their peak memory) and they are added to it.
+
+    Raises:
+        PoolSaturated: No render capacity within the queue limits
+    """
+    if profile is None:
+        result = render_pool.render(params, hit_index=want_hits)
+    else:
+        result, stages = render_pool.profiled(params, hit_index=want_hits, memory=memory)
+        profile.stages.extend(stages)
+    if want_hits:
+        image_data, hits = result
+        return RenderEntry(image_data, json.dumps(hits).encode())
+    return RenderEntry(result, None)
+
+
+def _panorama_entry(params) -> RenderEntry:
+    """Render a panorama sprite; the entry's hits hold its layout (with hit indexes)."""
+    sprite, layout = render_pool.panorama(params)
+    return RenderEntry(sprite, json.dumps(layout).encode())
 
+
+def _image_response(entry: RenderEntry, want_hits, mimetype, filename) -> Response:
+    if want_hits:
+        return _multipart_response([
+            ('hits', None, 'application/json', entry.hits or b'null'),
+            ('image', filename, mimetype, entry.image),
+        ])
+    return send_file(BytesIO(entry.image), mimetype=mimetype, download_name=filename)
+
+
+def _profiled_render(params, want_hits, mimetype, filename, memory=False) -> Response:
+    """
+    Render without the cache, reporting stage timings in the headers.
+
+    The total covers admission and the round trip to the worker as well.
+    """
+    profile = RenderProfile().start()
+    try:
+        entry = _render_entry(params, want_hits, profile, memory)
     except Exception as e:
-        print(f"Error generating sky image: {e}")
-        import traceback
-        traceback.print_exc()
-        return jsonify({'error': str(e)}), 500
+        profile.finish()
+        return _render_error(e)
+
+    response = _image_response(entry, want_hits, mimetype, filename)
+    profile.finish()
+    response.headers['Server-Timing'] = profile.server_timing()
+    response.headers['Timing-Allow-Origin'] = '*'
+    response.headers['X-Render-Profile'] = profile.to_json()
+    return response
+
+
+def _render_error(e):
+    if isinstance(e, PoolSaturated):
+        response = jsonify({'error': str(e), 'retry_after': e.retry_after})
+        response.status_code = 503
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response
+    print(f"Error generating sky image: {e}")
+    import traceback
+    traceback.print_exc()
+    return jsonify({'error': str(e)}), 500
+
+
+def _multipart_response(parts) -> Response:
+    """
+    Build a multipart/form-data response.
+
+    Args:
+        parts: (field name, filename or None, content type, bytes) tuples
+    """
+    boundary = uuid.uuid4().hex
+    body = BytesIO()
+    for name, filename, content_type, payload in parts:
+        disposition = f'form-data; name="{name}"'
+        if filename:
+            disposition += f'; filename="{filename}"'
+        body.write(f'--{boundary}\r\nContent-Disposition: {disposition}\r\n'
+                   f'Content-Type: {content_type}\r\n\r\n'.encode())
+        body.write(payload)
+        body.write(b'\r\n')
+    body.write(f'--{boundary}--\r\n'.encode())
+    return Response(body.getvalue(),
+                    mimetype=f'multipart/form-data; boundary={boundary}')
 
 
 @app.route('/api/nightsky/geocode', methods=['GET'])
@@ -272,6 +566,7 @@ def geocode():
 
 
 @app.route('/api/nightsky/options', methods=['GET'])
+@conditional(lambda: query_etag(OPTIONS_VERSION), STATIC_CACHE)
 def options():
     """
     Get available configuration options.
@@ -373,6 +668,7 @@ def location_info():
 
 
 @app.route('/api/nightsky/geostationary', methods=['GET'])
+@conditional(lambda: query_etag(GEO_CATALOG_VERSION), STATIC_CACHE)
 def geostationary():
     """
     Get visible geostationary satellites for a location.
@@ -430,6 +726,7 @@ def geostationary():
 
 
 @app.route('/api/nightsky/geostationary/arc', methods=['GET'])
+@conditional(lambda: query_etag(GEO_CATALOG_VERSION), STATIC_CACHE)
 def geostationary_arc():
     """
     Get the full geostationary arc as seen from observer.
@@ -469,6 +766,7 @@ def geostationary_arc():
 
 
 @app.route('/api/nightsky/geostationary/lookup', methods=['GET'])
+@conditional(lambda: query_etag(GEO_CATALOG_VERSION), STATIC_CACHE)
 def geostationary_lookup():
     """
     Calculate look angles for a specific geostationary satellite longitude.
@@ -498,6 +796,7 @@ def geostationary_lookup():
 
 
 @app.route('/api/nightsky/geostationary/satellites', methods=['GET'])
+@conditional(lambda: query_etag(GEO_CATALOG_VERSION), STATIC_CACHE)
 def list_geo_satellites():
     """
     List all known geostationary satellites.
@@ -537,6 +836,12 @@ def health():
     return jsonify({'status': 'ok', 'service': 'nightsky'})
 
 
+@app.route('/api/nightsky/ready', methods=['GET'])
+def ready():
+    """Readiness check: 200 once warmup has finished, 503 before."""
+    return jsonify(warmup.report()), 200 if warmup.ready else 503
+
+
 if __name__ == '__main__':
     print("=" * 60)
     print("Night Sky Viewer API Server")
@@ -546,6 +851,7 @@ if __name__ == '__main__':
     print()
     print("  Sky Generation:")
     print("    POST /api/nightsky/generate - Generate sky image")
+    print("    POST /api/nightsky/panorama - All directions in one sprite")
     print()
     print("  Location:")
     print("    GET  /api/nightsky/geocode?q=<location> - Geocode location")
@@ -564,6 +870,15 @@ if __name__ == '__main__':
     print("  Configuration:")
     print("    GET  /api/nightsky/options - Available options")
     print("    GET  /api/nightsky/health - Health check")
+    print("    GET  /api/nightsky/ready - Readiness and startup timings")
     print()
     print("=" * 60)
+
+    # Load starplot, styles, ephemeris and timezone data in the background so
+    # the server listens immediately. The reloader's parent process never
+    # serves requests, so skip it there.
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        warmup.add('render_pool', render_pool.start)
+        warmup.start()
+
     app.run(host='0.0.0.0', port=5051, debug=True)
@@ -0,0 +1,16 @@
+"""
+Shared Modules - Make the repository root's shared modules importable
+
+Infrastructure shared with the orbit API (http_cache, metrics, warmup, ...)
+lives in the repository root. Importing this module appends the root to
+sys.path: appended rather than prepended so that sibling modules such as
+this directory's server.py keep precedence.
+"""
+
+import sys
+from pathlib import Path
+
+REPO_ROOT = str(Path(__file__).resolve().parents[2])
+
+if REPO_ROOT not in sys.path:
+    sys.path.append(REPO_ROOT)
@@ -6,50 +6,100 @@ celestial object rendering including stars, planets, deep sky objects,
 coordinate grids, and geostationary satellite overlays.
 """
 
+import json
+import math
 import tempfile
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime
+from functools import wraps
 from io import BytesIO
 from pathlib import Path
-from typing import Optional, Tuple, Dict, Any, List
-
-from starplot import HorizonPlot, Observer, _
-from starplot.styles import PlotStyle, extensions
+from typing import Optional, Tuple, Dict, Any, List, TYPE_CHECKING
 
+import shared_modules  # noqa: F401  (repository root on sys.path)
+from metrics import cache_event, gauge, histogram
 from location_utils import get_zoneinfo, get_azimuth_range, CARDINAL_DIRECTIONS
+from render_profile import RenderProfile, NULL_PROFILE
+
+# starplot (and with it matplotlib) is imported on first use so that the
+# server can start listening before it is loaded
+if TYPE_CHECKING:
+    from starplot import HorizonPlot, Observer
+    from starplot.styles import PlotStyle
 
 
-# Available style themes (Dark themes work best for night sky)
+# Available style themes (Dark themes work best for night sky). Values are
+# attribute names in starplot.styles.extensions.
 STYLE_THEMES = {
     # Dark themes
-    "BLUE_DARK": extensions.BLUE_DARK,
-    "BLUE_NIGHT": extensions.BLUE_NIGHT,
-    "BLUE_MEDIUM": extensions.BLUE_MEDIUM,
-    "BLUE_GOLD": extensions.BLUE_GOLD,
-    "GRAYSCALE_DARK": extensions.GRAYSCALE_DARK,
-    "NORD": extensions.NORD,
+    "BLUE_DARK": "BLUE_DARK",
+    "BLUE_NIGHT": "BLUE_NIGHT",
+    "BLUE_MEDIUM": "BLUE_MEDIUM",
+    "BLUE_GOLD": "BLUE_GOLD",
+    "GRAYSCALE_DARK": "GRAYSCALE_DARK",
+    "NORD": "NORD",
     # Light themes
-    "BLUE_LIGHT": extensions.BLUE_LIGHT,
-    "GRAYSCALE": extensions.GRAYSCALE,
-    "ANTIQUE": extensions.ANTIQUE,
+    "BLUE_LIGHT": "BLUE_LIGHT",
+    "GRAYSCALE": "GRAYSCALE",
+    "ANTIQUE": "ANTIQUE",
 }
 
 # All available gradient backgrounds (9 total)
 GRADIENT_BACKGROUNDS = {
     # Night gradients
-    "TRUE_NIGHT": extensions.GRADIENT_TRUE_NIGHT,
-    "PRE_DAWN": extensions.GRADIENT_PRE_DAWN,
+    "TRUE_NIGHT": "GRADIENT_TRUE_NIGHT",
+    "PRE_DAWN": "GRADIENT_PRE_DAWN",
     # Twilight gradients
-    "ASTRONOMICAL_TWILIGHT": extensions.GRADIENT_ASTRONOMICAL_TWILIGHT,
-    "NAUTICAL_TWILIGHT": extensions.GRADIENT_NAUTICAL_TWILIGHT,
-    "CIVIL_TWILIGHT": extensions.GRADIENT_CIVIL_TWILIGHT,
+    "ASTRONOMICAL_TWILIGHT": "GRADIENT_ASTRONOMICAL_TWILIGHT",
+    "NAUTICAL_TWILIGHT": "GRADIENT_NAUTICAL_TWILIGHT",
+    "CIVIL_TWILIGHT": "GRADIENT_CIVIL_TWILIGHT",
     # Day/Special gradients
-    "DAYLIGHT": extensions.GRADIENT_DAYLIGHT,
-    "BOLD_SUNSET": extensions.GRADIENT_BOLD_SUNSET,
+    "DAYLIGHT": "GRADIENT_DAYLIGHT",
+    "BOLD_SUNSET": "GRADIENT_BOLD_SUNSET",
     # Optic gradients (for telescope views)
-    "OPTIC_FALLOFF": extensions.GRADIENT_OPTIC_FALLOFF,
-    "OPTIC_FALL_IN": extensions.GRADIENT_OPTIC_FALL_IN,
+    "OPTIC_FALLOFF": "GRADIENT_OPTIC_FALLOFF",
+    "OPTIC_FALL_IN": "GRADIENT_OPTIC_FALL_IN",
 }
 
+# Ephemeris and timescale for planet/Moon info, loaded once per process
+_ephemeris = None
+_timescale = None
+
+# Built PlotStyles keyed by (theme, gradient); see create_style
+_styles = {}
+_styles_lock = threading.Lock()
+
+# Static bases of layered renders (a RenderCache), created on first use
+_base_cache = None
+
+# Render metrics
+RENDER_QUEUE = gauge("render_queue_depth", "Sky renders in progress in this process")
+RENDER_QUEUE.set(0)
+RENDER_DURATION = histogram(
+    "render_duration_seconds", "Sky image render time by output format", ["format"],
+    buckets=(0.5, 1, 2.5, 5, 10, 20, 30, 60, 120))
+gauge("cache_entries", "Entries held per cache layer",
+      ["cache"]).set_function(lambda: {("plot_styles",): len(_styles)})
+
+# Image export settings (also used to map objects onto output pixels)
+EXPORT_DPI = 150
+EXPORT_PAD_INCHES = 0.05
+
+# generate_horizon_plot options that shape the static base of a layered
+# render; everything else about a view is drawn over it
+STATIC_OPTIONS = (
+    "altitude_range", "show_stars", "star_magnitude_limit", "star_label_limit",
+    "show_constellations", "show_constellation_labels", "show_constellation_borders",
+    "show_milky_way", "show_messier", "show_dso", "dso_magnitude_limit",
+    "show_horizon", "show_gridlines", "show_ecliptic", "show_celestial_equator",
+    "theme", "gradient", "resolution",
+)
+
+# Formats rendered as base + overlay (SVG stays one vector pass)
+LAYERED_FORMATS = ("png", "jpeg")
+
 # Deep sky object types
 DSO_TYPES = {
     "galaxies": "Galaxy",
@@ -60,11 +110,28 @@ DSO_TYPES = {
 }
 
 
+def get_ephemeris():
+    """
+    Load the DE421 ephemeris and Skyfield timescale (cached per process).
+
+    Returns:
+        Tuple of (ephemeris, timescale)
+    """
+    global _ephemeris, _timescale
+
+    if _ephemeris is None:
+        from skyfield.api import load
+        _timescale = load.timescale()
+        _ephemeris = load('de421.bsp')
+
+    return _ephemeris, _timescale
+
+
 def create_observer(
     lat: float,
     lon: float,
     dt: Optional[datetime] = None
-) -> Observer:
+) -> "Observer":
     """
     Create a starplot Observer for the given location and time.
 
@@ -85,16 +152,21 @@ def create_observer(
         from zoneinfo import ZoneInfo
         dt = dt.replace(tzinfo=ZoneInfo("UTC")).astimezone(tz)
 
+    from starplot import Observer
+
     return Observer(lat=lat, lon=lon, dt=dt)
 
 
 def create_style(
     theme: str = "BLUE_DARK",
     gradient: Optional[str] = "TRUE_NIGHT"
-) -> PlotStyle:
+) -> "PlotStyle":
     """
     Create a PlotStyle with the specified theme and gradient.
 
+    Each theme/gradient combination is built once; callers get a deep copy
+    because starplot adjusts marker styles in place while plotting.
+
     Args:
         theme: Theme name from STYLE_THEMES
         gradient: Optional gradient name from GRADIENT_BACKGROUNDS
@@ -102,22 +174,60 @@ def create_style(
     Returns:
         Configured PlotStyle object
     """
+    # Unknown names are ignored, as if not given
+    theme = theme.upper() if theme.upper() in STYLE_THEMES else None
+    if not gradient or gradient.upper() not in GRADIENT_BACKGROUNDS:
+        gradient = None
+    else:
+        gradient = gradient.upper()
+
+    key = (theme, gradient)
+    style = _styles.get(key)
+    if style is not None:
+        cache_event("plot_styles", "hit")
+    else:
+        cache_event("plot_styles", "miss")
+        style = _build_style(theme, gradient)
+        with _styles_lock:
+            style = _styles.setdefault(key, style)
+
+    return style.model_copy(deep=True)
+
+
+def _build_style(theme: Optional[str], gradient: Optional[str]) -> "PlotStyle":
+    """Build a PlotStyle from normalized theme and gradient names."""
+    from starplot.styles import PlotStyle, extensions
+
     style = PlotStyle()
 
     # Apply theme
-    if theme.upper() in STYLE_THEMES:
-        style = style.extend(STYLE_THEMES[theme.upper()])
+    if theme:
+        style = style.extend(getattr(extensions, STYLE_THEMES[theme]))
 
     # Apply MAP extension for horizon plots
     style = style.extend(extensions.MAP)
 
     # Apply gradient if specified
-    if gradient and gradient.upper() in GRADIENT_BACKGROUNDS:
-        style = style.extend(GRADIENT_BACKGROUNDS[gradient.upper()])
+    if gradient:
+        style = style.extend(getattr(extensions, GRADIENT_BACKGROUNDS[gradient]))
 
     return style
 
 
+def build_styles() -> int:
+    """
+    Build the PlotStyle for every theme/gradient combination ahead of time.
+
+    Returns:
+        Number of styles built
+    """
+    for theme in STYLE_THEMES:
+        for gradient in GRADIENT_BACKGROUNDS:
+            create_style(theme, gradient)
+
+    return len(_styles)
+
+
 def generate_horizon_plot(
     lat: float,
     lon: float,
@@ -153,7 +263,12 @@ def generate_horizon_plot(
     theme: str = "BLUE_DARK",
     gradient: Optional[str] = "TRUE_NIGHT",
     resolution: int = 2400,
-) -> HorizonPlot:
+    profile: Optional[RenderProfile] = None,
+    observer: Optional["Observer"] = None,
+    transform: Optional["ObserverTransform"] = None,
+    static_layers: bool = True,
+    dynamic_layers: bool = True,
+) -> "HorizonPlot":
     """
     Generate a HorizonPlot showing the sky in a given direction.
 
@@ -207,115 +322,157 @@ def generate_horizon_plot(
         theme: Color theme name
         gradient: Gradient background name
         resolution: Image resolution in pixels
+        profile: Optional RenderProfile recording each stage's cost
+        observer: Observer to reuse (built from lat, lon and dt if None)
+        transform: ObserverTransform to reuse for that observer (built
+            and checked for the plot if None; see install_transform)
+        static_layers: Draw the background and the layers fixed to the
+            stars or the horizon (STATIC_OPTIONS)
+        dynamic_layers: Draw the Sun, Moon, planets and satellite markers;
+            without static_layers they go on a transparent figure
 
     Returns:
         Configured HorizonPlot object (not yet exported)
     """
+    from starplot import HorizonPlot, _
+
+    profile = profile or NULL_PROFILE
+
+    # Layers left to the other pass of a layered render
+    if not static_layers:
+        show_stars = show_constellations = show_constellation_labels = False
+        show_constellation_borders = show_milky_way = show_messier = show_dso = False
+        show_horizon = show_gridlines = show_ecliptic = show_celestial_equator = False
+    if not dynamic_layers:
+        show_planets = show_moon = show_sun = show_geostationary = False
+
     # Create observer
-    observer = create_observer(lat, lon, dt)
+    if observer is None:
+        with profile.stage("observer"):
+            observer = create_observer(lat, lon, dt)
 
     # Get azimuth range for direction
     azimuth_range = get_azimuth_range(direction)
 
     # Create style
-    style = create_style(theme, gradient)
+    with profile.stage("style"):
+        style = create_style(theme, gradient)
 
     # Create the plot
-    p = HorizonPlot(
-        altitude=altitude_range,
-        azimuth=azimuth_range,
-        observer=observer,
-        style=style,
-        resolution=resolution,
-        scale=0.9,
-    )
+    with profile.stage("plot_init"):
+        p = HorizonPlot(
+            altitude=altitude_range,
+            azimuth=azimuth_range,
+            observer=observer,
+            style=style,
+            resolution=resolution,
+            scale=0.9,
+        )
+        # Point-by-point coordinate conversions (labels, polygons) without
+        # a skyfield call each, where the transform checks out
+        p.transform = install_transform(p, transform)
+        if not static_layers:
+            _clear_background(p)
 
     # Add celestial objects in order (back to front for proper layering)
 
     # 1. Background elements first
     if show_milky_way:
-        p.milky_way()
+        with profile.stage("milky_way"):
+            p.milky_way()
 
     # 2. Reference lines (behind stars)
     if show_celestial_equator:
-        try:
-            p.celestial_equator()
-        except Exception:
-            pass
+        with profile.stage("celestial_equator"):
+            try:
+                p.celestial_equator()
+            except Exception:
+                pass
 
     if show_ecliptic:
-        try:
-            p.ecliptic()
-        except Exception:
-            pass
+        with profile.stage("ecliptic"):
+            try:
+                p.ecliptic()
+            except Exception:
+                pass
 
     if show_gridlines:
-        try:
-            p.gridlines()
-        except Exception:
-            pass
+        with profile.stage("gridlines"):
+            try:
+                p.gridlines()
+            except Exception:
+                pass
 
     # 3. Constellation elements
     if show_constellation_borders:
-        try:
-            p.constellation_borders()
-        except Exception:
-            pass
+        with profile.stage("constellation_borders"):
+            try:
+                p.constellation_borders()
+            except Exception:
+                pass
 
     if show_constellations:
-        p.constellations()
+        with profile.stage("constellations"):
+            p.constellations()
 
     # 4. Stars
     if show_stars:
-        p.stars(
-            where=[_.magnitude < star_magnitude_limit],
-            where_labels=[_.magnitude < star_label_limit],
-        )
+        with profile.stage("stars"):
+            p.stars(
+                where=[_.magnitude < star_magnitude_limit],
+                where_labels=[_.magnitude < star_label_limit],
+            )
 
     # 5. Deep sky objects
     if show_messier:
-        try:
-            p.messier(
-                where=[_.magnitude < dso_magnitude_limit],
-                where_true_size=[False],
-            )
-        except Exception:
-            pass
+        with profile.stage("messier"):
+            try:
+                p.messier(
+                    where=[_.magnitude < dso_magnitude_limit],
+                    where_true_size=[False],
+                )
+            except Exception:
+                pass
 
     if show_dso and not show_messier:
         # Full DSO catalog (NGC/IC) - more comprehensive than just Messier
-        try:
-            p.dsos(
-                where=[_.magnitude < dso_magnitude_limit],
-                where_true_size=[False],
-            )
-        except Exception:
-            pass
+        with profile.stage("dsos"):
+            try:
+                p.dsos(
+                    where=[_.magnitude < dso_magnitude_limit],
+                    where_true_size=[False],
+                )
+            except Exception:
+                pass
 
     # 6. Solar system objects (on top)
     if show_planets:
-        try:
-            p.planets()
-        except Exception:
-            pass
+        with profile.stage("planets"):
+            try:
+                p.planets()
+            except Exception:
+                pass
 
     if show_moon:
-        try:
-            p.moon()
-        except Exception:
-            # Moon might not be visible or above horizon
-            pass
+        with profile.stage("moon"):
+            try:
+                p.moon()
+            except Exception:
+                # Moon might not be visible or above horizon
+                pass
 
     if show_sun:
-        try:
-            p.sun()
-        except Exception:
-            # Sun usually below horizon at night
-            pass
+        with profile.stage("sun"):
+            try:
+                p.sun()
+            except Exception:
+                # Sun usually below horizon at night
+                pass
 
     # 7. Labels (on top of objects)
     if show_constellation_labels:
-        p.constellation_labels()
+        with profile.stage("constellation_labels"):
+            p.constellation_labels()
 
     # 8. Horizon line (foreground)
     if show_horizon:
@@ -335,21 +492,174 @@ def generate_horizon_plot(
             elif az_min <= az <= az_max:
                 visible_labels[az] = d
 
-        p.horizon(labels=visible_labels)
+        with profile.stage("horizon"):
+            p.horizon(labels=visible_labels)
 
-    # 9. Geostationary satellites overlay
+    # 9. Geostationary satellites overlay (markers drawn are kept for the hit index)
+    p.geo_markers = []
     if show_geostationary and geo_satellites:
-        _overlay_geostationary_satellites(p, geo_satellites, azimuth_range, altitude_range)
+        with profile.stage("geostationary"):
+            p.geo_markers = _overlay_geostationary_satellites(
+                p, geo_satellites, azimuth_range, altitude_range)
 
     return p
 
 
+def _clear_background(plot: "HorizonPlot"):
+    """Make a plot's figure, axes and gradient background transparent."""
+    plot.fig.set_facecolor("none")
+    plot.ax.set_facecolor("none")
+    plot._background_clip_path.set_facecolor("none")
+    background = getattr(plot, "_background_ax", None)
+    if background is not None:
+        background.set_visible(False)
+
+
+# starplot releases whose HorizonPlot._prepare_coords(ra, dec) -> (az, alt)
+# ObserverTransform was checked against; others keep the stock method
+TRANSFORM_STARPLOT_VERSIONS = ("0.17",)
+
+# Largest disagreement with skyfield allowed at ObserverTransform.CHECK_POINTS
+TRANSFORM_TOLERANCE_ARCSEC = 1.0
+
+_transform_warned = False
+
+
+def _transform_supported() -> bool:
+    from importlib.metadata import PackageNotFoundError, version
+
+    try:
+        release = version("starplot")
+    except PackageNotFoundError:
+        return False
+    return any(release == v or release.startswith(v + ".") for v in TRANSFORM_STARPLOT_VERSIONS)
+
+
+def install_transform(plot: "HorizonPlot",
+                      transform: Optional["ObserverTransform"] = None) -> Optional["ObserverTransform"]:
+    """
+    Put an ObserverTransform in place of plot._prepare_coords if it is safe.
+
+    It replaces a private starplot method and reads skyfield internals, so
+    it is only used with a starplot release in TRANSFORM_STARPLOT_VERSIONS,
+    and a new transform must agree with skyfield's
+    observe().apparent().altaz() at CHECK_POINTS. Otherwise the plot keeps
+    starplot's own (slower) conversion.
+
+    Args:
+        plot: Freshly created HorizonPlot
+        transform: Transform already checked for the same observer and time
+
+    Returns:
+        The transform installed, or None if the stock method is kept
+    """
+    global _transform_warned
+
+    if transform is None and _transform_supported():
+        try:
+            transform = ObserverTransform(plot)
+            error = transform.check(plot)
+            if error > TRANSFORM_TOLERANCE_ARCSEC:
+                raise ValueError(f'off by {error:.2f}" from skyfield')
+        except Exception as e:
+            if not _transform_warned:
+                print(f"Observer transform disabled, using starplot's conversion: {e}")
+                _transform_warned = True
+            transform = None
+
+    if transform is not None:
+        plot._prepare_coords = transform
+    return transform
+
+
+class ObserverTransform:
+    """
+    RA/Dec -> apparent (az, alt) in degrees for one observer and time.
+
+    Stands in for HorizonPlot._prepare_coords, which runs a full skyfield
+    observe().apparent() per point (about 1.4 ms). Label placement and the
+    polygon layers (Milky Way, constellation borders) convert thousands of
+    points one at a time, which made them the slowest stages of a render.
+    Here the observer's velocity (for aberration, with skyfield's formula)
+    and horizon rotation are computed once, and a point costs a few float
+    operations. Gravitational deflection is left out; positions stay within
+    about 0.25" of skyfield's. Stars are still converted by starplot,
+    vectorized.
+
+    One instance serves every plot of the same observer and time. Use it
+    through install_transform, which checks it first.
+    """
+
+    # (RA, Dec) in degrees spread over the sky, including near the pole
+    CHECK_POINTS = ((0.0, 0.0), (83.8, -5.4), (201.3, -11.2), (279.2, 38.8),
+                    (152.1, 12.0), (37.9, 89.3), (95.99, -52.7))
+
+    def __init__(self, plot: "HorizonPlot"):
+        from skyfield.constants import C_AUDAY
+
+        position = plot.location.at(plot.observer.timescale)
+        self.velocity = tuple(float(v) for v in position.velocity.au_per_d)
+        self.rotation = tuple(tuple(float(v) for v in row) for row in position._altaz_rotation)
+        self.speed = math.sqrt(sum(v * v for v in self.velocity))
+        beta = self.speed / C_AUDAY
+        self.gammai = math.sqrt(1.0 - beta * beta)
+        self.beta = beta
+        self.light_time = 1.0 / C_AUDAY  # Of a unit vector; only the direction matters
+
+    def __call__(self, ra: float, dec: float) -> Tuple[float, float]:
+        if ra > 360:
+            ra -= 360
+        if ra < 0:
+            ra += 360
+        ra = math.radians(ra)
+        dec = math.radians(dec)
+        x = math.cos(dec) * math.cos(ra)
+        y = math.cos(dec) * math.sin(ra)
+        z = math.sin(dec)
+
+        # Aberration (skyfield.relativity.add_aberration on a unit vector)
+        vx, vy, vz = self.velocity
+        p = self.beta * (x * vx + y * vy + z * vz) / self.speed
+        q = (1.0 + p / (1.0 + self.gammai)) * self.light_time
+        x, y, z = x * self.gammai + q * vx, y * self.gammai + q * vy, z * self.gammai + q * vz
+
+        (r00, r01, r02), (r10, r11, r12), (r20, r21, r22) = self.rotation
+        north = r00 * x + r01 * y + r02 * z
+        east = r10 * x + r11 * y + r12 * z
+        up = r20 * x + r21 * y + r22 * z
+        alt = math.degrees(math.atan2(up, math.hypot(north, east)))
+        az = math.degrees(math.atan2(east, north)) % 360.0
+        return az, alt
+
+    def check(self, plot: "HorizonPlot") -> float:
+        """
+        Largest separation, in arcseconds, from skyfield's apparent alt/az
+        for plot's observer at CHECK_POINTS.
+        """
+        import numpy as np
+        from skyfield.api import Star as SkyfieldStar
+
+        ra = np.array([p[0] for p in self.CHECK_POINTS])
+        dec = np.array([p[1] for p in self.CHECK_POINTS])
+        alt, az, _ = plot.observe(SkyfieldStar(ra_hours=ra / 15, dec_degrees=dec)).apparent().altaz()
+
+        worst = 0.0
+        for i, (r, d) in enumerate(self.CHECK_POINTS):
+            az1, alt1 = (math.radians(v) for v in self(r, d))
+            az2, alt2 = math.radians(az.degrees[i]), math.radians(alt.degrees[i])
+            # Haversine separation
+            h = (math.sin((alt2 - alt1) / 2) ** 2
+                 + math.cos(alt1) * math.cos(alt2) * math.sin((az2 - az1) / 2) ** 2)
+            worst = max(worst, math.degrees(2 * math.asin(min(1.0, math.sqrt(h)))) * 3600)
+        return worst
+
+
 def _overlay_geostationary_satellites(
-    plot: HorizonPlot,
+    plot: "HorizonPlot",
     satellites: List[Dict[str, Any]],
     azimuth_range: Tuple[float, float],
     altitude_range: Tuple[float, float]
-) -> None:
+) -> List[Dict[str, Any]]:
     """
     Overlay geostationary satellite markers on the plot.
 
@@ -360,9 +670,13 @@ def _overlay_geostationary_satellites(
         satellites: List of satellite dicts with 'name', 'azimuth', 'elevation'
         azimuth_range: Current plot azimuth range
         altitude_range: Current plot altitude range
+
+    Returns:
+        The satellites whose markers were drawn
     """
     az_min, az_max = azimuth_range
     alt_min, alt_max = altitude_range
+    drawn = []
 
     for sat in satellites:
         az = sat.get("azimuth")
@@ -395,18 +709,39 @@ def _overlay_geostationary_satellites(
                     style__marker__size=6,
                     style__label__font_size=8,
                 )
+                drawn.append(sat)
             except Exception as e:
                 print(f"Error adding satellite marker for {name}: {e}")
 
+    return drawn
+
+
+def _track_render(func):
+    """Count renders in flight and observe their duration."""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        RENDER_QUEUE.inc()
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            RENDER_QUEUE.dec()
+            RENDER_DURATION.observe(time.perf_counter() - start,
+                                    format=kwargs.get("output_format", "png"))
+    return wrapper
+
 
+@_track_render
 def generate_sky_image(
     lat: float,
     lon: float,
     direction: str = "S",
     dt: Optional[datetime] = None,
     output_format: str = "png",
+    profile: Optional[RenderProfile] = None,
+    hit_index: bool = False,
     **kwargs
-) -> bytes:
+):
     """
     Generate a sky image and return as bytes.
 
@@ -416,48 +751,280 @@ def generate_sky_image(
         direction: Cardinal direction
         dt: Observation datetime
         output_format: Image format (png, svg, jpeg)
+        profile: Optional RenderProfile; savefig is split into draw,
+            tight_bbox and encode stages. A profiled render draws every
+            layer in one pass, without the static base cache, so each
+            layer's cost is measured
+        hit_index: Also return the image positions of the drawn objects
+            (see hit_index.py)
         **kwargs: Additional arguments passed to generate_horizon_plot
 
     Returns:
-        Image data as bytes
+        Image data as bytes, or (image data, hit index) with hit_index;
+        the index is None if the image had to be exported another way
     """
-    # Handle geostationary satellites if requested
-    if kwargs.get('show_geostationary') and not kwargs.get('geo_satellites'):
-        # Fetch visible geostationary satellites
+    layered = profile is None and output_format in LAYERED_FORMATS
+    profile = profile or NULL_PROFILE
+    _lookup_geo_satellites(lat, lon, kwargs, profile)
+
+    image_data = None
+    if layered and _get_base_cache().enabled:
         try:
-            from geostationary_utils import get_visible_geo_satellites
-            kwargs['geo_satellites'] = get_visible_geo_satellites(lat, lon)
+            image_data, index = _render_layered(lat, lon, direction, dt, output_format,
+                                                hit_index, profile, kwargs)
         except Exception as e:
-            print(f"Error fetching geostationary satellites: {e}")
-            kwargs['geo_satellites'] = []
+            print(f"Layered render failed, rendering in one pass: {e}")
+
+    if image_data is None:
+        # Generate the plot
+        p = generate_horizon_plot(lat, lon, direction, dt, profile=profile, **kwargs)
+        image_data, index = _export_plot(p, output_format, hit_index, profile)
+
+    if hit_index:
+        return image_data, index
+    return image_data
+
+
+@_track_render
+def generate_panorama(
+    lat: float,
+    lon: float,
+    dt: Optional[datetime] = None,
+    directions: Optional[List[str]] = None,
+    output_format: str = "png",
+    profile: Optional[RenderProfile] = None,
+    hit_index: bool = False,
+    **kwargs
+) -> Tuple[bytes, Dict[str, Any]]:
+    """
+    Render several direction views in one job, packed side by side in one image.
+
+    A HorizonPlot spans at most 180 degrees of azimuth, so the panorama is
+    the eight direction views (90 degrees each, overlapping by 45) rather
+    than one 360 degree strip. The views share the observer, its
+    ObserverTransform, the geostationary lookup and the styles, and are
+    rendered one after another so that only one figure is held at a time.
+
+    Args:
+        lat: Observer latitude
+        lon: Observer longitude
+        dt: Observation datetime
+        directions: Direction codes in sprite order (default: all eight,
+            clockwise from N)
+        output_format: Sprite format (png or jpeg)
+        profile: Optional RenderProfile; stages repeat once per view
+        hit_index: Also build each view's hit index
+        **kwargs: Additional arguments passed to generate_horizon_plot
+
+    Returns:
+        (sprite image bytes, layout): the layout gives the sprite size and,
+        per view, its direction and box (x, y, width, height) in the
+        sprite, plus its hit index (in view pixels) with hit_index
+    """
+    from PIL import Image
+
+    profile = profile or NULL_PROFILE
+    directions = directions or list(CARDINAL_DIRECTIONS)
+    _lookup_geo_satellites(lat, lon, kwargs, profile)
+
+    with profile.stage("observer"):
+        observer = create_observer(lat, lon, dt)
+
+    tiles = []
+    transform = None
+    for direction in directions:
+        p = generate_horizon_plot(lat, lon, direction, dt, profile=profile,
+                                  observer=observer, transform=transform, **kwargs)
+        transform = p.transform
+        # Views are encoded losslessly and re-encoded once as the sprite
+        image_data, index = _export_plot(p, "png", hit_index, profile)
+        tiles.append((direction, Image.open(BytesIO(image_data)), index))
+
+    with profile.stage("sprite"):
+        width = sum(image.width for _, image, _ in tiles)
+        height = max(image.height for _, image, _ in tiles)
+        mode = "RGB" if output_format == "jpeg" else "RGBA"
+        sprite = Image.new(mode, (width, height))
+        views = []
+        x = 0
+        for direction, image, index in tiles:
+            sprite.paste(image.convert(mode), (x, 0))
+            view = {"direction": direction, "x": x, "y": 0,
+                    "width": image.width, "height": image.height}
+            if hit_index:
+                view["hits"] = index
+            views.append(view)
+            x += image.width
+
+        buffer = BytesIO()
+        if output_format == "jpeg":
+            sprite.save(buffer, "JPEG", quality=90)
+        else:
+            sprite.save(buffer, "PNG")
+
+    return buffer.getvalue(), {"width": width, "height": height, "views": views}
 
-    # Generate the plot
-    p = generate_horizon_plot(lat, lon, direction, dt, **kwargs)
 
+def _get_base_cache():
+    """The static base cache of this process (see render_cache.py)."""
+    global _base_cache
+
+    if _base_cache is None:
+        from render_cache import BASE_DISK_MB, BASE_MEMORY_MB, RenderCache, default_directory
+        _base_cache = RenderCache(default_directory() / "bases", BASE_MEMORY_MB,
+                                  BASE_DISK_MB, name="render_bases")
+
+    return _base_cache
+
+
+def _render_layered(lat: float, lon: float, direction: str, dt: Optional[datetime],
+                    output_format: str, hit_index: bool, profile: RenderProfile,
+                    kwargs: Dict[str, Any]) -> Tuple[bytes, Optional[Dict[str, Any]]]:
+    """
+    Render a view as a cached static base with the moving bodies drawn over it.
+
+    Everything in STATIC_OPTIONS turns with the stars or stays with the
+    horizon, so it depends on latitude and local sidereal time, not on
+    longitude and time apart. The base holds those layers, drawn at the
+    longitude where the observer's sidereal time, snapped to
+    RENDER_LST_STEP, holds at dt (render_cache.sidereal_quantize). It is
+    cached by sidereal time, latitude, direction and the static options.
+    The Sun, Moon, planets and satellite markers are drawn for the same
+    observer on a transparent figure, saved over the base's exact region
+    and alpha-composited. Their labels do not make way for the base's
+    labels as they would in one pass.
+
+    Returns:
+        (image data, hit index or None)
+    """
+    from matplotlib.transforms import Bbox
+    from PIL import Image
+    from hit_index import merge_hit_indexes
+    from render_cache import RenderEntry, base_epoch, render_key, sidereal_quantize
+
+    with profile.stage("observer"):
+        observer = create_observer(lat, lon, dt)
+        lst, base_lon = sidereal_quantize(lon, observer.dt)
+        observer = create_observer(lat, base_lon, observer.dt)
+
+    static = {name: kwargs[name] for name in STATIC_OPTIONS if name in kwargs}
+    key = render_key({"lst": lst, "lat": lat, "direction": direction.upper(),
+                      "epoch": base_epoch(observer.dt), **static})
+
+    def render_base():
+        p = generate_horizon_plot(lat, base_lon, direction, profile=profile,
+                                  observer=observer, dynamic_layers=False, **kwargs)
+        # Lossless, and indexed whether or not this request wants hits
+        image_data, index = _export_plot(p, "png", True, profile)
+        if p.export_bbox is None:
+            raise RuntimeError("static base could not be saved directly")
+        layout = {"bbox": p.export_bbox.bounds, "hits": index}
+        return RenderEntry(image_data, json.dumps(layout).encode())
+
+    entry, _ = _get_base_cache().get_or_render(key, render_base)
+    layout = json.loads(entry.hits)
+
+    p = generate_horizon_plot(lat, base_lon, direction, profile=profile,
+                              observer=observer, static_layers=False, **kwargs)
+    overlay, overlay_index = _export_plot(p, "png", hit_index, profile,
+                                          bbox=Bbox.from_bounds(*layout["bbox"]))
+
+    with profile.stage("composite"):
+        base = Image.open(BytesIO(entry.image)).convert("RGBA")
+        layer = Image.open(BytesIO(overlay)).convert("RGBA")
+        if layer.size != base.size:
+            raise ValueError(f"overlay is {layer.size}, base is {base.size}")
+        image = Image.alpha_composite(base, layer)
+
+        buffer = BytesIO()
+        if output_format == "jpeg":
+            image.convert("RGB").save(buffer, "JPEG", quality=90)
+        else:
+            image.save(buffer, "PNG")
+
+    index = None
+    if hit_index and layout["hits"] is not None and overlay_index is not None:
+        index = merge_hit_indexes(layout["hits"], overlay_index)
+    return buffer.getvalue(), index
+
+
+def _lookup_geo_satellites(lat: float, lon: float, kwargs: Dict[str, Any],
+                           profile: RenderProfile):
+    """Fill kwargs['geo_satellites'] when geostationary markers are requested."""
+    if kwargs.get('show_geostationary') and not kwargs.get('geo_satellites'):
+        # Fetch visible geostationary satellites
+        with profile.stage("geo_lookup"):
+            try:
+                from geostationary_utils import get_visible_geo_satellites
+                kwargs['geo_satellites'] = get_visible_geo_satellites(lat, lon)
+            except Exception as e:
+                print(f"Error fetching geostationary satellites: {e}")
+                kwargs['geo_satellites'] = []
+
+
+def _export_plot(p: "HorizonPlot", output_format: str, hit_index: bool,
+                 profile: RenderProfile,
+                 bbox=None) -> Tuple[bytes, Optional[Dict[str, Any]]]:
+    """
+    Encode a plot and close its figure.
+
+    The region saved, in inches, is left in p.export_bbox (None if the
+    figure could not be saved directly).
+
+    Args:
+        bbox: Region to save, in inches (default: the tight bounding box,
+            padded); there is no fallback export for a given region
+
+    Returns:
+        (image data, hit index); the index is None unless hit_index was
+        requested, the figure could be saved directly and the index could
+        be built
+    """
     # Export to bytes using underlying matplotlib figure
     buffer = BytesIO()
+    index = None
+    p.export_bbox = None
 
     try:
         # Try to use the underlying figure directly
-        p.fig.savefig(
-            buffer,
-            format=output_format,
-            bbox_inches='tight',
-            pad_inches=0.05,
-            facecolor=p.fig.get_facecolor(),
-            edgecolor='none',
-            dpi=150,
-        )
+        with _timed_savefig(p.fig, profile), _saved_bbox(p.fig) as saved:
+            p.fig.savefig(
+                buffer,
+                format=output_format,
+                bbox_inches='tight' if bbox is None else bbox,
+                pad_inches=EXPORT_PAD_INCHES,
+                facecolor=p.fig.get_facecolor(),
+                edgecolor='none',
+                dpi=EXPORT_DPI,
+            )
         buffer.seek(0)
         image_data = buffer.read()
+        if bbox is not None:
+            p.export_bbox = bbox
+        elif saved:
+            p.export_bbox = saved[-1].padded(EXPORT_PAD_INCHES)
+
+        if hit_index and p.export_bbox is not None:
+            from hit_index import build_hit_index
+            with profile.stage("hit_index"):
+                # SVG coordinates are in points
+                scale = 72 if output_format == "svg" else EXPORT_DPI
+                try:
+                    index = build_hit_index(p, p.export_bbox, scale, p.geo_markers)
+                except Exception as e:
+                    # It reads starplot internals; the image stands on its own
+                    print(f"Hit index failed, returning the image without it: {e}")
 
     except Exception as e:
+        if bbox is not None:
+            raise
         print(f"Direct export failed, using temp file: {e}")
         # Fallback: use temp file
         with tempfile.NamedTemporaryFile(suffix=f'.{output_format}', delete=False) as f:
             temp_path = f.name
 
-        p.export(temp_path, padding=0.05)
+        with profile.stage("export"):
+            p.export(temp_path, padding=EXPORT_PAD_INCHES)
         with open(temp_path, 'rb') as f:
             image_data = f.read()
 
@@ -471,7 +1038,72 @@ def generate_sky_image(
         except Exception:
             pass
 
-    return image_data
+    return image_data, index
+
+
+@contextmanager
+def _saved_bbox(fig):
+    """
+    Record the tight bounding boxes savefig computes on this figure.
+
+    Yields a list that receives each get_tightbbox result (in inches); the
+    last one, padded by pad_inches, is the region written to the file.
+    """
+    previous = fig.__dict__.get("get_tightbbox")
+    method = fig.get_tightbbox
+    boxes = []
+
+    def recording(*args, **kwargs):
+        bbox = method(*args, **kwargs)
+        boxes.append(bbox)
+        return bbox
+
+    fig.get_tightbbox = recording
+    try:
+        yield boxes
+    finally:
+        if previous is None:
+            del fig.get_tightbbox
+        else:
+            fig.get_tightbbox = previous
+
+
+@contextmanager
+def _timed_savefig(fig, profile):
+    """
+    Split a savefig call into draw, tight_bbox and encode stages.
+
+    Figure.draw and Figure.get_tightbbox are wrapped on this figure instance
+    only (matplotlib looks both up through the instance), so the export
+    itself is unchanged; encode is whatever savefig spends outside them.
+    """
+    if profile is NULL_PROFILE:
+        yield
+        return
+
+    spent = {"draw": 0.0, "tight_bbox": 0.0}
+
+    def timed(name, method):
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                spent[name] += time.perf_counter() - start
+        return wrapper
+
+    fig.draw = timed("draw", fig.draw)
+    fig.get_tightbbox = timed("tight_bbox", fig.get_tightbbox)
+    start = time.perf_counter()
+    try:
+        with profile.stage("savefig"):
+            yield
+    finally:
+        total = time.perf_counter() - start
+        del fig.draw, fig.get_tightbbox
+        profile.add("draw", spent["draw"])
+        profile.add("tight_bbox", spent["tight_bbox"])
+        profile.add("encode", max(total - spent["draw"] - spent["tight_bbox"], 0.0))
 
 
 def get_visible_planets(
@@ -493,11 +1125,10 @@ def get_visible_planets(
         Dictionary with planet visibility information
     """
     try:
-        from skyfield.api import load, wgs84
+        from skyfield.api import wgs84
 
         # Load ephemeris data
-        eph = load('de421.bsp')
-        ts = load.timescale()
+        eph, ts = get_ephemeris()
 
         observer_obj = create_observer(lat, lon, dt)
 
@@ -572,11 +1203,10 @@ def get_moon_info(
         Dictionary with Moon phase and position
     """
     try:
-        from skyfield.api import load, wgs84
+        from skyfield.api import wgs84
         from skyfield import almanac
 
-        eph = load('de421.bsp')
-        ts = load.timescale()
+        eph, ts = get_ephemeris()
 
         observer_obj = create_observer(lat, lon, dt)
 
@@ -0,0 +1,21 @@
+"""
+WSGI entry point for serving the Night Sky API with multiple worker processes.
+
+    cd nightsky/backend
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+With preload_app enabled (see gunicorn.conf.py) this module is imported
+once in the master and runs the warmup to completion: starplot, the
+prebuilt PlotStyles, the in-memory TimezoneFinder and the ephemeris are
+loaded before the workers fork and are shared copy-on-write.
+"""
+
+import gc
+
+from server import app, preload
+
+preload()
+
+# Move everything loaded so far out of the collector's generations so that
+# garbage collection in the workers does not touch (and copy) those pages
+gc.freeze()
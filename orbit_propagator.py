@@ -6,11 +6,13 @@ satellite orbits from TLE data.
 """
 
 from datetime import datetime, timezone, timedelta
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Iterator
 import math
 
+import numpy as np
 from sgp4.api import Satrec, jday
-from coordinate_transforms import teme_to_geodetic, julian_date
+from coordinate_transforms import teme_to_geodetic, teme_to_geodetic_batch, julian_date
+from tracing import traced
 
 
 class OrbitPropagator:
@@ -59,6 +61,7 @@ class OrbitPropagator:
 
         return epoch
 
+    @traced("propagate")
     def propagate(self, dt: datetime) -> Optional[Dict]:
         """
         Propagate satellite to given datetime.
@@ -90,6 +93,7 @@ class OrbitPropagator:
         """Get current satellite position."""
         return self.propagate(datetime.now(timezone.utc))
 
+    @traced("generate_track")
     def generate_track(self, start: datetime, end: datetime,
                        step_seconds: int = 60) -> List[Dict]:
         """
@@ -130,6 +134,54 @@ class OrbitPropagator:
         end = now + timedelta(minutes=duration_minutes)
         return self.generate_track(now, end, step_seconds)
 
+    @traced("propagate_batch")
+    def propagate_batch(self, start: datetime, step_seconds: float,
+                        count: int) -> Dict[str, np.ndarray]:
+        """
+        Propagate to count evenly spaced times in one vectorized pass.
+
+        Args:
+            start: First datetime (UTC)
+            step_seconds: Seconds between samples
+            count: Number of samples
+
+        Returns:
+            Dict of (N,) arrays for the samples that propagated without
+            error: offset_seconds (from start), latitude, longitude,
+            altitude_km, velocity_km_s
+        """
+        jd0, fr0 = jday(start.year, start.month, start.day, start.hour,
+                        start.minute, start.second + start.microsecond / 1e6)
+
+        offsets = np.arange(count, dtype=float) * step_seconds
+        jd = np.full(count, jd0)
+        fr = fr0 + offsets / 86400.0
+
+        errors, r_teme, v_teme = self.satellite.sgp4_array(jd, fr)
+        ok = errors == 0
+
+        result = teme_to_geodetic_batch(r_teme[ok], v_teme[ok], jd[ok], fr[ok])
+        result["offset_seconds"] = offsets[ok]
+
+        return result
+
+    def iter_track(self, start: datetime, end: datetime, step_seconds: float = 60,
+                   chunk_size: int = 1440) -> Iterator[Dict[str, np.ndarray]]:
+        """
+        Yield a ground track as propagate_batch chunks of at most chunk_size
+        points, so arbitrarily long windows use constant memory.
+
+        offset_seconds in each chunk is relative to start.
+        """
+        total = int((end - start).total_seconds() // step_seconds) + 1
+
+        for first in range(0, max(total, 0), chunk_size):
+            count = min(chunk_size, total - first)
+            chunk_start = start + timedelta(seconds=first * step_seconds)
+            chunk = self.propagate_batch(chunk_start, step_seconds, count)
+            chunk["offset_seconds"] += first * step_seconds
+            yield chunk
+
     def get_orbit_info(self) -> Dict:
         """Get orbital parameters and metadata."""
         now = datetime.now(timezone.utc)
@@ -0,0 +1,309 @@
+"""
+Resolver Cache - Persistent SIMBAD name-resolution cache
+
+Sits in front of the SIMBAD name resolver. Results are stored in a SQLite
+file shared by all worker processes and kept across restarts:
+
+    entries   one row per object (keyed by its normalized main identifier),
+              holding the resolution result and its expiry
+    aliases   normalized name -> entry, for the name asked for and every
+              identifier SIMBAD returned, so "M31", "M  31", "NGC 224" and
+              "Andromeda Galaxy" all hit the same entry
+
+Names SIMBAD does not know are cached too ("not found"), with a shorter
+lifetime, so misspellings are not re-queried on every keystroke. Failed
+calls (timeouts, HTTP errors) are never cached.
+
+prewarm() fills the cache with the Messier and Caldwell objects from
+nightsky/frontend/data:
+
+    python -m resolver_cache --prewarm
+
+Environment variables:
+    SIMBAD_NAME_CACHE              SQLite file (default: names.sqlite3 in
+                                   ORBIT_STATE_DIR)
+    SIMBAD_NAME_TTL_DAYS           Lifetime of resolved names (default 30)
+    SIMBAD_NAME_NEGATIVE_TTL_HOURS Lifetime of "not found" answers (default 6)
+"""
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+from metrics import cache_event
+from state_store import DEFAULT_STATE_DIR
+
+NAME_TTL_DAYS = float(os.environ.get("SIMBAD_NAME_TTL_DAYS", 30))
+NEGATIVE_TTL_HOURS = float(os.environ.get("SIMBAD_NAME_NEGATIVE_TTL_HOURS", 6))
+
+CATALOG_DIR = Path(__file__).resolve().parent / "nightsky" / "frontend" / "data"
+CATALOG_FILES = ("messier.json", "caldwell.json")
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS entries (
+        entry TEXT PRIMARY KEY,
+        result TEXT NOT NULL,
+        found INTEGER NOT NULL,
+        expires_at REAL NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS aliases (
+        alias TEXT PRIMARY KEY,
+        entry TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS aliases_entry ON aliases (entry);
+"""
+
+
+def default_path() -> Path:
+    """SIMBAD_NAME_CACHE, or names.sqlite3 in the state directory."""
+    path = os.environ.get("SIMBAD_NAME_CACHE")
+    if path:
+        return Path(path)
+    return Path(os.environ.get("ORBIT_STATE_DIR", DEFAULT_STATE_DIR)) / "names.sqlite3"
+
+
+def normalize_name(name: str) -> str:
+    """
+    Lookup key for an object name.
+
+    Case and whitespace are ignored, as is SIMBAD's "NAME " prefix for
+    common names: "M  31", "m31" and "M 31" share a key, as do
+    "NAME Andromeda Galaxy" and "andromeda galaxy".
+    """
+    name = " ".join(name.split())
+    if name[:5].upper() == "NAME ":
+        name = name[5:]
+    return re.sub(r"\s+", "", name).lower()
+
+
+class ResolverCache:
+    """
+    SQLite-backed name -> resolution result cache with alias indexing.
+
+    Usage:
+        cache = ResolverCache()
+        result = cache.get("M31")          # None on a miss
+        cache.put("M31", result, aliases=idlist)
+    """
+
+    def __init__(self, path=None, ttl_days: float = NAME_TTL_DAYS,
+                 negative_ttl_hours: float = NEGATIVE_TTL_HOURS):
+        self.path = Path(path) if path else default_path()
+        self.ttl = ttl_days * 86400
+        self.negative_ttl = negative_ttl_hours * 3600
+        self._conn = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        # Connections do not survive a fork; pre-forked workers open their own
+        if self._conn is None or self._pid != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False,
+                                   isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+
+    def get(self, name: str) -> Optional[Dict]:
+        """Cached result for a name, or None if absent or expired."""
+        key = normalize_name(name)
+        if not key:
+            return None
+        try:
+            with self._lock:
+                row = self._connect().execute(
+                    "SELECT e.result, e.expires_at FROM aliases AS a "
+                    "JOIN entries AS e ON e.entry = a.entry WHERE a.alias = ?",
+                    (key,)).fetchone()
+        except sqlite3.Error as e:
+            print(f"Name cache lookup failed: {e}")
+            return None
+
+        if row is None:
+            cache_event("simbad_names", "miss")
+            return None
+        if row[1] < time.time():
+            cache_event("simbad_names", "expired")
+            return None
+        cache_event("simbad_names", "hit")
+        result = json.loads(row[0])
+        if not result.get("found"):
+            result["name"] = name  # Not-found answers echo the name asked for
+        return result
+
+    def put(self, name: str, result: Dict, aliases: Iterable[str] = (),
+            partial: bool = False):
+        """
+        Cache a resolution result under name and every alias.
+
+        Found objects are stored once, under their main identifier, and
+        every alias points at that entry; a not-found answer is stored under
+        the name alone with the shorter lifetime.
+
+        Args:
+            partial: The result is a reduced one (e.g. from a batch ident
+                query, without aliases or other bands); it does not replace
+                an unexpired entry of the same object, only adds its aliases
+        """
+        found = bool(result.get("found"))
+        if found:
+            entry = normalize_name(result.get("name") or name)
+            keys = {normalize_name(a) for a in [name, result.get("name") or "", *aliases]}
+            expires_at = time.time() + self.ttl
+        else:
+            entry = "?" + normalize_name(name)
+            keys = {normalize_name(name)}
+            expires_at = time.time() + self.negative_ttl
+        keys.discard("")
+        if entry in ("", "?"):
+            return
+
+        try:
+            with self._lock:
+                conn = self._connect()
+                with conn:
+                    conn.execute("BEGIN IMMEDIATE")
+                    if partial:
+                        conn.execute(
+                            "INSERT INTO entries (entry, result, found, expires_at) "
+                            "VALUES (?, ?, ?, ?) ON CONFLICT (entry) DO UPDATE SET "
+                            "result = excluded.result, found = excluded.found, "
+                            "expires_at = excluded.expires_at "
+                            "WHERE entries.expires_at < ?",
+                            (entry, json.dumps(result), int(found), expires_at, time.time()))
+                    else:
+                        conn.execute(
+                            "INSERT OR REPLACE INTO entries (entry, result, found, expires_at) "
+                            "VALUES (?, ?, ?, ?)",
+                            (entry, json.dumps(result), int(found), expires_at))
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO aliases (alias, entry) VALUES (?, ?)",
+                        [(key, entry) for key in keys])
+        except sqlite3.Error as e:
+            print(f"Name cache write failed: {e}")
+
+    def purge_expired(self) -> int:
+        """Delete expired entries and their aliases; returns entries removed."""
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                removed = conn.execute("DELETE FROM entries WHERE expires_at < ?",
+                                       (time.time(),)).rowcount
+                conn.execute("DELETE FROM aliases WHERE entry NOT IN (SELECT entry FROM entries)")
+        return removed
+
+    def found(self) -> List[Dict]:
+        """Every unexpired resolved object (not-found answers excluded)."""
+        try:
+            with self._lock:
+                rows = self._connect().execute(
+                    "SELECT result FROM entries WHERE found = 1 AND expires_at >= ?",
+                    (time.time(),)).fetchall()
+        except sqlite3.Error as e:
+            print(f"Name cache read failed: {e}")
+            return []
+        return [json.loads(row[0]) for row in rows]
+
+    def __len__(self) -> int:
+        try:
+            with self._lock:
+                return self._connect().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        except sqlite3.Error:
+            return 0
+
+
+# ============================================
+# Pre-warming from the planner catalogs
+# ============================================
+
+def catalog_names(directory: Path = CATALOG_DIR) -> Dict[str, List[str]]:
+    """
+    Names to resolve for the Messier and Caldwell catalogs.
+
+    Returns:
+        Designation SIMBAD knows (M31, NGC 188, ...) -> extra names to index
+        for it (catalog id, common name). Caldwell numbers are not SIMBAD
+        identifiers, so Caldwell objects resolve by their NGC/IC designation.
+    """
+    names = {}
+    for filename in CATALOG_FILES:
+        try:
+            with open(directory / filename) as f:
+                objects = json.load(f).get("objects", [])
+        except (OSError, ValueError) as e:
+            print(f"Could not read {filename}: {e}")
+            continue
+
+        for obj in objects:
+            designation = obj.get("ngc") if obj["id"].startswith("C") else obj["id"]
+            # "NGC 869/884": the first object of a pair stands for both
+            designation = (designation or obj.get("name") or "").split("/")[0].strip()
+            if not designation:
+                continue
+            extra = names.setdefault(designation, [])
+            extra.extend(n for n in (obj["id"], obj.get("name")) if n and n != designation)
+    return names
+
+
+def prewarm(resolve_many: Callable[[List[str]], Dict[str, Dict]], cache: ResolverCache,
+            directory: Path = CATALOG_DIR) -> Dict[str, int]:
+    """
+    Resolve every catalog object not yet cached and index its catalog names.
+
+    Args:
+        resolve_many: Batch resolver, name list -> {name: result}; it is
+            expected to cache what it resolves
+        cache: Cache to fill
+
+    Returns:
+        Counts: catalog objects, already cached, resolved, not found
+    """
+    names = catalog_names(directory)
+    missing = [name for name in names if cache.get(name) is None]
+    results = resolve_many(missing) if missing else {}
+
+    for name, extra in names.items():
+        result = results.get(name) or cache.get(name)
+        if result and result.get("found"):
+            cache.put(name, result, aliases=extra)
+
+    return {
+        "objects": len(names),
+        "cached": len(names) - len(missing),
+        "resolved": sum(1 for r in results.values() if r.get("found")),
+        "not_found": sum(1 for r in results.values() if not r.get("found")),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="SIMBAD name cache maintenance")
+    parser.add_argument("--prewarm", action="store_true",
+                        help="resolve the Messier and Caldwell catalogs into the cache")
+    parser.add_argument("--purge", action="store_true", help="delete expired entries")
+    args = parser.parse_args(argv)
+
+    # The server owns the SIMBAD calls and the shared cache instance
+    from server import resolve_simbad_names, resolver_cache
+
+    print(f"Name cache: {resolver_cache.path} ({len(resolver_cache)} entries)")
+    if args.purge:
+        print(f"Purged {resolver_cache.purge_expired()} expired entries")
+    if args.prewarm:
+        counts = prewarm(lambda names: resolve_simbad_names(names, deep=True), resolver_cache)
+        print("Pre-warm: " + ", ".join(f"{k} {v}" for k, v in counts.items()))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
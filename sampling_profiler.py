@@ -0,0 +1,269 @@
+"""
+Sampling Profiler - On-demand statistical profiling of a live server
+
+Samples the Python stack of every thread in the process at a fixed
+interval (sys._current_frames) for a bounded number of seconds and counts
+identical stacks. The result is in the collapsed-stack format read by
+flamegraph.pl, speedscope and inferno:
+
+    _bootstrap (threading.py:1012);...;propagate (orbit_propagator.py:158) 412
+
+Nothing is traced between samples, so the cost is one stack walk per
+thread per interval, only while a session runs. No debug mode, restart or
+extra dependency is needed.
+
+install_profiler(app) adds an admin endpoint, disabled unless ADMIN_TOKEN
+is set:
+
+    GET /api/admin/profile?seconds=10&interval_ms=10&format=collapsed
+        Header: X-Admin-Token: <ADMIN_TOKEN>  (or Authorization: Bearer ...)
+
+Parameters:
+    seconds       Duration, up to PROFILER_MAX_SECONDS (default 60)
+    interval_ms   Sampling interval, at least 1 ms (default 10)
+    format        "collapsed" (text) or "json" (stacks plus summary)
+    idle          "1" to keep threads parked in wait/select/accept
+    background    "1" to return 202 at once and write the profile to
+                  PROFILE_DIR, fetched later from /api/admin/profile/<id>
+
+A profile covers the process that answered. Under Gunicorn that is one
+worker. Night Sky runs one worker with 16 request threads by default, and
+its sky renders run in separate render pool processes, so its profiles show
+request handling, admission and the wait for renders, not matplotlib. With
+a single request thread per worker (Night Sky with RENDER_WORKERS=0), use
+background mode so the thread returns to serving traffic while the sampler
+runs.
+"""
+
+import hmac
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Dict, Optional
+
+from flask import Response, jsonify, request
+
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+MAX_SECONDS = float(os.environ.get("PROFILER_MAX_SECONDS", "60"))
+PROFILE_DIR = os.environ.get(
+    "PROFILE_DIR", os.path.join(tempfile.gettempdir(), "nightsky-profiles"))
+
+MIN_INTERVAL = 0.001
+
+# Innermost frames that mean a thread is parked rather than working
+IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("selectors.py", "select"),
+    ("socket.py", "accept"),
+    ("socket.py", "readinto"),
+    ("socketserver.py", "serve_forever"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+}
+
+# One session per process; concurrent sessions would sample each other
+_session_lock = threading.Lock()
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _is_idle(frame) -> bool:
+    code = frame.f_code
+    return (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES
+
+
+class SamplingProfiler:
+    """
+    Counts the stacks of all other threads, sampled at a fixed interval.
+
+    Attributes:
+        interval: Seconds between samples
+        include_idle: Whether parked threads are counted
+        stacks: Collapsed stack string -> sample count
+        samples: Number of sampling passes taken
+        threads: Names of threads seen working in at least one sample
+    """
+
+    def __init__(self, interval: float = 0.01, include_idle: bool = False):
+        self.interval = max(interval, MIN_INTERVAL)
+        self.include_idle = include_idle
+        self.stacks = Counter()
+        self.samples = 0
+        self.threads = set()
+        self.elapsed = 0.0
+        self.overhead = 0.0
+        # Label cache: code objects are long-lived, so label each once
+        self._labels = {}
+
+    def sample(self, skip: int):
+        """Take one sample of every thread except the one with ident skip."""
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == skip or (not self.include_idle and _is_idle(frame)):
+                continue
+            labels = []
+            while frame is not None:
+                code = frame.f_code
+                label = self._labels.get(code)
+                if label is None:
+                    label = self._labels[code] = _frame_label(code)
+                labels.append(label)
+                frame = frame.f_back
+            labels.reverse()
+            self.stacks[";".join(labels)] += 1
+            self.threads.add(names.get(ident, str(ident)))
+        self.samples += 1
+
+    def run(self, seconds: float):
+        """Sample from the calling thread for the given number of seconds."""
+        me = threading.get_ident()
+        start = time.perf_counter()
+        deadline = start + seconds
+        next_at = start
+
+        while True:
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            if now < next_at:
+                time.sleep(next_at - now)
+                continue
+            self.sample(me)
+            self.overhead += time.perf_counter() - now
+            # Skip missed ticks instead of sampling in a burst to catch up
+            next_at = max(next_at + self.interval, now)
+
+        self.elapsed = time.perf_counter() - start
+        return self
+
+    def collapsed(self) -> str:
+        """Profile in collapsed-stack format, heaviest stacks first."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def to_dict(self) -> Dict:
+        return {
+            "duration_s": round(self.elapsed, 3),
+            "interval_ms": round(self.interval * 1000, 3),
+            "samples": self.samples,
+            "threads": sorted(self.threads),
+            "overhead_ms": round(self.overhead * 1000, 1),
+            "stacks": dict(self.stacks.most_common()),
+        }
+
+
+def profile(seconds: float, interval: float = 0.01,
+            include_idle: bool = False) -> Optional[SamplingProfiler]:
+    """
+    Run one sampling session, or return None if one is already running.
+    """
+    if not _session_lock.acquire(blocking=False):
+        return None
+    try:
+        return SamplingProfiler(interval, include_idle).run(seconds)
+    finally:
+        _session_lock.release()
+
+
+# ============================================
+# Flask integration
+# ============================================
+
+def _authorized() -> bool:
+    supplied = request.headers.get("X-Admin-Token", "")
+    auth = request.headers.get("Authorization", "")
+    if not supplied and auth.startswith("Bearer "):
+        supplied = auth[len("Bearer "):]
+    return hmac.compare_digest(supplied.encode(), ADMIN_TOKEN.encode())
+
+
+def _render(profiler: SamplingProfiler, fmt: str, service: str):
+    if fmt == "json":
+        return jsonify({"service": service, "pid": os.getpid(), **profiler.to_dict()})
+    return Response(profiler.collapsed(), content_type="text/plain; charset=utf-8")
+
+
+def _write_profile(path: str, seconds: float, interval: float, include_idle: bool):
+    try:
+        profiler = profile(seconds, interval, include_idle)
+        if profiler is None:
+            return
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            f.write(profiler.collapsed())
+        os.replace(tmp, path)
+    except Exception as e:
+        print(f"Background profile failed: {e}")
+
+
+def install_profiler(app, service: str, path: str = "/api/admin/profile"):
+    """
+    Add the sampling profiler admin endpoint to a Flask app.
+
+    The endpoint answers 404 unless ADMIN_TOKEN is set, 403 without the
+    token and 409 while another session is running in this process.
+    """
+    def profile_view():
+        if not ADMIN_TOKEN:
+            return jsonify({"error": "Not found"}), 404
+        if not _authorized():
+            return jsonify({"error": "Forbidden"}), 403
+
+        try:
+            seconds = float(request.args.get("seconds", 10))
+            interval = float(request.args.get("interval_ms", 10)) / 1000
+        except ValueError:
+            return jsonify({"error": "seconds and interval_ms must be numbers"}), 400
+        if not 0 < seconds <= MAX_SECONDS:
+            return jsonify({"error": f"seconds must be in (0, {MAX_SECONDS:g}]"}), 400
+
+        fmt = request.args.get("format", "collapsed")
+        if fmt not in ("collapsed", "json"):
+            return jsonify({"error": "format must be collapsed or json"}), 400
+        include_idle = request.args.get("idle") == "1"
+
+        if request.args.get("background") == "1":
+            if _session_lock.locked():
+                return jsonify({"error": "A profile is already running"}), 409
+            profile_id = f"{service}-{os.getpid()}-{uuid.uuid4().hex[:12]}"
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            threading.Thread(
+                target=_write_profile,
+                args=(os.path.join(PROFILE_DIR, profile_id + ".collapsed"),
+                      seconds, interval, include_idle),
+                name="sampling-profiler", daemon=True,
+            ).start()
+            return jsonify({
+                "id": profile_id,
+                "seconds": seconds,
+                "result": f"{path}/{profile_id}",
+            }), 202
+
+        profiler = profile(seconds, interval, include_idle)
+        if profiler is None:
+            return jsonify({"error": "A profile is already running"}), 409
+        return _render(profiler, fmt, service)
+
+    def profile_result_view(profile_id):
+        if not ADMIN_TOKEN:
+            return jsonify({"error": "Not found"}), 404
+        if not _authorized():
+            return jsonify({"error": "Forbidden"}), 403
+        # Ids are generated here; reject anything that could leave PROFILE_DIR
+        if not all(c.isalnum() or c == "-" for c in profile_id):
+            return jsonify({"error": "Invalid profile id"}), 400
+
+        file_path = os.path.join(PROFILE_DIR, profile_id + ".collapsed")
+        if not os.path.exists(file_path):
+            return jsonify({"error": "Profile not found or still running"}), 404
+        with open(file_path) as f:
+            return Response(f.read(), content_type="text/plain; charset=utf-8")
+
+    app.add_url_rule(path, "admin_profile", profile_view, methods=["GET", "POST"])
+    app.add_url_rule(f"{path}/<profile_id>", "admin_profile_result", profile_result_view)
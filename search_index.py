@@ -0,0 +1,297 @@
+"""
+Search Index - Prefix and typo-tolerant suggestions for objects and places
+
+Answers keystroke-driven lookups in-process, without a network call:
+
+    index = SearchIndex(entries)
+    index.suggest("andro", limit=8)      # prefix matches, best first
+    index.suggest("betelguese")          # falls back to fuzzy matching
+
+Every name of an entry (main name and aliases) is indexed under its
+normalized key (case, spacing and SIMBAD's "NAME " prefix ignored), and
+under the key of each later word, so "galaxy" finds "Andromeda Galaxy".
+
+Prefix matching: all keys are held in one sorted array; the keys starting
+with a prefix form one contiguous range found by binary search, like a
+trie walk but without a node per character. The best entries of the range
+are picked by weight.
+
+Fuzzy matching (when prefixes give too few results): character trigrams
+of the query select candidate keys through an inverted index; candidates
+are then checked by edit distance against the start of the key, allowing
+about one typo per four characters.
+
+Entries come from build_entries(): the local object catalog, objects
+resolved through SIMBAD before (the name cache) and, optionally, a
+gazetteer of places (SEARCH_GAZETTEER).
+
+Environment variables:
+    SEARCH_GAZETTEER   Places file: JSON list or CSV with name, lat, lon
+                       and optional country, population (default: none)
+"""
+
+import csv
+import json
+import math
+import os
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from resolver_cache import normalize_name
+
+GAZETTEER_PATH = os.environ.get("SEARCH_GAZETTEER")
+
+FUZZY_MIN_LENGTH = 3      # Shorter queries only match by prefix
+FUZZY_CANDIDATES = 64     # Keys checked by edit distance per query
+
+
+def _trigrams(key: str) -> List[str]:
+    padded = f"^{key}$"
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+
+def _prefix_distance(query: str, key: str, limit: int) -> int:
+    """
+    Smallest edit distance between query and any prefix of key.
+
+    Returns limit + 1 for anything farther than limit; only the diagonal
+    band of width 2 * limit + 1 is computed.
+    """
+    far = limit + 1
+    key = key[:len(query) + limit]
+    previous = [j if j <= limit else far for j in range(len(key) + 1)]
+    # Levenshtein rows; the minimum of the last row is the distance to the
+    # best-matching prefix of key
+    for i, qc in enumerate(query, 1):
+        current = [far] * (len(key) + 1)
+        current[0] = i if i <= limit else far
+        best = current[0]
+        for j in range(max(1, i - limit), min(len(key), i + limit) + 1):
+            cost = min(previous[j] + 1, current[j - 1] + 1,
+                       previous[j - 1] + (qc != key[j - 1]))
+            current[j] = cost if cost <= limit else far
+            best = min(best, current[j])
+        if best > limit:
+            return far
+        previous = current
+    return min(previous)
+
+
+class SearchIndex:
+    """
+    Sorted-key prefix index plus trigram index over named entries.
+
+    Each entry is a dict with at least "label" (display name), "names"
+    (all names to match), "kind" ("object" or "place") and "weight"
+    (higher ranks first); other fields are returned with suggestions.
+    """
+
+    def __init__(self, entries: List[Dict]):
+        self.entries = entries
+        pairs = {}
+        for entry_id, entry in enumerate(entries):
+            for rank, name in enumerate(entry["names"]):
+                words = " ".join(name.split()).split(" ")
+                for start in range(len(words)):
+                    key = normalize_name(" ".join(words[start:]))
+                    if not key:
+                        continue
+                    # Full names rank above word matches, main name above aliases
+                    quality = (2 if start == 0 else 0) + (1 if rank == 0 else 0)
+                    if pairs.get((key, entry_id), -1) < quality:
+                        pairs[(key, entry_id)] = quality
+
+        ordered = sorted(pairs.items())
+        self.keys = [key for (key, _), _ in ordered]
+        self.entry_ids = np.array([entry_id for (_, entry_id), _ in ordered], dtype=np.int32)
+        self.quality = np.array([quality for _, quality in ordered], dtype=np.int8)
+        weights = np.array([e["weight"] for e in entries], dtype=float)
+        self.score = self.quality * 1000.0 + weights[self.entry_ids] if ordered else np.zeros(0)
+        kinds = np.array([e["kind"] for e in entries])
+        self.kinds = kinds[self.entry_ids] if ordered else np.zeros(0, dtype=str)
+
+        postings = {}
+        for key_id, key in enumerate(self.keys):
+            for gram in set(_trigrams(key)):
+                postings.setdefault(gram, []).append(key_id)
+        self.postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def suggest(self, query: str, limit: int = 10, kind: Optional[str] = None) -> List[Dict]:
+        """
+        Best entries for a partial query, prefix matches first.
+
+        Args:
+            query: What the user typed so far
+            limit: Most suggestions returned
+            kind: "object" or "place" to restrict the results
+        """
+        key = normalize_name(query)
+        if not key:
+            return []
+
+        results = {}
+        self._prefix(key, limit, kind, results)
+        if len(results) < limit and len(key) >= FUZZY_MIN_LENGTH:
+            self._fuzzy(key, limit, kind, results)
+
+        suggestions = []
+        for entry_id, (match, name) in results.items():
+            entry = self.entries[entry_id]
+            suggestion = {k: v for k, v in entry.items() if k not in ("names", "weight")}
+            suggestion["match"] = match
+            if name != entry["label"]:
+                suggestion["matched_name"] = name
+            suggestions.append(suggestion)
+        return suggestions[:limit]
+
+    def _name_for(self, entry_id: int, key: str) -> str:
+        """The entry name that produced key (for display)."""
+        names = self.entries[entry_id]["names"]
+        for name in names:
+            if normalize_name(name).startswith(key) or key in normalize_name(name):
+                return name
+        return names[0]
+
+    def _prefix(self, key: str, limit: int, kind: Optional[str], results: Dict):
+        start = bisect_left(self.keys, key)
+        end = bisect_left(self.keys, key + "\uffff", start)
+        if start == end:
+            return
+
+        # Exact key matches first, then by score
+        exact = np.zeros(end - start, dtype=float)
+        exact_end = bisect_left(self.keys, key + "\x00", start, end)
+        exact[:exact_end - start] = 1e6
+        score = self.score[start:end] + exact
+        if kind:
+            score[self.kinds[start:end] != kind] = -np.inf
+        take = min(len(score), limit * 4)
+        best = np.argpartition(-score, take - 1)[:take] if take < len(score) else np.arange(len(score))
+        for i in best[np.argsort(-score[best], kind="stable")].tolist():
+            entry_id = int(self.entry_ids[start + i])
+            if entry_id in results or score[i] == -np.inf:
+                continue
+            results[entry_id] = ("prefix", self._name_for(entry_id, self.keys[start + i]))
+            if len(results) >= limit:
+                return
+
+    def _fuzzy(self, key: str, limit: int, kind: Optional[str], results: Dict):
+        grams = [g for g in set(_trigrams(key)) if g in self.postings]
+        if not grams:
+            return
+        hits = np.bincount(np.concatenate([self.postings[g] for g in grams]),
+                           minlength=len(self.keys))
+        if kind:
+            hits[self.kinds != kind] = 0
+        # Each typo changes at most three trigrams; the query's end trigram
+        # only appears in keys of the same length
+        allowed = max(1, len(key) // 4)
+        hits[hits < len(grams) - 3 * allowed - 1] = 0
+        take = min(FUZZY_CANDIDATES, int(np.count_nonzero(hits)))
+        if take == 0:
+            return
+        candidates = np.argpartition(-hits, take - 1)[:take]
+
+        scored = []
+        for key_id in candidates.tolist():
+            distance = _prefix_distance(key, self.keys[key_id], allowed)
+            if distance <= allowed:
+                scored.append((distance, -self.score[key_id], key_id))
+
+        for _, _, key_id in sorted(scored):
+            entry_id = int(self.entry_ids[key_id])
+            if entry_id in results:
+                continue
+            results[entry_id] = ("fuzzy", self._name_for(entry_id, self.keys[key_id]))
+            if len(results) >= limit:
+                return
+
+
+# ============================================
+# Entry sources
+# ============================================
+
+def object_entry(obj: Dict, source: str) -> Dict:
+    """Search entry for a catalog or SIMBAD object (brighter and rarer types first)."""
+    magnitude = obj.get("magnitude_v")
+    weight = (20 - min(20.0, magnitude if magnitude is not None else 20.0)) \
+        + (10 - min(10, obj.get("priority", 10)))
+    return {
+        "label": obj["name"],
+        "names": [obj["name"], *(obj.get("aliases") or [])],
+        "kind": "object",
+        "type": obj.get("type"),
+        "ra": obj["ra"],
+        "dec": obj["dec"],
+        "magnitude_v": magnitude,
+        "source": source,
+        "weight": weight,
+    }
+
+
+def load_gazetteer(path: str) -> List[Dict]:
+    """
+    Place entries from a JSON list or a CSV file with a header row.
+
+    Columns: name, lat (or latitude), lon (or longitude), and optional
+    country and population.
+    """
+    with open(path, newline="") as f:
+        rows = json.load(f) if path.endswith(".json") else list(csv.DictReader(f))
+
+    places = []
+    for row in rows:
+        try:
+            name = row["name"].strip()
+            lat = float(row.get("lat", row.get("latitude")))
+            lon = float(row.get("lon", row.get("longitude")))
+        except (KeyError, TypeError, ValueError, AttributeError):
+            continue
+        try:
+            population = float(row.get("population") or 0)
+            if not population >= 0:
+                raise ValueError(population)
+        except (TypeError, ValueError):
+            print(f"Bad population for gazetteer place {name!r}: {row.get('population')!r}")
+            population = 0.0
+        country = (row.get("country") or "").strip()
+        places.append({
+            "label": f"{name}, {country}" if country else name,
+            "names": [name],
+            "kind": "place",
+            "lat": lat,
+            "lon": lon,
+            "country": country or None,
+            "weight": math.log10(population + 1),
+        })
+    return places
+
+
+def build_entries(catalog_objects: Iterable[Dict], cached_objects: Iterable[Dict],
+                  gazetteer: Optional[str] = GAZETTEER_PATH) -> List[Dict]:
+    """
+    Entries for the search index from every source.
+
+    SIMBAD results already known to the local catalog (by any name) are
+    skipped, so each object is suggested once.
+    """
+    entries = [object_entry(obj, "local") for obj in catalog_objects]
+    known = {normalize_name(n) for e in entries for n in e["names"]}
+    for obj in cached_objects:
+        names = [obj["name"], *(obj.get("aliases") or [])]
+        if any(normalize_name(n) in known for n in names):
+            continue
+        known.update(normalize_name(n) for n in names)
+        entries.append(object_entry(obj, "simbad"))
+
+    if gazetteer:
+        try:
+            entries.extend(load_gazetteer(gazetteer))
+        except (OSError, ValueError) as e:
+            print(f"Could not load gazetteer {gazetteer}: {e}")
+    return entries
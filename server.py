@@ -5,13 +5,29 @@ Endpoints:
     GET /api/tle - Current TLE data
     GET /api/current - Current satellite position
     GET /api/track - Ground track positions
+    GET /api/track/export - Streamed long-range track (GeoJSON, CZML, CSV)
     GET /api/orbit-info - Orbital parameters
     GET /api/swath - Current swath polygon
     GET /api/simbad/region - Query objects in a sky region
+    GET /api/simbad/region/pages - Every object of a wide field, page by page
     GET /api/simbad/resolve - Resolve object name to coordinates
+    GET/POST /api/simbad/resolve/batch - Resolve many object names at once
+    GET /api/search/suggest - Autocomplete object and place names
+    GET /api/cutout/image - Cached survey cutout image (proxy mode)
+    GET /api/health - Liveness check
+    GET /api/ready - Readiness (warmup finished) and startup timing report
 """
 
-from flask import Flask, jsonify, request
+import contextvars
+import math
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from flask import Flask, Response, jsonify, request, send_file, url_for
 from flask_cors import CORS
 from datetime import datetime, timezone, timedelta
 from dateutil.parser import parse as parse_datetime
@@ -22,20 +38,70 @@ from tle_fetcher import (
     get_satellite_info, get_constellation_info
 )
 from orbit_propagator import OrbitPropagator, generate_swath_polygon
+from track_cache import (
+    segment_cache, make_cursor, parse_cursor, floor_to_grid, tle_epoch_key
+)
+from track_export import export_track, EXPORT_FORMATS
+from state_store import get_default_store
+from warmup import Warmup
+from metrics import instrument_app, cache_event, gauge
+from tracing import init_tracing, traced
+import upstream
+from sampling_profiler import install_profiler
+from healpix import max_pixrad, pix2ang
+from simbad_tiles import SimbadTileCache
+from resolver_cache import ResolverCache, prewarm as prewarm_names
+from local_catalog import LocalCatalog, load_catalog
+from search_index import SearchIndex, build_entries
+from cutout_cache import CONTENT_TYPES, PROXY_ENABLED as CUTOUT_PROXY, CutoutCache, cutout_key
+from http_cache import (
+    conditional, make_etag, query_etag, STATIC_CACHE, SHORT_CACHE, IMMUTABLE_CACHE
+)
 
 app = Flask(__name__)
 CORS(app)
+instrument_app(app)  # Request metrics and GET /metrics
+init_tracing(app, "orbit")  # Opt-in span trees (TRACE_* settings)
+install_profiler(app, "orbit")  # Admin sampling profiler (needs ADMIN_TOKEN)
 
 # Global propagator instances (refreshed when TLE updates)
 _propagators = {}  # keyed by satellite key
 _tle_data = {}     # keyed by satellite key
 _last_refresh = {}  # keyed by satellite key
+_store_versions = {}  # keyed by satellite key: state store version loaded
 
 REFRESH_INTERVAL_HOURS = 6  # Refresh TLE every 6 hours
+FALLBACK_RETRY_MINUTES = 5  # Retry CelesTrak this soon after falling back
+EXPORT_MAX_DAYS = 62  # Longest window /api/track/export will stream
 
+# TLEs are published through a file-backed store so that all workers of a
+# pre-forked deployment share one refresh (see wsgi.py)
+_state_store = get_default_store()
+
+
+def _is_stale(tle: dict, refreshed_at: datetime, now: datetime) -> bool:
+    # A built-in fallback TLE only stands in until CelesTrak answers again
+    if tle.get("source") == "celestrak":
+        max_age = REFRESH_INTERVAL_HOURS * 3600
+    else:
+        max_age = FALLBACK_RETRY_MINUTES * 60
+    return (now - refreshed_at).total_seconds() > max_age
 
+
+def _record_is_stale(record, now: datetime) -> bool:
+    return record is None or _is_stale(
+        record["tle"], datetime.fromisoformat(record["refreshed_at"]), now)
+
+
+@traced("get_propagator")
 def get_propagator(sat_key: str = DEFAULT_SATELLITE) -> OrbitPropagator:
-    """Get or create the orbit propagator for a satellite, refreshing TLE if stale."""
+    """
+    Get or create the orbit propagator for a satellite, refreshing TLE if stale.
+
+    The freshest TLE is taken from the shared state store when another
+    process already published one; otherwise this process fetches it from
+    CelesTrak under the store lock and publishes it.
+    """
     global _propagators, _tle_data, _last_refresh
 
     if sat_key not in SATELLITE_CATALOG:
@@ -43,18 +109,61 @@ def get_propagator(sat_key: str = DEFAULT_SATELLITE) -> OrbitPropagator:
 
     now = datetime.now(timezone.utc)
     sat_info = SATELLITE_CATALOG[sat_key]
+    store_key = f"tle-{sat_key}"
+    version = _state_store.version(store_key)
+
+    # Fast path: loaded, fresh, and nobody published a newer TLE
+    if (sat_key in _propagators and _store_versions.get(sat_key) == version and
+            not _is_stale(_tle_data[sat_key], _last_refresh[sat_key], now)):
+        cache_event("tle", "hit")
+        return _propagators[sat_key]
+
+    event = "load"
+
+    record = _state_store.read(store_key)
+    if _record_is_stale(record, now):
+        # Keep serving the current TLE if another worker is already refreshing
+        with _state_store.lock(store_key, blocking=sat_key not in _propagators) as acquired:
+            if not acquired:
+                cache_event("tle", "stale")
+                return _propagators[sat_key]
+
+            record = _state_store.read(store_key)
+            if _record_is_stale(record, now):
+                record = {
+                    "tle": fetch_tle(sat_info["norad_id"]),
+                    "refreshed_at": now.isoformat()
+                }
+                _state_store.write(store_key, record)
+                event = "refresh"
+                print(f"TLE for {sat_info['name']} refreshed at {now.isoformat()}")
+        version = _state_store.version(store_key)
+
+    tle = record["tle"]
+    _tle_data[sat_key] = tle
+    _propagators[sat_key] = OrbitPropagator(tle["line1"], tle["line2"])
+    _last_refresh[sat_key] = datetime.fromisoformat(record["refreshed_at"])
+    _store_versions[sat_key] = version
+    cache_event("tle", event)
+
+    return _propagators[sat_key]
 
-    # Check if we need to refresh
-    if (sat_key not in _propagators or sat_key not in _last_refresh or
-        (now - _last_refresh[sat_key]).total_seconds() > REFRESH_INTERVAL_HOURS * 3600):
 
-        tle = fetch_tle(sat_info["norad_id"])
-        _tle_data[sat_key] = tle
-        _propagators[sat_key] = OrbitPropagator(tle["line1"], tle["line2"])
-        _last_refresh[sat_key] = now
-        print(f"TLE for {sat_info['name']} refreshed at {now.isoformat()}")
+# Background startup work: each satellite's TLE is loaded (from the state
+# store when fresh, otherwise from CelesTrak) in its own parallel phase
+warmup = Warmup("orbit-api")
+for _sat_key in SATELLITE_CATALOG:
+    warmup.add(f"tle:{_sat_key}", lambda sat_key=_sat_key: get_propagator(sat_key))
 
-    return _propagators[sat_key]
+
+def preload():
+    """
+    Load every satellite's TLE and propagator, blocking until done.
+
+    Called in the master process of a pre-fork deployment so that workers
+    inherit the propagators copy-on-write.
+    """
+    return warmup.run()
 
 
 def get_tle_data(sat_key: str = DEFAULT_SATELLITE) -> dict:
@@ -65,6 +174,74 @@ def get_tle_data(sat_key: str = DEFAULT_SATELLITE) -> dict:
     return _tle_data.get(sat_key, {})
 
 
+def _tle_age_hours() -> dict:
+    """TLE age per loaded satellite, for the tle_age_hours gauge."""
+    now = datetime.now(timezone.utc)
+    return {
+        (sat_key,): (now - prop.tle_epoch).total_seconds() / 3600
+        for sat_key, prop in list(_propagators.items())
+    }
+
+
+gauge("tle_age_hours", "Age of the loaded TLE per satellite",
+      ["satellite"]).set_function(_tle_age_hours)
+gauge("cache_entries", "Entries held per cache layer",
+      ["cache"]).set_function(lambda: {("track_segments",): len(segment_cache),
+                                       ("simbad_tiles",): len(simbad_tiles),
+                                       ("simbad_names",): len(resolver_cache),
+                                       ("local_catalog",): len(_local_catalog or ()),
+                                       ("search_index",): len(_search_index or ()),
+                                       ("cutouts",): len(cutouts) if CUTOUT_PROXY else 0})
+
+
+# ============================================
+# HTTP caching validators
+# ============================================
+
+CATALOG_VERSION = make_etag(SATELLITE_CATALOG, DEFAULT_SATELLITE)
+
+
+# /api/tle reports the TLE age as of the start of the current hour, so the
+# body (and its ETag) changes once an hour between refreshes
+TLE_AGE_BUCKET_SECONDS = 3600
+
+
+def _tle_age_bucket() -> int:
+    return int(time.time() // TLE_AGE_BUCKET_SECONDS)
+
+
+def _tle_etag() -> str:
+    """ETag for /api/tle: changes when the TLE is refreshed and every hour."""
+    sat_key = request.args.get("satellite", DEFAULT_SATELLITE)
+    tle = get_tle_data(sat_key)
+    return query_etag(tle.get("epoch"), tle.get("source"), _last_refresh.get(sat_key),
+                      _tle_age_bucket())
+
+
+def _fixed_window_etag():
+    """
+    ETag for track responses over an explicit window.
+
+    A track with a fixed start never changes under the same TLE, so the ETag
+    is derived from the query and the TLE epoch. Windows relative to "now"
+    and cursor extensions are not cacheable.
+    """
+    if "start" not in request.args or "cursor" in request.args:
+        return None
+    prop = get_propagator(request.args.get("satellite", DEFAULT_SATELLITE))
+    return query_etag(tle_epoch_key(prop))
+
+
+def _fixed_window_cache_control() -> str:
+    """Immutable when the client pinned the TLE epoch it was served."""
+    pinned = request.args.get("tle_epoch")
+    if pinned:
+        prop = get_propagator(request.args.get("satellite", DEFAULT_SATELLITE))
+        if pinned == prop.tle_epoch.isoformat():
+            return IMMUTABLE_CACHE
+    return "public, max-age=3600"
+
+
 @app.route("/")
 def index():
     """Health check endpoint."""
@@ -77,14 +254,30 @@ def index():
             "/api/tle",
             "/api/current",
             "/api/track",
+            "/api/track/export",
             "/api/orbit-info",
             "/api/swath",
-            "/api/constellation/current"
+            "/api/constellation/current",
+            "/api/health",
+            "/api/ready"
         ]
     })
 
 
+@app.route("/api/health")
+def api_health():
+    """Liveness: the process is up and serving requests."""
+    return jsonify({"status": "ok", "service": "orbit"})
+
+
+@app.route("/api/ready")
+def api_ready():
+    """Readiness: 200 once warmup has finished, 503 before, with timings."""
+    return jsonify(warmup.report()), 200 if warmup.ready else 503
+
+
 @app.route("/api/satellites")
+@conditional(lambda: query_etag(CATALOG_VERSION), STATIC_CACHE)
 def api_satellites():
     """Return list of available satellites."""
     return jsonify({
@@ -94,16 +287,21 @@ def api_satellites():
 
 
 @app.route("/api/tle")
+@conditional(_tle_etag, SHORT_CACHE)
 def api_tle():
     """Return current TLE data and metadata.
 
     Query params:
         satellite: satellite key (default: noaa21)
+
+    age_hours is the TLE age at the start of the current hour.
     """
     sat_key = request.args.get("satellite", DEFAULT_SATELLITE)
     tle = get_tle_data(sat_key)
     sat_info = get_satellite_info(sat_key) or {}
     orbital_params = get_orbital_params(tle["line2"])
+    as_of = _tle_age_bucket() * TLE_AGE_BUCKET_SECONDS
+    age_hours = (as_of - datetime.fromisoformat(tle["epoch"]).timestamp()) / 3600
 
     return jsonify({
         "satellite_key": sat_key,
@@ -112,7 +310,7 @@ def api_tle():
         "tle_line1": tle["line1"],
         "tle_line2": tle["line2"],
         "epoch": tle["epoch"],
-        "age_hours": tle["age_hours"],
+        "age_hours": round(age_hours, 2),
         "source": tle["source"],
         "orbital_params": orbital_params
     })
@@ -144,16 +342,21 @@ def api_current():
 
 
 @app.route("/api/track")
+@conditional(_fixed_window_etag, _fixed_window_cache_control)
 def api_track():
     """
     Return ground track positions.
 
     Query params:
         satellite: satellite key (default: noaa21)
-        start: ISO datetime (default: now)
+        start: ISO datetime (default: now, aligned to the step grid)
         end: ISO datetime (default: start + 90 minutes)
         step: seconds between positions (default: 60)
         duration: minutes from start (alternative to end)
+        cursor: cursor from a previous response; returns only the points
+                after it, up to now + duration (see _extend_track)
+        tle_epoch: TLE epoch from a previous response; with an explicit
+                   start, marks the response immutable while it still matches
     """
     sat_key = request.args.get("satellite", DEFAULT_SATELLITE)
     prop = get_propagator(sat_key)
@@ -163,6 +366,10 @@ def api_track():
     end_str = request.args.get("end")
     duration = request.args.get("duration", type=int)
     step = request.args.get("step", default=60, type=int)
+    cursor_str = request.args.get("cursor")
+
+    if cursor_str:
+        return _extend_track(sat_key, prop, cursor_str, duration or 90)
 
     # Validate step (10 seconds to 5 minutes)
     step = max(10, min(300, step))
@@ -176,7 +383,9 @@ def api_track():
         except ValueError:
             return jsonify({"error": "Invalid start datetime"}), 400
     else:
-        start = datetime.now(timezone.utc)
+        # Align "now" to the step grid so windows share cached segments
+        now_ts = datetime.now(timezone.utc).timestamp()
+        start = datetime.fromtimestamp(floor_to_grid(now_ts, step), tz=timezone.utc)
 
     if end_str:
         try:
@@ -193,26 +402,142 @@ def api_track():
         # Default: 90 minutes (roughly one orbit)
         end = start + timedelta(minutes=90)
 
-    # Generate track
-    positions = prop.generate_track(start, end, step)
+    # Whole-second starts are served from cached segments; anything finer
+    # cannot share a grid with other requests and is propagated directly
+    if start.microsecond == 0:
+        track = segment_cache.get_positions(
+            sat_key, prop, int(start.timestamp()), int(end.timestamp()), step
+        )
+    else:
+        track = [{
+            "lat": p["latitude"],
+            "lon": p["longitude"],
+            "alt": p["altitude_km"],
+            "time": p["timestamp"]
+        } for p in prop.generate_track(start, end, step)]
 
-    # Simplify output format
-    track = [{
-        "lat": p["latitude"],
-        "lon": p["longitude"],
-        "alt": p["altitude_km"],
-        "time": p["timestamp"]
-    } for p in positions]
+    epoch_ms = tle_epoch_key(prop)
+    last_ts = (int(datetime.fromisoformat(track[-1]["time"]).timestamp())
+               if track else int(start.timestamp()) - step)
 
     return jsonify({
         "positions": track,
         "step_seconds": step,
         "total_points": len(track),
         "start": start.isoformat(),
-        "end": end.isoformat()
+        "end": end.isoformat(),
+        "tle_epoch": prop.tle_epoch.isoformat(),
+        "cursor": make_cursor(last_ts, step, epoch_ms)
     })
 
 
+def _extend_track(sat_key: str, prop: OrbitPropagator, cursor_str: str,
+                  duration: int):
+    """
+    Return the track points that follow a client cursor.
+
+    The client keeps a rolling window ending at now + duration minutes and
+    asks only for points after the last one it holds. When the TLE changed
+    since the cursor was issued, or the client's data lies entirely in the
+    past, the response carries "reset": true and a fresh window starting
+    now; the client must discard what it has.
+    """
+    cursor = parse_cursor(cursor_str)
+    if cursor is None:
+        return jsonify({"error": "Invalid cursor"}), 400
+
+    step = max(10, min(300, cursor.step))
+    duration = min(duration, 1440)
+
+    now_ts = datetime.now(timezone.utc).timestamp()
+    now_grid = floor_to_grid(now_ts, step)
+    end_ts = int(now_ts + duration * 60)
+    epoch_ms = tle_epoch_key(prop)
+
+    reset = cursor.tle_epoch_ms != epoch_ms or cursor.last_ts < now_grid
+    start_ts = now_grid if reset else cursor.last_ts + step
+
+    track = segment_cache.get_positions(sat_key, prop, start_ts, end_ts, step)
+    last_ts = (int(datetime.fromisoformat(track[-1]["time"]).timestamp())
+               if track else (start_ts - step if reset else cursor.last_ts))
+
+    return jsonify({
+        "positions": track,
+        "step_seconds": step,
+        "total_points": len(track),
+        "start": datetime.fromtimestamp(start_ts, tz=timezone.utc).isoformat(),
+        "end": datetime.fromtimestamp(end_ts, tz=timezone.utc).isoformat(),
+        "reset": reset,
+        "tle_epoch": prop.tle_epoch.isoformat(),
+        "cursor": make_cursor(last_ts, step, epoch_ms)
+    })
+
+
+@app.route("/api/track/export")
+@conditional(_fixed_window_etag, _fixed_window_cache_control)
+def api_track_export():
+    """
+    Stream a long-range ground track as a file download.
+
+    Output is generated chunk by chunk from the batch propagator, so memory
+    use does not depend on the window length.
+
+    Query params:
+        satellite: satellite key (default: noaa21)
+        start: ISO datetime (default: now)
+        end: ISO datetime (default: start + duration)
+        duration: minutes from start (default: 1440, max: 62 days)
+        step: seconds between positions (default: 60, min: 10)
+        format: geojson, czml or csv (default: geojson)
+        tle_epoch: pins the TLE epoch, as for /api/track
+    """
+    sat_key = request.args.get("satellite", DEFAULT_SATELLITE)
+    if sat_key not in SATELLITE_CATALOG:
+        sat_key = DEFAULT_SATELLITE
+
+    fmt = request.args.get("format", "geojson").lower()
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({
+            "error": f"Unknown format: {fmt}",
+            "available": list(EXPORT_FORMATS.keys())
+        }), 400
+
+    step = request.args.get("step", default=60, type=int)
+    step = max(10, min(3600, step))
+
+    try:
+        start_str = request.args.get("start")
+        start = parse_datetime(start_str) if start_str else datetime.now(timezone.utc)
+        if start.tzinfo is None:
+            start = start.replace(tzinfo=timezone.utc)
+
+        end_str = request.args.get("end")
+        if end_str:
+            end = parse_datetime(end_str)
+            if end.tzinfo is None:
+                end = end.replace(tzinfo=timezone.utc)
+        else:
+            duration = request.args.get("duration", default=1440, type=int)
+            end = start + timedelta(minutes=duration)
+    except ValueError:
+        return jsonify({"error": "Invalid start or end datetime"}), 400
+
+    if end <= start:
+        return jsonify({"error": "end must be after start"}), 400
+    end = min(end, start + timedelta(days=EXPORT_MAX_DAYS))
+
+    prop = get_propagator(sat_key)
+    sat_info = SATELLITE_CATALOG[sat_key]
+    mimetype, extension = EXPORT_FORMATS[fmt]
+    filename = f"{sat_key}_{start:%Y%m%dT%H%M%S}_{end:%Y%m%dT%H%M%S}.{extension}"
+
+    return Response(
+        export_track(prop, sat_info, start, end, step, fmt),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
+
+
 @app.route("/api/orbit-info")
 def api_orbit_info():
     """Return orbital parameters and TLE metadata.
@@ -363,8 +688,14 @@ def api_constellation_current():
 # SIMBAD Astronomical Database Endpoints
 # ============================================
 
-SIMBAD_TAP_URL = "https://simbad.u-strasbg.fr/simbad/sim-tap/sync"
-SIMBAD_RESOLVE_URL = "https://simbad.u-strasbg.fr/simbad/sim-nameresolver"
+# Overridable so load tests can point at a local stand-in (see loadtest/)
+SIMBAD_TAP_URL = os.environ.get(
+    "SIMBAD_TAP_URL", "https://simbad.u-strasbg.fr/simbad/sim-tap/sync")
+SIMBAD_RESOLVE_URL = os.environ.get(
+    "SIMBAD_RESOLVE_URL", "https://simbad.u-strasbg.fr/simbad/sim-nameresolver")
+
+# Total time one API request may spend across its sequential SIMBAD calls
+SIMBAD_BUDGET_SECONDS = 25
 
 # Common SIMBAD object type codes to readable names
 SIMBAD_OBJECT_TYPES = {
@@ -431,8 +762,10 @@ def get_object_type_name(type_code: str) -> str:
         return "Unknown"
     return SIMBAD_OBJECT_TYPES.get(type_code, type_code)
 
-# HiPS2FITS service for image cutouts from multiple surveys
-HIPS2FITS_URL = "https://alasky.cds.unistra.fr/hips-image-services/hips2fits"
+# HiPS2FITS service for image cutouts from multiple surveys (overridable
+# like the SIMBAD URLs)
+HIPS2FITS_URL = os.environ.get(
+    "HIPS2FITS_URL", "https://alasky.cds.unistra.fr/hips-image-services/hips2fits")
 
 # Available HiPS surveys for image cutouts
 AVAILABLE_SURVEYS = {
@@ -481,17 +814,195 @@ AVAILABLE_SURVEYS = {
 }
 
 
+# Region queries are answered from cached HEALPix tiles (see simbad_tiles.py)
+SIMBAD_TILE_ROWS = 3000  # Row limit of one tile fetch
+
+# Wide-field queries (/api/simbad/region/pages) are split into pages of
+# tiles, each small enough to fetch well within SIMBAD_BUDGET_SECONDS
+SIMBAD_WIDE_MAX_RADIUS = 20.0
+SIMBAD_WIDE_PAGE_TILES = 8
+
+SIMBAD_REGION_COLUMNS = ("b.main_id, b.ra, b.dec, b.otype, b.sp_type, "
+                         "b.plx_value, b.rvz_radvel, b.galdim_majaxis, b.oid")
+
+# Bands fetched with region results (SIMBAD's flux table has one row per filter)
+SIMBAD_FLUX_BANDS = ("B", "V", "R", "G", "J")
+
+# Region ranking (interesting objects first): priority, readable-name
+# keyword, type codes. Shared by the ADQL ORDER BY and the tile cache.
+SIMBAD_PRIORITY_RULES = [
+    (1, "galaxy", ("G", "GiC", "GiG", "GiP", "IG")),
+    (2, "nebula", ("Neb", "PN", "HII", "RNe")),
+    (3, "cluster", ("GlC", "OpC", "Cl*")),
+    (4, "supernova", ("SN", "SNR")),
+    (5, "pulsar", ("Psr",)),
+    (6, "quasar", ("QSO",)),
+    (7, None, ("AGN", "Bla")),
+]
+BRIGHT_STAR_PRIORITY = 8  # V < BRIGHT_STAR_MAGNITUDE, otherwise uninteresting
+BRIGHT_STAR_MAGNITUDE = 4
+DEFAULT_PRIORITY = 10
+
+
+def _simbad_priority(obj_type: str, type_code: str, magnitude_v) -> int:
+    """Sort priority for region results (interesting objects first)."""
+    obj_type = (obj_type or "").lower()
+    type_code = (type_code or "").lower()
+    for priority, keyword, codes in SIMBAD_PRIORITY_RULES:
+        if (keyword and keyword in obj_type) or type_code in (c.lower() for c in codes):
+            return priority
+    if magnitude_v is not None and magnitude_v < BRIGHT_STAR_MAGNITUDE:
+        return BRIGHT_STAR_PRIORITY
+    return DEFAULT_PRIORITY
+
+
+def _simbad_priority_sql(otype: str, magnitude_v: str) -> str:
+    """ADQL CASE expression equivalent to _simbad_priority."""
+    whens = []
+    for priority, keyword, codes in SIMBAD_PRIORITY_RULES:
+        codes = set(codes)
+        if keyword:
+            codes.update(code for code, name in SIMBAD_OBJECT_TYPES.items()
+                         if keyword in name.lower())
+        listed = ", ".join(f"'{code}'" for code in sorted(codes))
+        whens.append(f"WHEN {otype} IN ({listed}) THEN {priority}")
+    whens.append(f"WHEN {magnitude_v} < {BRIGHT_STAR_MAGNITUDE} THEN {BRIGHT_STAR_PRIORITY}")
+    return f"CASE {' '.join(whens)} ELSE {DEFAULT_PRIORITY} END"
+
+
+SIMBAD_PRIORITY_SQL = _simbad_priority_sql("b.otype", "fv.flux")
+
+
+def _simbad_region_object(row: list) -> dict:
+    """Build a region result from a basic-table row followed by its band fluxes."""
+    magnitudes = {band: value for band, value in zip(SIMBAD_FLUX_BANDS, row[9:])
+                  if value is not None}
+    obj = {
+        "name": row[0],
+        "ra": row[1],
+        "dec": row[2],
+        "type": get_object_type_name(row[3]) if row[3] else "Unknown",
+        "type_code": row[3],
+        "spectral_type": row[4],
+        "parallax_mas": row[5],
+        "radial_velocity_kms": row[6],
+        "angular_size_arcmin": row[7],
+        "oid": row[8],
+        "magnitudes": magnitudes,
+        "magnitude_v": magnitudes.get("V")
+    }
+
+    # Calculate distance if parallax available
+    if obj["parallax_mas"] and obj["parallax_mas"] > 0:
+        obj["distance_ly"] = 3261.5 / obj["parallax_mas"]
+        obj["distance_pc"] = 1000.0 / obj["parallax_mas"]
+
+    obj["priority"] = _simbad_priority(obj["type"], obj["type_code"], obj["magnitude_v"])
+    return obj
+
+
+def _simbad_tap(query: str) -> dict:
+    """Run a synchronous ADQL query on SIMBAD TAP and return the JSON result."""
+    response = upstream.get("simbad_tap", SIMBAD_TAP_URL, params={
+        "request": "doQuery",
+        "lang": "adql",
+        "format": "json",
+        "query": query
+    })
+    response.raise_for_status()
+    return response.json()
+
+
+def _fetch_simbad_tile(order: int, pixel: int):
+    """
+    Fetch the objects of one HEALPix tile with their magnitudes.
+
+    One query over the circle covering the tile, joined to the flux table
+    once per band and ranked by SIMBAD itself, so that when the row limit
+    is hit the rows dropped are the least interesting ones. The ranking
+    keys are selected as aliased columns (ADQL sorts by columns, not
+    expressions). If TAP rejects that query (HTTP 400), the tile is fetched
+    unordered instead; the tile cache ranks objects locally either way.
+    The tile cache keeps the objects that fall inside the tile itself.
+
+    Returns:
+        (objects, truncated) where truncated means the row limit was hit
+    """
+    (ra,), (dec,) = pix2ang(order, [pixel])
+    radius = math.degrees(max_pixrad(order))
+
+    flux_columns = ", ".join(f"f{band.lower()}.flux" for band in SIMBAD_FLUX_BANDS)
+    flux_joins = "\n".join(
+        f"LEFT JOIN flux AS f{band.lower()} "
+        f"ON f{band.lower()}.oidref = b.oid AND f{band.lower()}.filter = '{band}'"
+        for band in SIMBAD_FLUX_BANDS
+    )
+    query = f"""
+        SELECT TOP {SIMBAD_TILE_ROWS} {SIMBAD_REGION_COLUMNS}, {flux_columns}{{ranking}}
+        FROM basic AS b
+        {flux_joins}
+        WHERE CONTAINS(POINT('ICRS', b.ra, b.dec), CIRCLE('ICRS', {ra:.8f}, {dec:.8f}, {radius:.8f})) = 1
+        {{order}}
+    """
+    try:
+        # The ranking columns follow the fluxes, so _simbad_region_object
+        # ignores them
+        rows = _simbad_tap(query.format(
+            ranking=f", {SIMBAD_PRIORITY_SQL} AS prio, COALESCE(fv.flux, 99) AS vmag",
+            order="ORDER BY prio, vmag")).get("data") or []
+    except http_requests.exceptions.HTTPError as e:
+        if e.response is None or e.response.status_code != 400:
+            raise
+        print(f"SIMBAD rejected the ranked tile query, fetching unordered: {e}")
+        rows = _simbad_tap(query.format(ranking="", order="")).get("data") or []
+
+    objects = [_simbad_region_object(row) for row in rows]
+    return objects, len(rows) >= SIMBAD_TILE_ROWS
+
+
+simbad_tiles = SimbadTileCache(_fetch_simbad_tile)
+
+# Offline catalog of bright and common objects (see local_catalog.py),
+# loaded during warmup or on first use
+_local_catalog = None
+_local_catalog_lock = threading.Lock()
+
+
+def get_local_catalog() -> LocalCatalog:
+    """The local object catalog, ranked like SIMBAD region results."""
+    global _local_catalog
+    if _local_catalog is None:
+        with _local_catalog_lock:
+            if _local_catalog is None:
+                _local_catalog = load_catalog(_simbad_priority)
+    return _local_catalog
+
+
+warmup.add("local_catalog", get_local_catalog)
+
+
 @app.route("/api/simbad/region")
+@upstream.deadline(SIMBAD_BUDGET_SECONDS)
 def api_simbad_region():
     """
     Query SIMBAD for objects in a circular region of the sky.
-    Includes magnitude data from the allfluxes table.
+    Includes B, V, R, G and J magnitudes from the flux table.
+
+    Answered from the local catalog when it has objects in the region,
+    otherwise from cached HEALPix tiles; only tiles not seen before are
+    fetched from SIMBAD. Objects are ranked (galaxies, nebulae, clusters
+    and other interesting types first, then by brightness) and the best
+    `limit` are returned.
 
     Query params:
         ra: Right Ascension in degrees (required)
         dec: Declination in degrees (required)
         radius: Search radius in degrees (default: 1.0)
         limit: Max objects to return (default: 20)
+        deep: 1 to skip the local catalog and query SIMBAD
+
+    Radius is capped at 5 degrees and limit at 50; wider fields and
+    complete object lists come from /api/simbad/region/pages.
     """
     ra = request.args.get("ra", type=float)
     dec = request.args.get("dec", type=float)
@@ -505,116 +1016,22 @@ def api_simbad_region():
     radius = max(0.01, min(5.0, radius))
     limit = max(1, min(50, limit))
 
-    # ADQL query for basic object info
-    # Note: SIMBAD's flux table stores one row per filter, not columns
-    # We query basic info first, then get V magnitude with a subquery
-    query = f"""
-        SELECT TOP {limit}
-            main_id, ra, dec, otype, sp_type,
-            plx_value, rvz_radvel, galdim_majaxis, oid
-        FROM basic
-        WHERE CONTAINS(POINT('ICRS', ra, dec), CIRCLE('ICRS', {ra}, {dec}, {radius})) = 1
-    """
+    if request.args.get("deep") != "1":
+        objects = get_local_catalog().cone(ra, dec, radius, limit)
+        if objects:
+            return jsonify({
+                "objects": objects,
+                "count": len(objects),
+                "query": {
+                    "ra": ra,
+                    "dec": dec,
+                    "radius": radius
+                },
+                "source": "local"
+            })
 
     try:
-        response = http_requests.get(
-            SIMBAD_TAP_URL,
-            params={
-                "request": "doQuery",
-                "lang": "adql",
-                "format": "json",
-                "query": query
-            },
-            timeout=20
-        )
-        response.raise_for_status()
-        data = response.json()
-
-        # Parse results
-        objects = []
-        oid_list = []  # Collect OIDs for flux lookup
-        if "data" in data and data["data"]:
-            for row in data["data"]:
-                obj = {
-                    "name": row[0],
-                    "ra": row[1],
-                    "dec": row[2],
-                    "type": get_object_type_name(row[3]) if row[3] else "Unknown",
-                    "type_code": row[3],
-                    "spectral_type": row[4],
-                    "parallax_mas": row[5],
-                    "radial_velocity_kms": row[6],
-                    "angular_size_arcmin": row[7],
-                    "oid": row[8],
-                    "magnitudes": {},
-                    "magnitude_v": None
-                }
-
-                # Calculate distance if parallax available
-                if obj["parallax_mas"] and obj["parallax_mas"] > 0:
-                    obj["distance_ly"] = 3261.5 / obj["parallax_mas"]
-                    obj["distance_pc"] = 1000.0 / obj["parallax_mas"]
-
-                # Assign priority for sorting (interesting objects first)
-                obj_type = (obj["type"] or "").lower()
-                type_code = (obj["type_code"] or "").lower()
-                if "galaxy" in obj_type or type_code in ("g", "gic", "gig", "gip", "ig"):
-                    obj["priority"] = 1
-                elif "nebula" in obj_type or type_code in ("neb", "pn", "hii", "rne"):
-                    obj["priority"] = 2
-                elif "cluster" in obj_type or type_code in ("glc", "opc", "cl*"):
-                    obj["priority"] = 3
-                elif "supernova" in obj_type or type_code in ("sn", "snr"):
-                    obj["priority"] = 4
-                elif "pulsar" in obj_type or type_code == "psr":
-                    obj["priority"] = 5
-                elif "quasar" in obj_type or type_code == "qso":
-                    obj["priority"] = 6
-                elif "agn" in type_code or "bla" in type_code:
-                    obj["priority"] = 7
-                else:
-                    obj["priority"] = 10
-
-                objects.append(obj)
-                oid_list.append(obj["oid"])
-
-        # Fetch V magnitudes for all objects in a second query
-        if oid_list:
-            try:
-                oid_str = ",".join(str(oid) for oid in oid_list)
-                flux_query = f"""
-                    SELECT oidref, flux
-                    FROM flux
-                    WHERE oidref IN ({oid_str}) AND filter = 'V'
-                """
-                flux_response = http_requests.get(
-                    SIMBAD_TAP_URL,
-                    params={
-                        "request": "doQuery",
-                        "lang": "adql",
-                        "format": "json",
-                        "query": flux_query
-                    },
-                    timeout=10
-                )
-                if flux_response.ok:
-                    flux_data = flux_response.json()
-                    if "data" in flux_data:
-                        # Build oid -> magnitude map
-                        mag_map = {row[0]: row[1] for row in flux_data["data"]}
-                        for obj in objects:
-                            if obj["oid"] in mag_map:
-                                obj["magnitude_v"] = mag_map[obj["oid"]]
-                                obj["magnitudes"]["V"] = mag_map[obj["oid"]]
-                                # Boost priority for bright stars
-                                if mag_map[obj["oid"]] < 4 and obj["priority"] == 10:
-                                    obj["priority"] = 8
-            except Exception as e:
-                print(f"Flux query failed: {e}")
-                # Continue without magnitudes
-
-            # Sort by priority, then by brightness
-            objects.sort(key=lambda x: (x["priority"], x.get("magnitude_v") or 99))
+        objects, tiles = simbad_tiles.query(ra, dec, radius, limit)
 
         return jsonify({
             "objects": objects,
@@ -623,7 +1040,9 @@ def api_simbad_region():
                 "ra": ra,
                 "dec": dec,
                 "radius": radius
-            }
+            },
+            "tiles": tiles,
+            "source": "simbad"
         })
 
     except http_requests.exceptions.Timeout:
@@ -635,132 +1054,514 @@ def api_simbad_region():
         return jsonify({"error": f"Query processing error: {str(e)}", "objects": []}), 500
 
 
+@app.route("/api/simbad/region/pages")
+@upstream.deadline(SIMBAD_BUDGET_SECONDS)
+def api_simbad_region_pages():
+    """
+    Every SIMBAD object in a wide circular region, one page at a time.
+
+    The region's tiles are ordered nearest the center first and cut into
+    pages of SIMBAD_WIDE_PAGE_TILES tiles. Each call fetches one page's
+    tiles concurrently (cached ones cost nothing), returns all of their
+    objects inside the circle, and starts fetching the next page's tiles in
+    the background, so a client walking the pages rarely waits on SIMBAD.
+    A page that fails can be requested again: the tiles that did arrive
+    stay cached.
+
+    Query params:
+        ra: Right Ascension in degrees (required)
+        dec: Declination in degrees (required)
+        radius: Search radius in degrees (default: 5.0, max 20)
+        page: Page number, from 0 (default: 0)
+
+    Returns the objects ranked within the page, "page", "pages" and
+    "next_page" (null after the last page).
+    """
+    ra = request.args.get("ra", type=float)
+    dec = request.args.get("dec", type=float)
+    radius = request.args.get("radius", default=5.0, type=float)
+    page = request.args.get("page", default=0, type=int)
+
+    if ra is None or dec is None:
+        return jsonify({"error": "ra and dec parameters required"}), 400
+
+    radius = max(0.01, min(SIMBAD_WIDE_MAX_RADIUS, radius))
+    pixels = simbad_tiles.plan(ra, dec, radius)
+    pages = math.ceil(len(pixels) / SIMBAD_WIDE_PAGE_TILES)
+    if not 0 <= page < pages:
+        return jsonify({"error": f"page must be between 0 and {pages - 1}"}), 400
+
+    start = page * SIMBAD_WIDE_PAGE_TILES
+    page_pixels = pixels[start:start + SIMBAD_WIDE_PAGE_TILES]
+    next_pixels = pixels[start + SIMBAD_WIDE_PAGE_TILES:start + 2 * SIMBAD_WIDE_PAGE_TILES]
+
+    try:
+        objects, tiles = simbad_tiles.query_tiles(page_pixels, ra, dec, radius)
+        # After this page's fetches, which the tile pool serves in order
+        prefetching = simbad_tiles.prefetch(next_pixels)
+    except http_requests.exceptions.Timeout:
+        return jsonify({"error": "SIMBAD query timed out", "objects": []}), 504
+    except http_requests.exceptions.RequestException as e:
+        return jsonify({"error": f"SIMBAD request failed: {str(e)}", "objects": []}), 502
+    except Exception as e:
+        print(f"SIMBAD error: {e}")
+        return jsonify({"error": f"Query processing error: {str(e)}", "objects": []}), 500
+
+    tiles["prefetching"] = prefetching
+    return jsonify({
+        "objects": objects,
+        "count": len(objects),
+        "page": page,
+        "pages": pages,
+        "next_page": page + 1 if page + 1 < pages else None,
+        "query": {
+            "ra": ra,
+            "dec": dec,
+            "radius": radius
+        },
+        "tiles": tiles,
+        "source": "simbad"
+    })
+
+
+# Persistent name -> result cache in front of both resolution paths
+resolver_cache = ResolverCache()
+
+
+def resolve_simbad_name(name: str) -> dict:
+    """
+    Resolve one object name, from the name cache or the SIMBAD name resolver.
+    Also fetches detailed information about the object.
+
+    Returns:
+        Result dict; found is False if SIMBAD does not know the name
+
+    Raises:
+        requests.RequestException: The name resolver call failed
+    """
+    cached = resolver_cache.get(name)
+    if cached is not None:
+        return cached
+
+    # First resolve the name to get coordinates
+    response = upstream.get("simbad_resolver", SIMBAD_RESOLVE_URL, params={
+        "ident": name,
+        "output": "json"
+    })
+    response.raise_for_status()
+    data = response.json()
+
+    if not data or len(data) == 0:
+        result = {
+            "found": False,
+            "name": name,
+            "error": "Object not found"
+        }
+        resolver_cache.put(name, result)
+        return result
+
+    # Find the first object with coordinates (some results like moving groups don't have them)
+    obj = None
+    for item in data:
+        if "ra" in item and "dec" in item:
+            obj = item
+            break
+
+    if obj is None:
+        result = {
+            "found": False,
+            "name": name,
+            "error": "No object with coordinates found"
+        }
+        resolver_cache.put(name, result)
+        return result
+    # Get readable type name
+    type_code = obj.get("otype", "")
+    result = {
+        "found": True,
+        "name": obj.get("mainId") or obj.get("name", name),
+        "ra": obj["ra"],
+        "dec": obj["dec"],
+        "type": get_object_type_name(type_code),
+        "type_code": type_code,
+        "spectral_type": obj.get("sptype"),
+        "aliases": obj.get("idlist", [])[:10]  # Limit aliases
+    }
+
+    # Now query for detailed info using oid from nameresolver
+    oid = obj.get("oid")
+    complete = True
+    if oid:
+        try:
+            detail_query = f"""
+                SELECT main_id, otype, sp_type, plx_value,
+                       rvz_radvel, galdim_majaxis
+                FROM basic
+                WHERE oid = {oid}
+            """
+            detail_response = upstream.get("simbad_tap", SIMBAD_TAP_URL, params={
+                "request": "doQuery",
+                "lang": "adql",
+                "format": "json",
+                "query": detail_query
+            })
+            if detail_response.ok:
+                detail_data = detail_response.json()
+                if detail_data.get("data") and len(detail_data["data"]) > 0:
+                    row = detail_data["data"][0]
+                    result["name"] = row[0] or result["name"]
+                    result["type"] = get_object_type_name(row[1])
+                    result["type_code"] = row[1]
+                    result["spectral_type"] = row[2]
+                    result["parallax_mas"] = row[3]
+                    result["radial_velocity_kms"] = row[4]
+                    result["angular_size_arcmin"] = row[5]
+                    if result["parallax_mas"] and result["parallax_mas"] > 0:
+                        result["distance_ly"] = 3261.5 / result["parallax_mas"]
+
+            # Get V magnitude
+            flux_query = f"SELECT flux FROM flux WHERE oidref = {oid} AND filter = 'V'"
+            flux_response = upstream.get("simbad_tap", SIMBAD_TAP_URL, params={
+                "request": "doQuery",
+                "lang": "adql",
+                "format": "json",
+                "query": flux_query
+            })
+            if flux_response.ok:
+                flux_data = flux_response.json()
+                if flux_data.get("data") and len(flux_data["data"]) > 0:
+                    result["magnitude_v"] = flux_data["data"][0][0]
+                    result["magnitudes"] = {"V": flux_data["data"][0][0]}
+        except Exception as e:
+            print(f"Detail query failed: {e}")
+            # Continue with basic info, but don't cache it
+            complete = False
+
+    if complete:
+        resolver_cache.put(name, result, aliases=obj.get("idlist", []))
+    return result
+
+
 @app.route("/api/simbad/resolve")
+@upstream.deadline(SIMBAD_BUDGET_SECONDS)
 def api_simbad_resolve():
     """
     Resolve an object name to coordinates using SIMBAD.
     Also fetches detailed information about the object.
 
+    Bright and common objects are answered from the local catalog.
+
     Query params:
         name: Object name to resolve (required)
+        deep: 1 to skip the local catalog and ask SIMBAD
     """
     name = request.args.get("name", "").strip()
 
     if not name:
         return jsonify({"error": "name parameter required"}), 400
 
+    if request.args.get("deep") != "1":
+        local = get_local_catalog().resolve(name)
+        if local is not None:
+            return jsonify(local)
+
     try:
-        # First resolve the name to get coordinates
-        response = http_requests.get(
-            SIMBAD_RESOLVE_URL,
-            params={
-                "ident": name,
-                "output": "json"
-            },
-            timeout=10
-        )
-        response.raise_for_status()
-        data = response.json()
+        return jsonify(resolve_simbad_name(name))
 
-        if not data or len(data) == 0:
-            return jsonify({
-                "found": False,
-                "name": name,
-                "error": "Object not found"
-            })
+    except http_requests.exceptions.Timeout:
+        return jsonify({"error": "SIMBAD query timed out", "found": False}), 504
+    except http_requests.exceptions.RequestException as e:
+        return jsonify({"error": f"SIMBAD request failed: {str(e)}", "found": False}), 502
+    except Exception as e:
+        return jsonify({"error": f"Resolution error: {str(e)}", "found": False}), 500
 
-        # Find the first object with coordinates (some results like moving groups don't have them)
-        obj = None
-        for item in data:
-            if "ra" in item and "dec" in item:
-                obj = item
-                break
 
-        if obj is None:
-            return jsonify({
-                "found": False,
-                "name": name,
-                "error": "No object with coordinates found"
-            })
-        # Get readable type name
-        type_code = obj.get("otype", "")
+# Batch resolution: one TAP query per chunk of names against the ident
+# table; names it cannot match go through the name resolver concurrently
+SIMBAD_BATCH_MAX_NAMES = 500
+SIMBAD_BATCH_CHUNK = 100     # Names per TAP query (bounds the URL length)
+SIMBAD_BATCH_WORKERS = 8     # Concurrent queries (chunks and fallbacks)
+
+_batch_executor = None
+_batch_pid = None
+
+
+def _batch_pool() -> ThreadPoolExecutor:
+    """Thread pool for batch resolution, rebuilt in forked workers."""
+    global _batch_executor, _batch_pid
+    if _batch_executor is None or _batch_pid != os.getpid():
+        _batch_executor = ThreadPoolExecutor(max_workers=SIMBAD_BATCH_WORKERS,
+                                             thread_name_prefix="simbad-batch")
+        _batch_pid = os.getpid()
+    return _batch_executor
+
+
+def _ident_candidates(name: str) -> set:
+    """
+    Spellings of a name as SIMBAD's ident table may store it.
+
+    SIMBAD keeps identifiers case-sensitive, pads catalog numbers with
+    spaces ("M  42", "NGC  1976") and prefixes common names with "NAME"
+    ("NAME Orion Nebula"). Catalog designations are tried in upper case
+    with one to three spaces before the number; other names also as a
+    title-case common name.
+    """
+    collapsed = " ".join(name.split())
+    candidates = {collapsed}
+    match = re.fullmatch(r"([A-Za-z]+) ?(\d+[A-Za-z]?)", collapsed)
+    if match:
+        prefix, number = match.group(1).upper(), match.group(2)
+        candidates.update(f"{prefix}{' ' * pad}{number}" for pad in (1, 2, 3))
+    elif not collapsed.upper().startswith("NAME "):
+        candidates.update({f"NAME {collapsed}", f"NAME {collapsed.title()}"})
+    return candidates
+
+
+def _resolve_ident_chunk(names: list) -> dict:
+    """
+    Resolve names through one TAP query joining ident, basic and V flux.
+
+    Returns:
+        Resolved name -> result; unmatched names are absent
+    """
+    by_literal = {}
+    for name in names:
+        for literal in _ident_candidates(name):
+            by_literal.setdefault(literal, []).append(name)
+    listed = ", ".join("'" + literal.replace("'", "''") + "'" for literal in sorted(by_literal))
+
+    rows = _simbad_tap(f"""
+        SELECT i.id, b.main_id, b.ra, b.dec, b.otype, b.sp_type,
+               b.plx_value, b.rvz_radvel, b.galdim_majaxis, fv.flux
+        FROM ident AS i
+        JOIN basic AS b ON b.oid = i.oidref
+        LEFT JOIN flux AS fv ON fv.oidref = b.oid AND fv.filter = 'V'
+        WHERE i.id IN ({listed})
+    """).get("data") or []
+
+    results = {}
+    for row in rows:
+        if row[2] is None or row[3] is None:
+            continue  # No coordinates (e.g. moving groups)
         result = {
             "found": True,
-            "name": obj.get("mainId") or obj.get("name", name),
-            "ra": obj["ra"],
-            "dec": obj["dec"],
-            "type": get_object_type_name(type_code),
-            "type_code": type_code,
-            "spectral_type": obj.get("sptype"),
-            "aliases": obj.get("idlist", [])[:10]  # Limit aliases
+            "name": row[1],
+            "ra": row[2],
+            "dec": row[3],
+            "type": get_object_type_name(row[4]),
+            "type_code": row[4],
+            "spectral_type": row[5],
+            "parallax_mas": row[6],
+            "radial_velocity_kms": row[7],
+            "angular_size_arcmin": row[8],
         }
-
-        # Now query for detailed info using oid from nameresolver
-        oid = obj.get("oid")
-        if oid:
-            try:
-                detail_query = f"""
-                    SELECT main_id, otype, sp_type, plx_value,
-                           rvz_radvel, galdim_majaxis
-                    FROM basic
-                    WHERE oid = {oid}
-                """
-                detail_response = http_requests.get(
-                    SIMBAD_TAP_URL,
-                    params={
-                        "request": "doQuery",
-                        "lang": "adql",
-                        "format": "json",
-                        "query": detail_query
-                    },
-                    timeout=10
-                )
-                if detail_response.ok:
-                    detail_data = detail_response.json()
-                    if detail_data.get("data") and len(detail_data["data"]) > 0:
-                        row = detail_data["data"][0]
-                        result["name"] = row[0] or result["name"]
-                        result["type"] = get_object_type_name(row[1])
-                        result["type_code"] = row[1]
-                        result["spectral_type"] = row[2]
-                        result["parallax_mas"] = row[3]
-                        result["radial_velocity_kms"] = row[4]
-                        result["angular_size_arcmin"] = row[5]
-                        if result["parallax_mas"] and result["parallax_mas"] > 0:
-                            result["distance_ly"] = 3261.5 / result["parallax_mas"]
-
-                # Get V magnitude
-                flux_query = f"SELECT flux FROM flux WHERE oidref = {oid} AND filter = 'V'"
-                flux_response = http_requests.get(
-                    SIMBAD_TAP_URL,
-                    params={
-                        "request": "doQuery",
-                        "lang": "adql",
-                        "format": "json",
-                        "query": flux_query
-                    },
-                    timeout=10
-                )
-                if flux_response.ok:
-                    flux_data = flux_response.json()
-                    if flux_data.get("data") and len(flux_data["data"]) > 0:
-                        result["magnitude_v"] = flux_data["data"][0][0]
-                        result["magnitudes"] = {"V": flux_data["data"][0][0]}
-            except Exception as e:
-                print(f"Detail query failed: {e}")
-                # Continue with basic info
-
-        return jsonify(result)
-
+        if result["parallax_mas"] and result["parallax_mas"] > 0:
+            result["distance_ly"] = 3261.5 / result["parallax_mas"]
+        if row[9] is not None:
+            result["magnitude_v"] = row[9]
+            result["magnitudes"] = {"V": row[9]}
+        for name in by_literal.get(row[0], []):
+            results[name] = result
+            resolver_cache.put(name, result, aliases=[row[0]], partial=True)
+    return results
+
+
+def _resolve_one_safely(name: str) -> dict:
+    """resolve_simbad_name with failures reported in the result."""
+    try:
+        return resolve_simbad_name(name)
     except http_requests.exceptions.Timeout:
-        return jsonify({"error": "SIMBAD query timed out", "found": False}), 504
+        return {"found": False, "name": name, "error": "SIMBAD query timed out"}
     except http_requests.exceptions.RequestException as e:
-        return jsonify({"error": f"SIMBAD request failed: {str(e)}", "found": False}), 502
+        return {"found": False, "name": name, "error": f"SIMBAD request failed: {str(e)}"}
     except Exception as e:
-        return jsonify({"error": f"Resolution error: {str(e)}", "found": False}), 500
+        print(f"SIMBAD resolve error for {name}: {e}")
+        return {"found": False, "name": name, "error": f"Resolution error: {str(e)}"}
+
+
+def resolve_simbad_names(names: list, deep: bool = False) -> dict:
+    """
+    Resolve many object names with a few SIMBAD round trips.
+
+    Names in the local catalog (unless deep) and cached names are answered
+    without SIMBAD. The rest are matched
+    in chunks against SIMBAD's ident table, one TAP query per chunk
+    (queries run concurrently). Only names that no query matched go
+    through the name resolver, also concurrently. A chunk whose query
+    fails, for whatever reason, falls back the same way, and a name whose
+    resolution fails gets an error result, so one failure never fails the
+    batch.
+
+    Returns:
+        Requested name -> result, as from resolve_simbad_name (results of
+        the ident query carry no aliases)
+    """
+    results = {}
+    for name in names:
+        known = None if deep else get_local_catalog().resolve(name)
+        if known is None:
+            known = resolver_cache.get(name)
+        if known is not None:
+            results[name] = known
+
+    pool = _batch_pool()
+    uncached = [name for name in names if name not in results]
+    chunks = [uncached[i:i + SIMBAD_BATCH_CHUNK]
+              for i in range(0, len(uncached), SIMBAD_BATCH_CHUNK)]
+
+    # Worker threads need the request's deadline and trace context
+    futures = [pool.submit(contextvars.copy_context().run, _resolve_ident_chunk, chunk)
+               for chunk in chunks]
+    for future in futures:
+        try:
+            results.update(future.result())
+        except Exception as e:
+            print(f"SIMBAD ident query failed, resolving names one by one: {e}")
+
+    misses = [name for name in names if name not in results]
+    futures = {name: pool.submit(contextvars.copy_context().run, _resolve_one_safely, name)
+               for name in misses}
+    for name, future in futures.items():
+        results[name] = future.result()
+
+    return {name: results[name] for name in names}
+
+
+# Opt-in: resolve the planner's Messier and Caldwell objects at startup
+if os.environ.get("SIMBAD_PREWARM") == "1":
+    warmup.add("simbad_names",
+               lambda: prewarm_names(partial(resolve_simbad_names, deep=True), resolver_cache))
+
+
+@app.route("/api/simbad/resolve/batch", methods=["GET", "POST"])
+@upstream.deadline(SIMBAD_BUDGET_SECONDS)
+def api_simbad_resolve_batch():
+    """
+    Resolve many object names at once.
+
+    Query params (GET):
+        names: Comma-separated object names
+        deep: 1 to skip the local catalog
+    JSON body (POST):
+        {"names": ["M42", "NGC 7000", ...], "deep": false}
+
+    Returns {"results": {name: result}} with results shaped like
+    /api/simbad/resolve. At most SIMBAD_BATCH_MAX_NAMES names per call.
+    """
+    if request.method == "POST":
+        body = request.get_json(silent=True) or {}
+        names = body.get("names")
+        deep = bool(body.get("deep"))
+        if not isinstance(names, list):
+            return jsonify({"error": "JSON body with a names list required"}), 400
+    else:
+        names = request.args.get("names", "").split(",")
+        deep = request.args.get("deep") == "1"
+
+    # Deduplicate, keeping request order
+    names = list(dict.fromkeys(str(n).strip() for n in names if str(n).strip()))
+    if not names:
+        return jsonify({"error": "names required"}), 400
+    if len(names) > SIMBAD_BATCH_MAX_NAMES:
+        return jsonify({"error": f"At most {SIMBAD_BATCH_MAX_NAMES} names per request"}), 400
+
+    try:
+        results = resolve_simbad_names(names, deep)
+    except Exception as e:
+        print(f"SIMBAD batch error: {e}")
+        return jsonify({"error": f"Resolution error: {str(e)}"}), 500
+
+    return jsonify({
+        "results": results,
+        "count": len(results),
+        "found": sum(1 for r in results.values() if r.get("found"))
+    })
+
+
+# ============================================
+# Search suggestions
+# ============================================
+
+# The index is rebuilt in the background this often, so objects resolved
+# through SIMBAD since the last build become suggestions too
+SEARCH_REBUILD_MINUTES = float(os.environ.get("SEARCH_REBUILD_MINUTES", 10))
+SEARCH_MAX_SUGGESTIONS = 25
+
+_search_index = None
+_search_built_at = 0.0
+_search_lock = threading.Lock()
+
+
+def _build_search_index():
+    global _search_index, _search_built_at
+    entries = build_entries(get_local_catalog().objects, resolver_cache.found())
+    _search_index = SearchIndex(entries)
+    _search_built_at = time.monotonic()
+
+
+def _rebuild_search_index():
+    try:
+        _build_search_index()
+    except Exception as e:
+        print(f"Search index rebuild failed: {e}")
+    finally:
+        _search_lock.release()
+
+
+def get_search_index() -> SearchIndex:
+    """The search index; built on first use, refreshed in the background."""
+    if _search_index is None:
+        with _search_lock:
+            if _search_index is None:
+                _build_search_index()
+    elif (time.monotonic() - _search_built_at > SEARCH_REBUILD_MINUTES * 60
+          and _search_lock.acquire(blocking=False)):
+        # Keep serving the current index while the new one is built
+        threading.Thread(target=_rebuild_search_index, name="search-index",
+                         daemon=True).start()
+    return _search_index
+
+
+warmup.add("search_index", get_search_index, requires=["local_catalog"])
+
+
+@app.route("/api/search/suggest")
+def api_search_suggest():
+    """
+    Autocomplete suggestions for a partial object or place name.
+
+    Query params:
+        q: What the user typed so far
+        limit: Most suggestions (default 10, max 25)
+        kind: "object" or "place" to restrict the results
+
+    Prefix matches come first; typos are tolerated once prefixes run out
+    (see search_index.py). Answered in-process, without upstream calls.
+    """
+    query = request.args.get("q", "").strip()
+    if not query:
+        return jsonify({"error": "q parameter required"}), 400
+    kind = request.args.get("kind")
+    if kind not in (None, "object", "place"):
+        return jsonify({"error": "kind must be object or place"}), 400
+    try:
+        limit = min(SEARCH_MAX_SUGGESTIONS, max(1, int(request.args.get("limit", 10))))
+    except ValueError:
+        return jsonify({"error": "Invalid limit"}), 400
+
+    suggestions = get_search_index().suggest(query, limit, kind)
+    return jsonify({
+        "query": query,
+        "suggestions": suggestions,
+        "count": len(suggestions)
+    })
+
+
+SURVEYS_VERSION = make_etag(AVAILABLE_SURVEYS)
 
 
 @app.route("/api/surveys")
+@conditional(lambda: query_etag(SURVEYS_VERSION), STATIC_CACHE)
 def api_surveys():
     """Return list of available image surveys."""
     return jsonify({
@@ -775,69 +1576,160 @@ def api_surveys():
     })
 
 
-@app.route("/api/cutout")
-def api_cutout():
+# Proxy mode (CUTOUT_PROXY=1): cutouts are fetched server-side into a
+# shared disk cache (see cutout_cache.py) and served from /api/cutout/image
+CUTOUT_BUDGET_SECONDS = 45
+CUTOUT_THUMB_MIN = 32
+CUTOUT_THUMB_MAX = 400
+
+
+def _hips2fits_url(key) -> str:
+    """HiPS2FITS URL of a normalized cutout request."""
+    return (
+        f"{HIPS2FITS_URL}?"
+        f"hips={AVAILABLE_SURVEYS[key.survey]}&"
+        f"ra={key.ra}&dec={key.dec}&"
+        f"fov={key.fov}&"
+        f"width={key.width}&height={key.height}&"
+        f"projection=TAN&"
+        f"format={key.format}"
+    )
+
+
+def _fetch_cutout(key):
+    response = upstream.get("hips2fits", _hips2fits_url(key))
+    response.raise_for_status()
+    content_type = response.headers.get("Content-Type", "").split(";")[0].strip()
+    # Failures inside the service come back as text, not as an image
+    if content_type.startswith("text/") or content_type == "application/json":
+        raise ValueError(f"HiPS2FITS answered with {content_type}: {response.text[:200]}")
+    return response.content, content_type or CONTENT_TYPES[key.format]
+
+
+cutouts = CutoutCache(_fetch_cutout)
+
+
+def _cutout_url(key, thumb: int = None) -> str:
+    """Where clients load a cutout: this server in proxy mode, else CDS."""
+    if not CUTOUT_PROXY:
+        return _hips2fits_url(key)
+    params = {"survey": key.survey, "ra": key.ra, "dec": key.dec, "fov": key.fov,
+              "width": key.width, "height": key.height, "format": key.format}
+    if thumb:
+        params["thumb"] = thumb
+    return url_for("api_cutout_image", _external=True, **params)
+
+
+def _parse_cutout(default_size: int, survey: str = None):
     """
-    Get image cutout URL from HiPS2FITS service.
+    Normalized cutout key from the query params, or an error response.
 
-    Query params:
-        ra: Right Ascension in degrees (required)
-        dec: Declination in degrees (required)
-        fov: Field of view in degrees (default: 0.1)
-        survey: Survey key from AVAILABLE_SURVEYS (default: dss2_color)
-        width: Image width in pixels (default: 500)
-        height: Image height in pixels (default: 500)
-        format: Output format - fits or jpg (default: jpg)
+    Args:
+        default_size: Width and height when not given
+        survey: Survey to use instead of the survey param
+
+    Returns:
+        (key, None) or (None, (response, status))
     """
     ra = request.args.get("ra", type=float)
     dec = request.args.get("dec", type=float)
     fov = request.args.get("fov", default=0.1, type=float)
-    survey = request.args.get("survey", default="dss2_color")
-    width = request.args.get("width", default=500, type=int)
-    height = request.args.get("height", default=500, type=int)
+    survey = survey or request.args.get("survey", default="dss2_color")
+    width = request.args.get("width", default=default_size, type=int)
+    height = request.args.get("height", default=default_size, type=int)
     output_format = request.args.get("format", default="jpg")
 
     if ra is None or dec is None:
-        return jsonify({"error": "ra and dec parameters required"}), 400
+        return None, (jsonify({"error": "ra and dec parameters required"}), 400)
 
     # Validate survey
-    hips_id = AVAILABLE_SURVEYS.get(survey)
-    if not hips_id:
-        return jsonify({
+    if survey not in AVAILABLE_SURVEYS:
+        return None, (jsonify({
             "error": f"Unknown survey: {survey}",
             "available": list(AVAILABLE_SURVEYS.keys())
-        }), 400
+        }), 400)
 
     # Clamp values
     width = max(100, min(2000, width))
     height = max(100, min(2000, height))
     fov = max(0.001, min(10.0, fov))
 
-    # Build HiPS2FITS URL
-    cutout_url = (
-        f"{HIPS2FITS_URL}?"
-        f"hips={hips_id}&"
-        f"ra={ra}&dec={dec}&"
-        f"fov={fov}&"
-        f"width={width}&height={height}&"
-        f"projection=TAN&"
-        f"format={output_format}"
-    )
+    key = cutout_key(survey, ra, dec, fov, width, height, output_format)
+    if CUTOUT_PROXY and key.format not in CONTENT_TYPES:
+        return None, (jsonify({"error": f"Unsupported format: {output_format}"}), 400)
+    return key, None
+
+
+@app.route("/api/cutout")
+def api_cutout():
+    """
+    Get image cutout URL from HiPS2FITS service.
+
+    Query params:
+        ra: Right Ascension in degrees (required)
+        dec: Declination in degrees (required)
+        fov: Field of view in degrees (default: 0.1)
+        survey: Survey key from AVAILABLE_SURVEYS (default: dss2_color)
+        width: Image width in pixels (default: 500)
+        height: Image height in pixels (default: 500)
+        format: Output format - fits or jpg (default: jpg)
+
+    In proxy mode the URLs point at /api/cutout/image on this server.
+    """
+    key, error = _parse_cutout(500)
+    if error:
+        return error
 
     return jsonify({
-        "url": cutout_url,
-        "survey": survey,
-        "hips_id": hips_id,
-        "ra": ra,
-        "dec": dec,
-        "fov_deg": fov,
-        "width": width,
-        "height": height,
-        "format": output_format
+        "url": _cutout_url(key),
+        "survey": key.survey,
+        "hips_id": AVAILABLE_SURVEYS[key.survey],
+        "ra": key.ra,
+        "dec": key.dec,
+        "fov_deg": key.fov,
+        "width": key.width,
+        "height": key.height,
+        "format": key.format,
+        "proxied": CUTOUT_PROXY
     })
 
 
+@app.route("/api/cutout/image")
+@upstream.deadline(CUTOUT_BUDGET_SECONDS)
+def api_cutout_image():
+    """
+    Serve a cutout image from the cache, fetching it from CDS on a miss.
+
+    Query params: as /api/cutout, plus
+        thumb: Longest side of a reduced copy in pixels (32-400)
+
+    Responses carry a strong ETag (the image's content digest) and answer
+    a matching If-None-Match with 304. Only available in proxy mode.
+    """
+    if not CUTOUT_PROXY:
+        return jsonify({"error": "Cutout proxy disabled (set CUTOUT_PROXY=1)"}), 404
+    key, error = _parse_cutout(500)
+    if error:
+        return error
+    thumb = request.args.get("thumb", type=int)
+
+    try:
+        if thumb:
+            image = cutouts.thumbnail(key, max(CUTOUT_THUMB_MIN, min(CUTOUT_THUMB_MAX, thumb)))
+        else:
+            image = cutouts.get(key)
+    except Exception as e:
+        print(f"Cutout error: {e}")
+        return jsonify({"error": f"Cutout error: {str(e)}"}), 502
+
+    response = send_file(image.path, mimetype=image.content_type, etag=image.digest,
+                         conditional=True)
+    response.headers["Cache-Control"] = STATIC_CACHE
+    return response
+
+
 @app.route("/api/cutout/multi")
+@upstream.deadline(CUTOUT_BUDGET_SECONDS)
 def api_cutout_multi():
     """
     Get cutout URLs from multiple surveys for comparison.
@@ -847,52 +1739,58 @@ def api_cutout_multi():
         dec: Declination in degrees (required)
         fov: Field of view in degrees (default: 0.1)
         surveys: Comma-separated list of surveys (default: dss2_color,sdss9_color,2mass_color)
+        width, height, format: As /api/cutout (default: 400 x 400 jpg)
+        thumb: Also return reduced copies of this size (proxy mode)
+
+    In proxy mode all surveys are fetched into the cache concurrently
+    before answering, so the image URLs returned are cache hits; a survey
+    that failed is reported with an "error".
     """
-    ra = request.args.get("ra", type=float)
-    dec = request.args.get("dec", type=float)
-    fov = request.args.get("fov", default=0.1, type=float)
     surveys_str = request.args.get("surveys", "dss2_color,sdss9_color,2mass_color")
-
-    if ra is None or dec is None:
-        return jsonify({"error": "ra and dec parameters required"}), 400
-
-    surveys = [s.strip() for s in surveys_str.split(",")]
-
-    cutouts = []
-    for survey in surveys:
-        hips_id = AVAILABLE_SURVEYS.get(survey)
-        if hips_id:
-            cutout_url = (
-                f"{HIPS2FITS_URL}?"
-                f"hips={hips_id}&"
-                f"ra={ra}&dec={dec}&"
-                f"fov={fov}&"
-                f"width=400&height=400&"
-                f"projection=TAN&"
-                f"format=jpg"
-            )
-            cutouts.append({
-                "survey": survey,
-                "hips_id": hips_id,
-                "url": cutout_url
-            })
+    thumb = request.args.get("thumb", type=int)
+
+    base, error = _parse_cutout(400, survey="dss2_color")
+    if error:
+        return error
+    surveys = dict.fromkeys(s.strip() for s in surveys_str.split(","))
+    keys = [base._replace(survey=survey) for survey in surveys if survey in AVAILABLE_SURVEYS]
+
+    results = cutouts.get_many(keys) if CUTOUT_PROXY else {}
+
+    cutout_list = []
+    for key in keys:
+        cutout = {
+            "survey": key.survey,
+            "hips_id": AVAILABLE_SURVEYS[key.survey],
+            "url": _cutout_url(key)
+        }
+        if CUTOUT_PROXY:
+            if isinstance(results[key], Exception):
+                print(f"Cutout error ({key.survey}): {results[key]}")
+                cutout["error"] = str(results[key])
+            elif thumb:
+                cutout["thumbnail_url"] = _cutout_url(
+                    key, max(CUTOUT_THUMB_MIN, min(CUTOUT_THUMB_MAX, thumb)))
+        cutout_list.append(cutout)
 
     return jsonify({
-        "cutouts": cutouts,
-        "ra": ra,
-        "dec": dec,
-        "fov_deg": fov
+        "cutouts": cutout_list,
+        "ra": base.ra,
+        "dec": base.dec,
+        "fov_deg": base.fov,
+        "proxied": CUTOUT_PROXY
     })
 
 
 if __name__ == "__main__":
     print("Starting JPSS Constellation Orbit API server...")
-    print("Fetching initial TLE data for all satellites...")
 
-    # Initialize all satellites on startup
-    for sat_key in SATELLITE_CATALOG:
-        print(f"  Loading {SATELLITE_CATALOG[sat_key]['name']}...")
-        get_propagator(sat_key)
+    # Load TLEs in the background so the server listens immediately. The
+    # reloader's parent process never serves requests, so skip it there.
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        print("Loading TLE data for all satellites in the background "
+              "(see /api/ready)...")
+        warmup.start()
 
-    print(f"\nAll TLEs loaded. Server starting on http://localhost:5050")
+    print("Server starting on http://localhost:5050")
     app.run(host="0.0.0.0", port=5050, debug=True)
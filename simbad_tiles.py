@@ -0,0 +1,375 @@
+"""
+SIMBAD Tiles - Region queries answered from a HEALPix tile cache
+
+The sky is cut into fixed HEALPix tiles (order 6: 49,152 tiles of about
+0.9 degrees). A cone query is decomposed into the tiles it touches; each
+tile's objects are fetched from SIMBAD once, cached, and the answer is
+assembled locally by exact cone distance. Neighboring clicks and repeated
+inspection of one field therefore cost no SIMBAD round trip at all.
+
+Tiles are held in an in-memory LRU and, if SIMBAD_TILE_DIR is set, also
+persisted there as JSON so restarts and other workers start warm. Both
+expire after SIMBAD_TILE_TTL_HOURS. Missing tiles are fetched
+concurrently (a few at a time, to stay polite to SIMBAD), and concurrent
+requests for the same tile share one fetch.
+
+Wide fields are walked page by page: plan() lists a cone's tiles nearest
+the center first, query_tiles() answers from one slice of that list, and
+prefetch() starts fetching the next slice without waiting for it.
+Prefetches run in a smaller pool of their own, so they never queue ahead
+of a request's misses, and each has PREFETCH_SECONDS to finish. A request
+that needs a tile whose prefetch has not started yet fetches it itself,
+and waits for fetches it joins no longer than its own deadline.
+
+The fetch function is supplied by the caller and returns a tile's objects
+as dicts with at least ra, dec, priority and magnitude_v (None if unknown).
+
+Environment variables:
+    SIMBAD_TILE_CACHE_SIZE   Tiles kept in memory (default 4096)
+    SIMBAD_TILE_DIR          Directory for persisted tiles (default: none)
+    SIMBAD_TILE_TTL_HOURS    Tile lifetime (default 168, one week)
+"""
+
+import json
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait as wait_futures
+from contextlib import nullcontext
+from functools import partial
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+import upstream
+from healpix import ang2pix, pix2ang, query_disc, radec_to_vec
+from metrics import cache_event
+from tracing import span
+
+TILE_ORDER = 6
+MAX_TILES = int(os.environ.get("SIMBAD_TILE_CACHE_SIZE", 4096))
+TILE_DIR = os.environ.get("SIMBAD_TILE_DIR")
+TILE_TTL_HOURS = float(os.environ.get("SIMBAD_TILE_TTL_HOURS", 168))
+FETCH_WORKERS = 4
+PREFETCH_WORKERS = 2
+PREFETCH_SECONDS = 30  # Budget of one prefetched tile, retries included
+
+NO_MAGNITUDE = 99.0  # Sorts objects without a V magnitude last
+
+
+class Tile:
+    """
+    Objects of one tile, with arrays for fast cone filtering and ranking.
+
+    Attributes:
+        objects: Object dicts as returned by the fetch function
+        xyz: Unit vectors of the objects (N x 3)
+        priority: Sort priority per object (lower first)
+        magnitude: V magnitude per object (NO_MAGNITUDE if unknown)
+        fetched_at: Unix time of the fetch
+        truncated: True if SIMBAD returned the row limit for this tile
+    """
+
+    __slots__ = ("objects", "xyz", "priority", "magnitude", "fetched_at", "truncated")
+
+    def __init__(self, objects: List[Dict], fetched_at: float, truncated: bool = False):
+        self.objects = objects
+        self.fetched_at = fetched_at
+        self.truncated = truncated
+        self.xyz = radec_to_vec([o["ra"] for o in objects],
+                                [o["dec"] for o in objects]).reshape(-1, 3)
+        self.priority = np.array([o["priority"] for o in objects], dtype=np.int16)
+        self.magnitude = np.array(
+            [NO_MAGNITUDE if o.get("magnitude_v") is None else o["magnitude_v"]
+             for o in objects], dtype=float)
+
+    def to_dict(self) -> Dict:
+        return {"fetched_at": self.fetched_at, "truncated": self.truncated,
+                "objects": self.objects}
+
+
+class SimbadTileCache:
+    """
+    LRU of SIMBAD tiles, backed by an optional directory and a fetcher.
+
+    Usage:
+        tiles = SimbadTileCache(fetch_tile)
+        objects, info = tiles.query(ra, dec, radius, limit)
+    """
+
+    def __init__(self, fetch: Callable[[int, int], Tuple[List[Dict], bool]],
+                 order: int = TILE_ORDER, max_tiles: int = MAX_TILES,
+                 directory: Optional[str] = TILE_DIR, ttl_hours: float = TILE_TTL_HOURS,
+                 workers: int = FETCH_WORKERS):
+        self.fetch = fetch
+        self.order = order
+        self.max_tiles = max_tiles
+        self.directory = directory
+        self.ttl = ttl_hours * 3600
+        self._tiles = OrderedDict()
+        self._inflight = {}
+        self._prefetching = set()  # Pixels whose in-flight fetch is a prefetch
+        self._lock = threading.RLock()  # Reentered by _done when _submit cancels
+        self._workers = workers
+        self._executor = None
+        self._prefetch_executor = None
+        self._pid = None
+
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def __len__(self) -> int:
+        return len(self._tiles)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def query(self, ra: float, dec: float, radius: float,
+              limit: int) -> Tuple[List[Dict], Dict]:
+        """
+        Objects within radius degrees of (ra, dec), best first.
+
+        Objects are ranked by priority, then V magnitude, and cut to limit.
+
+        Returns:
+            (objects, info) where info holds the tile counts and whether any
+            tile was truncated by SIMBAD's row limit
+        """
+        return self.query_tiles(query_disc(self.order, ra, dec, radius).tolist(),
+                                ra, dec, radius, limit)
+
+    def query_tiles(self, pixels: List[int], ra: float, dec: float, radius: float,
+                    limit: Optional[int] = None) -> Tuple[List[Dict], Dict]:
+        """
+        Like query(), but only over the given tiles (one page of plan()).
+
+        limit None returns every object of those tiles inside the cone.
+        """
+        tiles, fetched = self.get_tiles(pixels)
+
+        center = radec_to_vec(ra, dec)
+        min_cos = math.cos(math.radians(radius))
+
+        candidates = []
+        for tile in tiles:
+            if not tile.objects:
+                continue
+            inside = np.flatnonzero(tile.xyz @ center >= min_cos)
+            if len(inside):
+                candidates.append((tile, inside))
+
+        objects = []
+        if candidates:
+            priority = np.concatenate([t.priority[i] for t, i in candidates])
+            magnitude = np.concatenate([t.magnitude[i] for t, i in candidates])
+            refs = [(t, j) for t, i in candidates for j in i.tolist()]
+            for k in np.lexsort((magnitude, priority))[:limit].tolist():
+                tile, j = refs[k]
+                objects.append(dict(tile.objects[j]))
+
+        return objects, {
+            "tiles": len(pixels),
+            "fetched": fetched,
+            "truncated": any(t.truncated for t in tiles),
+        }
+
+    def plan(self, ra: float, dec: float, radius: float) -> List[int]:
+        """Tiles touching a cone, nearest the center first (the page order of wide queries)."""
+        pixels = query_disc(self.order, ra, dec, radius)
+        tile_ra, tile_dec = pix2ang(self.order, pixels)
+        closeness = radec_to_vec(tile_ra, tile_dec).reshape(-1, 3) @ radec_to_vec(ra, dec)
+        return pixels[np.argsort(-closeness, kind="stable")].tolist()
+
+    def get_tiles(self, pixels: List[int]) -> Tuple[List[Tile], int]:
+        """
+        Tiles for the given pixels, fetching those not cached.
+
+        Returns:
+            (tiles in pixel order, number fetched from SIMBAD)
+
+        Raises:
+            The first fetch error; tiles fetched successfully stay cached
+        """
+        tiles = {}
+        missing = []
+        for pixel in pixels:
+            tile = self._memory_get(pixel) or self._disk_get(pixel)
+            if tile is None:
+                missing.append(pixel)
+            else:
+                tiles[pixel] = tile
+
+        if missing:
+            with span("simbad_tiles:fetch", tiles=len(missing)):
+                for pixel, tile in self._fetch_many(missing).items():
+                    tiles[pixel] = tile
+
+        return [tiles[p] for p in pixels], len(missing)
+
+    # ------------------------------------------------------------------
+    # Cache layers
+    # ------------------------------------------------------------------
+
+    def _fresh(self, tile: Tile) -> bool:
+        return time.time() - tile.fetched_at < self.ttl
+
+    def _memory_get(self, pixel: int) -> Optional[Tile]:
+        with self._lock:
+            tile = self._tiles.get(pixel)
+            if tile is None:
+                return None
+            if not self._fresh(tile):
+                del self._tiles[pixel]
+                cache_event("simbad_tiles", "expired")
+                return None
+            self._tiles.move_to_end(pixel)
+        cache_event("simbad_tiles", "hit")
+        return tile
+
+    def _memory_put(self, pixel: int, tile: Tile):
+        with self._lock:
+            self._tiles[pixel] = tile
+            self._tiles.move_to_end(pixel)
+            while len(self._tiles) > self.max_tiles:
+                self._tiles.popitem(last=False)
+                cache_event("simbad_tiles", "eviction")
+
+    def _path(self, pixel: int) -> str:
+        return os.path.join(self.directory, f"o{self.order}-{pixel}.json")
+
+    def _disk_get(self, pixel: int) -> Optional[Tile]:
+        if not self.directory:
+            return None
+        try:
+            with open(self._path(pixel)) as f:
+                record = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            print(f"Unreadable SIMBAD tile {pixel}: {e}")
+            return None
+
+        tile = Tile(record["objects"], record["fetched_at"], record.get("truncated", False))
+        if not self._fresh(tile):
+            return None
+        cache_event("simbad_tiles", "disk_hit")
+        self._memory_put(pixel, tile)
+        return tile
+
+    def _disk_put(self, pixel: int, tile: Tile):
+        if not self.directory:
+            return
+        path = self._path(pixel)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump(tile.to_dict(), f, separators=(",", ":"))
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"Could not persist SIMBAD tile {pixel}: {e}")
+
+    # ------------------------------------------------------------------
+    # Fetching
+    # ------------------------------------------------------------------
+
+    def _pool(self, prefetch: bool = False) -> ThreadPoolExecutor:
+        # Threads do not survive a fork; pre-forked workers build their own
+        if self._executor is None or self._pid != os.getpid():
+            self._executor = ThreadPoolExecutor(max_workers=self._workers,
+                                                thread_name_prefix="simbad-tiles")
+            self._prefetch_executor = ThreadPoolExecutor(
+                max_workers=PREFETCH_WORKERS, thread_name_prefix="simbad-prefetch")
+            self._pid = os.getpid()
+        return self._prefetch_executor if prefetch else self._executor
+
+    def _fetch_one(self, pixel: int, deadline_at: Optional[float]) -> Tile:
+        # The request's deadline lives in the caller's context; carry it over
+        budget = None if deadline_at is None else max(0.0, deadline_at - time.monotonic())
+        with upstream.deadline(budget) if budget is not None else nullcontext():
+            objects, truncated = self.fetch(self.order, pixel)
+
+        # Keep only objects whose position falls in this tile, so tiles
+        # never overlap even when the fetch used a covering circle
+        if objects:
+            owner = ang2pix(self.order, [o["ra"] for o in objects], [o["dec"] for o in objects])
+            objects = [o for o, p in zip(objects, owner.tolist()) if p == pixel]
+
+        tile = Tile(objects, time.time(), truncated)
+        self._memory_put(pixel, tile)
+        self._disk_put(pixel, tile)
+        return tile
+
+    def _submit(self, pixels: List[int], deadline_at: Optional[float], event: str,
+                prefetch: bool = False) -> Dict:
+        """
+        Fetch futures for pixels, joining fetches already in flight.
+
+        A request's miss does not join a prefetch that is still queued; it
+        takes the fetch over into the request pool instead.
+        """
+        futures = {}
+        with self._lock:
+            pool = self._pool(prefetch)
+            for pixel in pixels:
+                future = self._inflight.get(pixel)
+                if (future is not None and not prefetch and pixel in self._prefetching
+                        and future.cancel()):
+                    future = None
+                if future is None:
+                    cache_event("simbad_tiles", event)
+                    future = pool.submit(self._fetch_one, pixel, deadline_at)
+                    self._inflight[pixel] = future
+                    if prefetch:
+                        self._prefetching.add(pixel)
+                    else:
+                        self._prefetching.discard(pixel)
+                    future.add_done_callback(partial(self._done, pixel))
+                futures[pixel] = future
+        return futures
+
+    def _done(self, pixel: int, future):
+        with self._lock:
+            if self._inflight.get(pixel) is future:
+                del self._inflight[pixel]
+                self._prefetching.discard(pixel)
+
+    def _fetch_many(self, pixels: List[int]) -> Dict[int, Tile]:
+        """
+        Raises:
+            upstream.DeadlineExceeded: The request's budget ran out while
+                waiting (e.g. for a joined prefetch)
+        """
+        budget = upstream.remaining()
+        deadline_at = None if budget is None else time.monotonic() + budget
+        futures = self._submit(pixels, deadline_at, "miss")
+        _, pending = wait_futures(futures.values(),
+                                  timeout=None if budget is None else max(0.0, budget))
+        if pending:
+            raise upstream.DeadlineExceeded(
+                f"{len(pending)} SIMBAD tiles still loading at the request deadline")
+        return {pixel: future.result() for pixel, future in futures.items()}
+
+    def prefetch(self, pixels: List[int]) -> int:
+        """
+        Start fetching the tiles not cached yet, without waiting for them.
+
+        The fetches run in the prefetch pool, each within PREFETCH_SECONDS;
+        failures are left for a later query to retry. Returns the number of
+        tiles not cached.
+        """
+        missing = [p for p in pixels if not self._is_cached(p)]
+        if missing:
+            self._submit(missing, time.monotonic() + PREFETCH_SECONDS, "prefetch",
+                         prefetch=True)
+        return len(missing)
+
+    def _is_cached(self, pixel: int) -> bool:
+        with self._lock:
+            tile = self._tiles.get(pixel)
+        if tile is not None and self._fresh(tile):
+            return True
+        return bool(self.directory) and os.path.exists(self._path(pixel))
@@ -0,0 +1,97 @@
+"""
+State Store - Small file-backed key/value store shared between processes
+
+Used to share TLE updates between pre-forked server workers: whichever
+worker refreshes a TLE first publishes it here, and every other worker
+notices the newer file version (a single stat() call) and rebuilds its
+propagator from it instead of hitting CelesTrak itself. The store doubles
+as a disk cache, so a restarted server starts from the last known TLEs.
+
+Writes are atomic (temp file + rename); refreshes are serialized with
+advisory file locks where the platform supports them.
+"""
+
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to unlocked refreshes
+    fcntl = None
+
+DEFAULT_STATE_DIR = Path(tempfile.gettempdir()) / "jpss-orbit-state"
+
+
+class FileStateStore:
+    """
+    JSON documents stored one file per key in a shared directory.
+
+    Attributes:
+        directory: Directory holding <key>.json and <key>.lock files
+    """
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def version(self, key: str) -> int:
+        """Return a version token for key (mtime in ns), 0 if absent."""
+        try:
+            return self._path(key).stat().st_mtime_ns
+        except OSError:
+            return 0
+
+    def read(self, key: str) -> Optional[dict]:
+        """Read the document stored under key, or None."""
+        try:
+            with open(self._path(key), "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def write(self, key: str, value: dict):
+        """Atomically replace the document stored under key."""
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=f".{key}.")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(value, f)
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+    @contextmanager
+    def lock(self, key: str, blocking: bool = True):
+        """
+        Hold an exclusive inter-process lock for key.
+
+        Yields True if the lock was acquired, False if blocking=False and
+        another process holds it.
+        """
+        if fcntl is None:
+            yield True
+            return
+
+        with open(self.directory / f"{key}.lock", "w") as lock_file:
+            flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+            try:
+                fcntl.flock(lock_file, flags)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def get_default_store() -> FileStateStore:
+    """Store in ORBIT_STATE_DIR, or a per-machine temp directory."""
+    return FileStateStore(os.environ.get("ORBIT_STATE_DIR", DEFAULT_STATE_DIR))
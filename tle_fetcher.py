@@ -7,12 +7,15 @@ JPSS Constellation:
   - NOAA-21:   NORAD 54234 (2022)
 """
 
-import requests
+import os
 from datetime import datetime, timezone
 from pathlib import Path
 import json
 
-CELESTRAK_BASE = "https://celestrak.org/NORAD/elements/gp.php"
+import upstream
+
+# Overridable so load tests can point at a local stand-in (see loadtest/)
+CELESTRAK_BASE = os.environ.get("CELESTRAK_BASE", "https://celestrak.org/NORAD/elements/gp.php")
 
 # JPSS Polar Orbiting Satellite Constellation
 SATELLITE_CATALOG = {
@@ -84,7 +87,7 @@ def fetch_tle(norad_id: int = NOAA21_NORAD_ID) -> dict:
     try:
         # CelesTrak API endpoint
         url = f"{CELESTRAK_BASE}?CATNR={norad_id}&FORMAT=TLE"
-        response = requests.get(url, timeout=10)
+        response = upstream.get("celestrak", url)
         response.raise_for_status()
 
         lines = response.text.strip().split('\n')
@@ -0,0 +1,266 @@
+"""
+Tracing - Opt-in per-request span trees with near-zero cost when off
+
+Code marks phases with a context manager or decorator:
+
+    with span("get_propagator"):
+        ...
+
+    @traced("propagate")
+    def propagate(...): ...
+
+A span only does work when the current request is being traced; otherwise
+span() is one context-variable lookup returning a shared no-op. Spans with
+the same name under the same parent are aggregated (count and total time),
+so a track of 1,440 propagate() calls shows up as one node, not 1,440.
+
+Which requests are traced is configured through the environment, so it
+can stay on in production:
+
+    TRACE_SAMPLE_RATE   Fraction of requests traced and emitted (default 0)
+    TRACE_SLOW_MS       If > 0, trace every request but emit only those
+                        slower than this many milliseconds (default 0, off)
+    TRACE_FILE          Append emitted traces to this file as JSON lines
+                        (default: print one line per trace)
+    TRACE_HEADER        If "1", a request with "X-Trace: 1" is always traced
+                        and gets its span tree back in an X-Trace header
+
+Spans are carried in a contextvar, so work handed to other threads is not
+traced unless it runs in a copied context. Threads running in copies of one
+context may enter the same aggregated span at once: each entry keeps its
+own start time and context token, and the totals are updated under a lock.
+"""
+
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from functools import wraps
+from typing import Dict, Optional
+
+from flask import g, request
+from flask.json.provider import DefaultJSONProvider
+
+SAMPLE_RATE = float(os.environ.get("TRACE_SAMPLE_RATE", "0"))
+SLOW_MS = float(os.environ.get("TRACE_SLOW_MS", "0"))
+TRACE_FILE = os.environ.get("TRACE_FILE")
+HEADER_ENABLED = os.environ.get("TRACE_HEADER", "0") == "1"
+
+MAX_HEADER_BYTES = 8192
+
+_current: ContextVar[Optional["Span"]] = ContextVar("trace_span", default=None)
+_file_lock = threading.Lock()
+_tree_lock = threading.Lock()  # Guards child creation and the aggregates
+
+
+class Span:
+    """
+    One node of a span tree, aggregating every entry under the same name.
+
+    Attributes:
+        name: Span name
+        count: Times the span was entered
+        total: Seconds spent inside, summed over entries
+        attrs: Attributes of the first entry
+        children: Child spans by name, in first-entry order
+    """
+
+    __slots__ = ("name", "count", "total", "attrs", "children")
+
+    def __init__(self, name: str, attrs: Optional[Dict] = None):
+        self.name = name
+        self.count = 0
+        self.total = 0.0
+        self.attrs = attrs or {}
+        self.children = {}
+
+    def child(self, name: str, attrs: Dict) -> "Span":
+        node = self.children.get(name)
+        if node is None:
+            with _tree_lock:
+                node = self.children.get(name)
+                if node is None:
+                    node = self.children[name] = Span(name, attrs)
+        return node
+
+    def enter(self) -> "_SpanEntry":
+        """A context manager timing one entry of this span."""
+        return _SpanEntry(self)
+
+    def record(self, seconds: float):
+        """Add one finished entry of the given duration."""
+        with _tree_lock:
+            self.total += seconds
+            self.count += 1
+
+    def to_dict(self) -> Dict:
+        with _tree_lock:
+            children = list(self.children.values())
+            node = {"name": self.name, "ms": round(self.total * 1000, 3)}
+            if self.count != 1:
+                node["count"] = self.count
+        if self.attrs:
+            node["attrs"] = self.attrs
+        if children:
+            node["children"] = [c.to_dict() for c in children]
+        return node
+
+
+class _SpanEntry:
+    """One entry of a Span: its start time and the context token to restore."""
+
+    __slots__ = ("span", "_start", "_token")
+
+    def __init__(self, span: Span):
+        self.span = span
+        self._start = None
+        self._token = None
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        self._token = _current.set(self.span)
+        return self.span
+
+    def __exit__(self, *exc):
+        self.span.record(time.perf_counter() - self._start)
+        _current.reset(self._token)
+
+
+class _NoopSpan:
+    """Returned by span() when nothing is being traced."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+def span(name: str, **attrs):
+    """
+    Open a span under the current one; a no-op when not tracing.
+
+    Usage:
+        with span("simbad_tap", query="region"):
+            ...
+    """
+    parent = _current.get()
+    if parent is None:
+        return _NOOP
+    return parent.child(name, attrs).enter()
+
+
+def traced(name: Optional[str] = None):
+    """Decorator wrapping each call of a function in span(name)."""
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            parent = _current.get()
+            if parent is None:
+                return func(*args, **kwargs)
+            with parent.child(span_name, {}).enter():
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def tracing_configured() -> bool:
+    """True if any request can be traced under the current settings."""
+    return SAMPLE_RATE > 0 or SLOW_MS > 0 or HEADER_ENABLED
+
+
+class TracingJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that traces serialization as a "serialize" span."""
+
+    def dumps(self, obj, **kwargs) -> str:
+        with span("serialize"):
+            return super().dumps(obj, **kwargs)
+
+
+def init_tracing(app, service: str):
+    """
+    Trace requests of a Flask app according to the TRACE_* settings.
+
+    Does nothing when tracing is not configured, so the disabled cost is
+    the span() lookups alone.
+    """
+    if not tracing_configured():
+        return
+
+    app.json = TracingJSONProvider(app)
+
+    @app.before_request
+    def _start_trace():
+        forced = HEADER_ENABLED and request.headers.get("X-Trace") == "1"
+        sampled = forced or (SAMPLE_RATE > 0 and random.random() < SAMPLE_RATE)
+        if not (sampled or SLOW_MS > 0):
+            return
+
+        entry = Span(f"{request.method} {request.path}").enter()
+        entry.__enter__()
+        g._trace = (entry, sampled, forced, datetime.now(timezone.utc))
+
+    @app.after_request
+    def _finish_trace(response):
+        trace = g.pop("_trace", None)
+        if trace is None:
+            return response
+
+        entry, sampled, forced, started_at = trace
+        entry.__exit__(None, None, None)
+        root = entry.span
+        duration_ms = root.total * 1000
+
+        if not (sampled or duration_ms >= SLOW_MS):
+            return response
+
+        record = {
+            "trace_id": uuid.uuid4().hex[:16],
+            "service": service,
+            "route": request.url_rule.rule if request.url_rule else None,
+            "path": request.full_path.rstrip("?"),
+            "status": response.status_code,
+            "started_at": started_at.isoformat(),
+            "duration_ms": round(duration_ms, 3),
+            "reason": "forced" if forced else ("sampled" if sampled else "slow"),
+            "spans": root.to_dict(),
+        }
+        _emit(record)
+
+        if forced:
+            payload = json.dumps(record["spans"], separators=(",", ":"))
+            if len(payload) > MAX_HEADER_BYTES:
+                payload = json.dumps({"truncated": True, "ms": record["duration_ms"]})
+            response.headers["X-Trace"] = payload
+            response.headers["X-Trace-Id"] = record["trace_id"]
+
+        return response
+
+    @app.teardown_request
+    def _abandon_trace(exc):
+        # A view that raised skips after_request; restore the context
+        trace = g.pop("_trace", None)
+        if trace is not None:
+            trace[0].__exit__(None, None, None)
+
+
+def _emit(record: Dict):
+    line = json.dumps(record, separators=(",", ":"))
+    if TRACE_FILE:
+        with _file_lock, open(TRACE_FILE, "a") as f:
+            f.write(line + "\n")
+    else:
+        print(f"TRACE {line}")
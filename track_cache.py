@@ -0,0 +1,157 @@
+"""
+Track Cache - Shared ground track segments and incremental track cursors
+
+Ground tracks are cut into fixed-length segments laid on a time grid
+(multiples of the step since the Unix epoch, plus an optional phase), so
+every request for the same satellite, step and TLE reuses the same
+propagated points. Segments are keyed by TLE epoch, so a TLE refresh
+invalidates them without any explicit purge.
+
+Cursors let a client extend a track it already holds. A cursor encodes the
+timestamp of the client's last point, the step, and the TLE epoch the
+points were computed from:
+
+    "<last_ts>-<step>-<tle_epoch_ms>"   e.g. "1737720030-30-1737720000000"
+"""
+
+import math
+import threading
+from collections import OrderedDict, namedtuple
+from datetime import datetime, timezone, timedelta
+from typing import List, Dict, Optional
+
+from metrics import cache_event
+
+SEGMENT_POINTS = 120   # Points per cached segment (1 hour at 30 s steps)
+MAX_SEGMENTS = 512     # LRU capacity across all satellites and steps
+
+TrackCursor = namedtuple("TrackCursor", ["last_ts", "step", "tle_epoch_ms"])
+
+
+def tle_epoch_key(propagator) -> int:
+    """Return the TLE epoch of a propagator as integer milliseconds."""
+    return int(round(propagator.tle_epoch.timestamp() * 1000))
+
+
+def make_cursor(last_ts: int, step: int, tle_epoch_ms: int) -> str:
+    """Encode a track cursor string."""
+    return f"{int(last_ts)}-{int(step)}-{int(tle_epoch_ms)}"
+
+
+def parse_cursor(cursor: str) -> Optional[TrackCursor]:
+    """
+    Decode a track cursor string.
+
+    Returns:
+        TrackCursor or None if the cursor is malformed
+    """
+    try:
+        last_ts, step, epoch_ms = (int(part) for part in cursor.split("-"))
+    except (AttributeError, ValueError):
+        return None
+
+    if step <= 0:
+        return None
+
+    return TrackCursor(last_ts, step, epoch_ms)
+
+
+def floor_to_grid(ts: float, step: int) -> int:
+    """Round a Unix timestamp down onto the step grid."""
+    return int(math.floor(ts / step)) * step
+
+
+class TrackSegmentCache:
+    """
+    LRU cache of propagated ground track segments.
+
+    Segment k of a (satellite, TLE epoch, step, phase) grid covers the points
+    phase + (k * SEGMENT_POINTS + i) * step for i in [0, SEGMENT_POINTS).
+    """
+
+    def __init__(self, max_segments: int = MAX_SEGMENTS):
+        self.max_segments = max_segments
+        self._segments = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_positions(self, sat_key: str, propagator, start_ts: int,
+                      end_ts: int, step: int) -> List[Dict]:
+        """
+        Return simplified track points for start_ts <= t <= end_ts.
+
+        Points lie on the grid anchored at start_ts, so callers should pass
+        grid-aligned starts (see floor_to_grid) to share segments.
+
+        Args:
+            sat_key: Satellite key (part of the cache key)
+            propagator: OrbitPropagator for the satellite's current TLE
+            start_ts: First point, Unix seconds
+            end_ts: Last allowed point, Unix seconds
+            step: Seconds between points
+
+        Returns:
+            List of {"lat", "lon", "alt", "time"} dicts
+        """
+        if end_ts < start_ts:
+            return []
+
+        epoch_ms = tle_epoch_key(propagator)
+        phase = start_ts % step
+        seg_span = SEGMENT_POINTS * step
+
+        first_seg = (start_ts - phase) // seg_span
+        last_seg = (end_ts - phase) // seg_span
+
+        positions = []
+        for seg in range(first_seg, last_seg + 1):
+            key = (sat_key, epoch_ms, step, phase, seg)
+            points = self._get_segment(key, propagator, phase + seg * seg_span, step)
+            positions.extend(p for p, ts in points if start_ts <= ts <= end_ts)
+
+        return positions
+
+    def _get_segment(self, key: tuple, propagator, seg_start_ts: int,
+                     step: int) -> List[tuple]:
+        """Fetch a segment from the cache, propagating it on a miss."""
+        with self._lock:
+            points = self._segments.get(key)
+            if points is not None:
+                self._segments.move_to_end(key)
+                cache_event("track_segments", "hit")
+                return points
+
+        cache_event("track_segments", "miss")
+
+        # Propagate outside the lock; concurrent misses may duplicate work
+        start = datetime.fromtimestamp(seg_start_ts, tz=timezone.utc)
+        end = start + timedelta(seconds=(SEGMENT_POINTS - 1) * step)
+        points = [
+            ({
+                "lat": p["latitude"],
+                "lon": p["longitude"],
+                "alt": p["altitude_km"],
+                "time": p["timestamp"]
+            }, int(datetime.fromisoformat(p["timestamp"]).timestamp()))
+            for p in propagator.generate_track(start, end, step)
+        ]
+
+        with self._lock:
+            self._segments[key] = points
+            self._segments.move_to_end(key)
+            while len(self._segments) > self.max_segments:
+                self._segments.popitem(last=False)
+                cache_event("track_segments", "eviction")
+
+        return points
+
+    def __len__(self) -> int:
+        return len(self._segments)
+
+    def clear(self):
+        """Drop all cached segments."""
+        with self._lock:
+            self._segments.clear()
+
+
+# Shared instance used by the API server
+segment_cache = TrackSegmentCache()
@@ -0,0 +1,137 @@
+"""
+Track Export - Streaming GeoJSON, CZML and CSV serializers for long tracks
+
+Each exporter is a generator over OrbitPropagator.iter_track chunks and
+yields text fragments as they are produced, so the full track is never held
+in memory. Multi-week windows at 10 s resolution stream in constant memory.
+"""
+
+import json
+from datetime import datetime, timedelta
+from typing import Iterator
+
+EXPORT_FORMATS = {
+    "geojson": ("application/geo+json", "geojson"),
+    "czml": ("application/json", "czml"),
+    "csv": ("text/csv", "csv"),
+}
+
+CHUNK_POINTS = 1440  # Points propagated per batch
+
+
+def export_track(propagator, sat_info: dict, start: datetime, end: datetime,
+                 step_seconds: int, fmt: str) -> Iterator[str]:
+    """
+    Stream a ground track in the requested format.
+
+    Args:
+        propagator: OrbitPropagator for the satellite
+        sat_info: Satellite catalog entry (name, norad_id, color)
+        start: Start datetime (UTC)
+        end: End datetime (UTC)
+        step_seconds: Seconds between points
+        fmt: One of EXPORT_FORMATS
+
+    Returns:
+        Generator of text fragments
+    """
+    chunks = propagator.iter_track(start, end, step_seconds, CHUNK_POINTS)
+
+    if fmt == "geojson":
+        return _geojson(chunks, sat_info, start, end, step_seconds)
+    if fmt == "czml":
+        return _czml(chunks, sat_info, start, end)
+    return _csv(chunks, start)
+
+
+def _geojson(chunks, sat_info: dict, start: datetime, end: datetime,
+             step_seconds: int) -> Iterator[str]:
+    """GeoJSON Feature with a LineString of [lon, lat, altitude_m]."""
+    properties = {
+        "name": sat_info.get("name"),
+        "norad_id": sat_info.get("norad_id"),
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "step_seconds": step_seconds,
+    }
+    yield ('{"type": "Feature", "properties": ' + json.dumps(properties) +
+           ', "geometry": {"type": "LineString", "coordinates": [')
+
+    first = True
+    for chunk in chunks:
+        coords = ",".join(
+            f"[{lon:.6f},{lat:.6f},{alt * 1000:.1f}]"
+            for lon, lat, alt in zip(chunk["longitude"], chunk["latitude"],
+                                     chunk["altitude_km"])
+        )
+        if coords:
+            yield coords if first else "," + coords
+            first = False
+
+    yield "]}}\n"
+
+
+def _czml(chunks, sat_info: dict, start: datetime, end: datetime) -> Iterator[str]:
+    """CZML document with a sampled cartographicDegrees position."""
+    interval = f"{_czml_time(start)}/{_czml_time(end)}"
+    document = {
+        "id": "document",
+        "name": sat_info.get("name"),
+        "version": "1.0",
+        "clock": {"interval": interval, "currentTime": _czml_time(start)},
+    }
+    packet_head = {
+        "id": str(sat_info.get("norad_id")),
+        "name": sat_info.get("name"),
+        "availability": interval,
+        "path": {
+            "material": {"solidColor": {"color": {"rgba": _hex_to_rgba(sat_info.get("color"))}}},
+            "width": 1.5,
+            "leadTime": 0,
+        },
+        "point": {"pixelSize": 6},
+    }
+
+    # Close the head packet manually so the position array can be streamed
+    yield "[" + json.dumps(document) + "," + json.dumps(packet_head)[:-1]
+    yield (', "position": {"epoch": "' + _czml_time(start) +
+           '", "interpolationAlgorithm": "LAGRANGE", "interpolationDegree": 5,'
+           ' "cartographicDegrees": [')
+
+    first = True
+    for chunk in chunks:
+        samples = ",".join(
+            f"{t:.0f},{lon:.6f},{lat:.6f},{alt * 1000:.1f}"
+            for t, lon, lat, alt in zip(chunk["offset_seconds"], chunk["longitude"],
+                                        chunk["latitude"], chunk["altitude_km"])
+        )
+        if samples:
+            yield samples if first else "," + samples
+            first = False
+
+    yield "]}}]\n"
+
+
+def _csv(chunks, start: datetime) -> Iterator[str]:
+    """CSV with one row per point."""
+    yield "time,latitude,longitude,altitude_km,velocity_km_s\n"
+
+    for chunk in chunks:
+        yield "".join(
+            f"{(start + timedelta(seconds=float(t))).isoformat()},"
+            f"{lat:.6f},{lon:.6f},{alt:.3f},{vel:.4f}\n"
+            for t, lat, lon, alt, vel in zip(chunk["offset_seconds"], chunk["latitude"],
+                                             chunk["longitude"], chunk["altitude_km"],
+                                             chunk["velocity_km_s"])
+        )
+
+
+def _czml_time(dt: datetime) -> str:
+    """ISO 8601 in the Z form Cesium expects."""
+    return dt.isoformat().replace("+00:00", "Z")
+
+
+def _hex_to_rgba(color: str) -> list:
+    """Convert '#rrggbb' to a CZML rgba list (default coral red)."""
+    color = (color or "#ff6b6b").lstrip("#")
+    return [int(color[i:i + 2], 16) for i in (0, 2, 4)] + [255]
@@ -0,0 +1,253 @@
+"""
+Upstream - Shared HTTP client for CelesTrak, SIMBAD and CDS HiPS2FITS
+
+All calls to external services go through get():
+
+    response = upstream.get("simbad_tap", SIMBAD_TAP_URL, params={...})
+
+which adds, per upstream (see POLICIES):
+
+    Keep-alive pools   One requests.Session per host and process, so
+                       repeated calls reuse TCP/TLS connections. Sessions
+                       are recreated after a fork (pre-forked workers never
+                       share a socket with the master).
+    Deadline budget    deadline(seconds) bounds everything inside it; every
+                       call's timeout is capped by what is left, so the
+                       sequential sub-calls of one API request share one
+                       budget. A call with no budget left raises
+                       DeadlineExceeded (a requests Timeout).
+    Retries            Connection errors, timeouts and 502/503/504 answers
+                       are retried with full-jitter exponential backoff,
+                       while the budget allows. Only GETs are made here, so
+                       every retry is idempotent.
+    Hedging            If an answer takes longer than the upstream's
+                       hedge_after, one duplicate request is sent and the
+                       first answer wins. Off for CelesTrak, which asks
+                       clients not to duplicate requests.
+
+Every attempt (including hedges) is counted by metrics.upstream_call.
+
+Environment variables:
+    UPSTREAM_HEDGING   "0" disables hedged requests (default "1")
+"""
+
+import os
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import counter, upstream_call
+from tracing import span
+
+HEDGING_ENABLED = os.environ.get("UPSTREAM_HEDGING", "1") == "1"
+
+POOL_SIZE = 16            # Keep-alive connections per host and process
+RETRY_STATUSES = {502, 503, 504}
+BACKOFF_BASE = 0.2        # Seconds; doubled per retry, full jitter
+BACKOFF_CAP = 2.0
+MIN_ATTEMPT_TIME = 0.25   # Don't start an attempt with less budget than this
+
+
+@dataclass(frozen=True)
+class Policy:
+    """
+    Per-upstream call policy.
+
+    Attributes:
+        timeout: Per-attempt timeout in seconds (before the deadline cap)
+        retries: Retries after the first attempt
+        hedge_after: Seconds before a duplicate request is sent (None = never)
+    """
+    timeout: float = 10.0
+    retries: int = 2
+    hedge_after: Optional[float] = None
+
+
+POLICIES = {
+    "celestrak": Policy(timeout=10.0, retries=2),
+    "simbad_tap": Policy(timeout=20.0, retries=2, hedge_after=3.0),
+    "simbad_resolver": Policy(timeout=10.0, retries=2, hedge_after=1.5),
+    # Cutouts are rendered on demand and can be slow; a duplicate doubles the work
+    "hips2fits": Policy(timeout=30.0, retries=1),
+}
+
+RETRIES = counter("upstream_retries_total", "Retried calls to external services",
+                  ["upstream"])
+HEDGES = counter("upstream_hedges_total",
+                 "Hedged duplicate requests by which copy answered first (primary, hedge)",
+                 ["upstream", "winner"])
+
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """The request's deadline budget ran out before an upstream call."""
+
+
+_deadline: ContextVar[Optional[float]] = ContextVar("upstream_deadline", default=None)
+
+
+@contextmanager
+def deadline(seconds: float):
+    """
+    Bound all upstream calls made inside the block to seconds in total.
+
+    Nested budgets never extend an outer one. Also usable as a decorator:
+
+        @deadline(25)
+        def api_simbad_region(): ...
+    """
+    outer = _deadline.get()
+    end = time.monotonic() + seconds
+    token = _deadline.set(end if outer is None else min(outer, end))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left in the current budget, or None without one."""
+    end = _deadline.get()
+    return None if end is None else end - time.monotonic()
+
+
+# ============================================
+# Per-process connection pools
+# ============================================
+
+_sessions: Dict[str, requests.Session] = {}
+_executor = None
+_pid = None
+_lock = threading.Lock()
+
+
+def _reset_after_fork():
+    """Drop sessions and threads inherited from a parent process."""
+    global _sessions, _executor, _pid
+    _sessions = {}
+    _executor = None
+    _pid = os.getpid()
+
+
+def _session(url: str) -> requests.Session:
+    host = urlsplit(url).netloc
+    with _lock:
+        if _pid != os.getpid():
+            _reset_after_fork()
+        session = _sessions.get(host)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _sessions[host] = session
+        return session
+
+
+def _hedge_pool() -> ThreadPoolExecutor:
+    global _executor
+    with _lock:
+        if _pid != os.getpid():
+            _reset_after_fork()
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=POOL_SIZE,
+                                           thread_name_prefix="upstream-hedge")
+        return _executor
+
+
+# ============================================
+# Calls
+# ============================================
+
+def _attempt(name: str, url: str, params, timeout: float, headers) -> requests.Response:
+    with upstream_call(name) as call:
+        response = _session(url).get(url, params=params, timeout=timeout, headers=headers)
+        call.status = response.status_code
+    return response
+
+
+def _hedged(name: str, url: str, params, timeout: float, headers,
+            hedge_after: float) -> requests.Response:
+    """Send one request, and a duplicate if it is slower than hedge_after."""
+    pool = _hedge_pool()
+    primary = pool.submit(_attempt, name, url, params, timeout, headers)
+    done, _ = wait([primary], timeout=hedge_after)
+    if done:
+        return primary.result()
+
+    hedge = pool.submit(_attempt, name, url, params, max(timeout - hedge_after, 0.1), headers)
+    pending = {primary, hedge}
+    error = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                # The other copy finishes in the background, bounded by its timeout
+                HEDGES.inc(upstream=name, winner="hedge" if future is hedge else "primary")
+                return future.result()
+            error = future.exception()
+    raise error
+
+
+def get(name: str, url: str, params: Optional[Dict] = None, timeout: Optional[float] = None,
+        headers: Optional[Dict] = None) -> requests.Response:
+    """
+    GET from an external service under its policy.
+
+    Args:
+        name: Upstream name (a POLICIES key; also the metrics label)
+        url: Request URL
+        params: Query parameters
+        timeout: Per-attempt timeout overriding the policy's
+        headers: Extra request headers
+
+    Returns:
+        The last response, which may still be an error status once retries
+        are exhausted; callers check it as they would a requests response
+
+    Raises:
+        DeadlineExceeded: The budget ran out before or between attempts
+        requests.RequestException: The last attempt failed
+    """
+    policy = POLICIES.get(name, Policy())
+    timeout = timeout or policy.timeout
+    hedge_after = policy.hedge_after if HEDGING_ENABLED else None
+
+    # Attempts run in the hedge pool carry no span context; trace the whole call
+    with span(f"upstream:{name}") if hedge_after else nullcontext():
+        for attempt in range(policy.retries + 1):
+            left = remaining()
+            if left is not None and left < MIN_ATTEMPT_TIME:
+                raise DeadlineExceeded(f"No time left for {name} (attempt {attempt + 1})")
+            attempt_timeout = timeout if left is None else min(timeout, left)
+
+            try:
+                if hedge_after and hedge_after < attempt_timeout:
+                    response = _hedged(name, url, params, attempt_timeout, headers, hedge_after)
+                else:
+                    response = _attempt(name, url, params, attempt_timeout, headers)
+                if response.status_code not in RETRY_STATUSES:
+                    return response
+                error = None
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                error = e
+
+            # Out of retries or budget: surface the last outcome as it was
+            backoff = random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+            left = remaining()
+            if attempt == policy.retries or (left is not None and
+                                             backoff + MIN_ATTEMPT_TIME > left):
+                if error is not None:
+                    raise error
+                return response
+
+            RETRIES.inc(upstream=name)
+            time.sleep(backoff)
@@ -0,0 +1,170 @@
+"""
+Warmup - Parallel background initialization with readiness reporting
+
+Both API servers start listening immediately and load their expensive state
+(TLEs, starplot styles, ephemeris, timezone polygons) in the background.
+Each piece of work is a named phase; independent phases run concurrently
+on a small thread pool, and a phase may name phases it requires (e.g. a
+phase that imports starplot before the ones that use it, so that two
+threads never import the same heavy package at once).
+
+Liveness and readiness are kept apart: a server is alive as soon as it
+accepts connections, and ready once every phase has finished. Requests
+that arrive earlier still work; they just load what they need lazily.
+
+Every phase is timed, and report() gives a per-phase startup timing
+report (offset from warmup start, duration, status).
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, Optional
+
+MAX_WORKERS = 4
+
+
+class Warmup:
+    """
+    Named initialization phases run in parallel, with timing and readiness.
+
+    Attributes:
+        service: Service name shown in the report
+        max_workers: Phases allowed to run at the same time
+    """
+
+    def __init__(self, service: str, max_workers: int = MAX_WORKERS):
+        self.service = service
+        self.max_workers = max_workers
+        self._phases = {}   # name -> (func, requires), in registration order
+        self._results = {}  # name -> {"status", "start", "seconds", "error"}
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._thread = None
+        self._started_at = None
+        self._t0 = None
+        self._total = None
+
+    def add(self, name: str, func: Callable[[], object],
+            requires: Iterable[str] = ()):
+        """
+        Register a phase.
+
+        Args:
+            name: Unique phase name
+            func: Callable run with no arguments; its return value is ignored
+            requires: Names of phases that must finish before this one starts
+        """
+        self._phases[name] = (func, tuple(requires))
+        self._results[name] = {"status": "pending", "start": None,
+                               "seconds": None, "error": None}
+
+    @property
+    def ready(self) -> bool:
+        """True once every phase has finished (successfully or not)."""
+        return self._done.is_set()
+
+    def start(self) -> threading.Thread:
+        """Run all phases on a background thread and return immediately."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self.run, name=f"{self.service}-warmup", daemon=True
+                )
+                self._thread.start()
+        return self._thread
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until warmup completes; returns readiness."""
+        return self._done.wait(timeout)
+
+    def run(self) -> Dict:
+        """
+        Run all phases and block until they finish.
+
+        Phase failures are recorded in the report, not raised: whatever a
+        failed phase was meant to load is loaded on first use instead.
+
+        Returns:
+            The startup timing report
+        """
+        if self._done.is_set():
+            return self.report()
+
+        self._started_at = datetime.now(timezone.utc)
+        self._t0 = time.perf_counter()
+
+        remaining = dict(self._phases)
+        finished = set()
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers,
+                                thread_name_prefix=f"{self.service}-warmup") as pool:
+            while remaining or running:
+                for name in [n for n, (_, req) in remaining.items()
+                             if all(r in finished or r not in self._phases for r in req)]:
+                    func, _ = remaining.pop(name)
+                    running[pool.submit(self._run_phase, name, func)] = name
+
+                if not running:
+                    # Unsatisfiable requirements (a cycle); run nothing else
+                    for name in remaining:
+                        self._results[name].update(status="skipped",
+                                                   error="unsatisfied requirements")
+                    break
+
+                completed, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in completed:
+                    finished.add(running.pop(future))
+
+        self._total = time.perf_counter() - self._t0
+        self._done.set()
+        self.print_report()
+        return self.report()
+
+    def _run_phase(self, name: str, func: Callable[[], object]):
+        result = self._results[name]
+        start = time.perf_counter()
+        result.update(status="running", start=round(start - self._t0, 3))
+        try:
+            func()
+            result["status"] = "ok"
+        except Exception as e:
+            result.update(status="failed", error=str(e))
+            print(f"Warmup phase {name} failed: {e}")
+        result["seconds"] = round(time.perf_counter() - start, 3)
+
+    def report(self) -> Dict:
+        """
+        Startup timing report.
+
+        Returns:
+            Dictionary with overall status, total seconds and per-phase
+            timings (start offset and duration in seconds)
+        """
+        if self._t0 is None:
+            status, elapsed = "pending", None
+        elif self.ready:
+            status, elapsed = "ready", self._total
+        else:
+            status, elapsed = "warming", time.perf_counter() - self._t0
+
+        return {
+            "service": self.service,
+            "status": status,
+            "started_at": self._started_at.isoformat() if self._started_at else None,
+            "elapsed_seconds": round(elapsed, 3) if elapsed is not None else None,
+            "phases": [{"name": name, **result} for name, result in self._results.items()],
+        }
+
+    def print_report(self):
+        """Print the timing report as a table."""
+        report = self.report()
+        print(f"{self.service} warmup {report['status']} "
+              f"in {report['elapsed_seconds']:.2f}s:")
+        for phase in report["phases"]:
+            seconds = phase["seconds"]
+            timing = (f"+{phase['start']:6.2f}s {seconds:6.2f}s"
+                      if seconds is not None else " " * 16)
+            print(f"  {phase['name']:<28} {timing}  {phase['status']}")
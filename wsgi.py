@@ -0,0 +1,20 @@
+"""
+WSGI entry point for serving the orbit API with multiple worker processes.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+With preload_app enabled (see gunicorn.conf.py) this module is imported
+once in the master: catalogs, TLEs and propagators are loaded before the
+workers fork and are shared copy-on-write. Later TLE refreshes propagate
+between workers through the file-backed state store (ORBIT_STATE_DIR).
+"""
+
+import gc
+
+from server import app, preload
+
+preload()
+
+# Move everything loaded so far out of the collector's generations so that
+# garbage collection in the workers does not touch (and copy) those pages
+gc.freeze()